@@ -12,6 +12,8 @@ import json
 # Add the parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.rpc_limiter import LimitedClient
+
 console = Console()
 
 async def request_airdrop(client, wallet_address, amount_sol=0.5):
@@ -75,8 +77,8 @@ async def airdrop_with_retry():
     console.print(f"[red]Private Key: {private_key}[/red]")
     console.print("[yellow]SAVE THIS PRIVATE KEY! You'll need it for testing.[/yellow]")
     
-    # Initialize client
-    client = AsyncClient("https://api.devnet.solana.com")
+    # Initialize client (429s from the faucet are retried after their Retry-After)
+    client = LimitedClient(AsyncClient("https://api.devnet.solana.com"))
     
     try:
         # Initial balance check
@@ -86,7 +88,8 @@ async def airdrop_with_retry():
         # Target amount
         target_sol = 0.5  # We'll try to get 0.5 SOL total
         max_retries = 5
-        delay_between_requests = 3600  # Increased delay to 5 seconds
+        base_delay = 5  # seconds; doubles after each attempt
+        max_delay = 60
         
         for attempt in range(max_retries):
             current_balance = await check_balance(client, wallet.pubkey())
@@ -108,10 +111,11 @@ async def airdrop_with_retry():
                 console.print("2. Use Solana Explorer: https://explorer.solana.com/?cluster=devnet")
                 console.print("3. Use an existing wallet with balance")
             
-            # Wait before next attempt
+            # Back off before the next attempt
             if attempt < max_retries - 1:
-                console.print(f"[yellow]Waiting {delay_between_requests} seconds...[/yellow]")
-                await asyncio.sleep(delay_between_requests)
+                delay = min(max_delay, base_delay * 2 ** attempt)
+                console.print(f"[yellow]Waiting {delay} seconds...[/yellow]")
+                await asyncio.sleep(delay)
         
         # Final balance check
         final_balance = await check_balance(client, wallet.pubkey())
@@ -17,6 +17,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.ticket_system import TicketSystem
 from src.nft_ticket_minter import NFTTicketMinter
+from src.ticket_address import TicketAddresser
 
 console = Console()
 
@@ -340,7 +341,8 @@ async def demonstrate_ticket_systems(wallet_address: Pubkey):
                         if result["success"]:
                             console.print("\n[green]✓ Ticket purchased successfully![/green]")
                             console.print(f"Ticket Address: {result['ticket_pubkey']}")
-                            console.print("[yellow]SAVE THIS TICKET ADDRESS![/yellow]")
+                            # Plain tickets get a random address; seat NFT tickets (option 2) can be recomputed
+                            console.print("[yellow]SAVE THIS TICKET ADDRESS! It can't be derived later.[/yellow]")
                         else:
                             console.print(f"\n[red]Failed to purchase ticket: {result.get('error')}[/red]")
                     except Exception as e:
@@ -391,7 +393,8 @@ async def demonstrate_ticket_systems(wallet_address: Pubkey):
                         continue
                     
                     try:
-                        nft_minter = NFTTicketMinter()
+                        # Seat-addressed: the mint is derived from the wallet and seat
+                        nft_minter = NFTTicketMinter(ticket_addresser=TicketAddresser())
                         
                         # Check balance first
                         balance = await check_and_display_balance(nft_minter.client, wallet_address)
@@ -428,7 +431,7 @@ async def demonstrate_ticket_systems(wallet_address: Pubkey):
                             console.print(f"Section: {seat_info['section']}")
                             console.print(f"Row: {seat_info['row']}")
                             console.print(f"Seat: {seat_info['seat']}")
-                            console.print("\n[bold yellow]SAVE THESE ADDRESSES![/bold yellow]")
+                            console.print("\n[yellow]These addresses can be recomputed from your wallet, the event and the seat.[/yellow]")
                         else:
                             console.print(f"\n[red]Failed to purchase NFT ticket: {result['error']}[/red]")
                             
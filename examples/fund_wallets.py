@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+import json
+import argparse
+import base58
+from solders.keypair import Keypair
+from solana.rpc.async_api import AsyncClient
+from rich.console import Console
+
+# Add the parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rpc_limiter import LimitedClient
+from src.wallet_funder import WalletFunder
+
+console = Console()
+
+def load_treasury(path):
+    """Load a wallet saved by airdrop_sol.py (base58 private key)"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    return Keypair.from_seed(base58.b58decode(data["private_key"]))
+
+async def fund_fleet(count, amount_sol, treasury_path, output):
+    """Create ephemeral wallets and fund them all at once"""
+    wallets = [Keypair() for _ in range(count)]
+    treasury = load_treasury(treasury_path) if treasury_path else None
+    source = f"treasury {treasury.pubkey()}" if treasury else "the devnet faucet"
+    console.print(f"\n[cyan]Funding {count} wallets with {amount_sol} SOL each from {source}...[/cyan]")
+
+    # Initialize client (429s are retried after their Retry-After)
+    client = LimitedClient(AsyncClient("https://api.devnet.solana.com"))
+
+    try:
+        funder = WalletFunder(client, treasury=treasury)
+        targets = {wallet.pubkey(): int(amount_sol * 1_000_000_000) for wallet in wallets}
+        report = await funder.fund(targets)
+
+        console.print(f"[green]Funded {report['funded']}/{report['total']} wallets[/green]")
+        for address, wallet in report["wallets"].items():
+            if not wallet["funded"]:
+                console.print(f"[red]{address}: {wallet.get('error', 'balance below target')}[/red]")
+
+        # Save the fleet for load tests
+        with open(output, "w") as f:
+            json.dump([
+                {
+                    "pubkey": str(wallet.pubkey()),
+                    "private_key": base58.b58encode(bytes(wallet.secret())).decode("ascii")
+                }
+                for wallet in wallets
+            ], f, indent=2)
+        console.print(f"\n[green]Wallets saved to {output}[/green]")
+
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fund a fleet of test wallets")
+    parser.add_argument("--count", type=int, default=100, help="number of wallets")
+    parser.add_argument("--amount", type=float, default=0.05, help="SOL per wallet")
+    parser.add_argument("--treasury", help="wallet JSON to fund from (airdrops if omitted)")
+    parser.add_argument("--output", default="test_fleet.json", help="where to save the wallets")
+    args = parser.parse_args()
+
+    console.print("\n=== Solana Fleet Funding Helper ===")
+    asyncio.run(fund_fleet(args.count, args.amount, args.treasury, args.output))
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+from solders.account import Account
+from solders.pubkey import Pubkey
+from solders.rpc.responses import AccountNotification, ProgramNotification
+from solana.rpc.commitment import Confirmed
+from solana.rpc.websocket_api import connect
+
+# Most accounts getMultipleAccounts returns per call
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+
+class AccountMirror:
+    def __init__(self, client, ws_url: str = "wss://api.devnet.solana.com",
+                 max_staleness: float = 30.0, reconnect_delay: float = 1.0, connect_timeout: float = 10.0,
+                 max_accounts: int = 100_000):
+        """In-memory copy of ticket accounts kept current by websocket subscriptions"""
+        self.client = client  # RPC client for bulk loads and fallbacks
+        self.ws_url = ws_url
+        self.max_staleness = max_staleness
+        self.reconnect_delay = reconnect_delay
+        self.connect_timeout = connect_timeout
+        self.max_accounts = max_accounts
+
+        # Pubkey -> {"account": Account or None, "updated_at": monotonic time}, least recently used
+        # first; program subscriptions can add accounts without bound, so the oldest are dropped
+        self._accounts: "OrderedDict[Pubkey, dict]" = OrderedDict()
+        self._watched: Set[Pubkey] = set()
+        self._programs: Set[Pubkey] = set()
+
+        # Subscriptions the node has acknowledged on the current connection (accounts
+        # only once reloaded after the acknowledgement), and those still unanswered
+        self._live_accounts: Set[Pubkey] = set()
+        self._live_programs: Set[Pubkey] = set()
+        self._unacknowledged = 0
+
+        self._websocket = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self.stats = {"hits": 0, "fallbacks": 0, "notifications": 0, "reconnects": 0, "evictions": 0}
+
+    def _store(self, pubkey: Pubkey, account: Optional[Account], since: Optional[float] = None):
+        """Record an account's latest state (closed accounts are stored as None)
+
+        A state read at `since` is skipped if a newer one (a notification) arrived meanwhile.
+        """
+        entry = self._accounts.get(pubkey)
+        if since is not None and entry is not None and entry["updated_at"] > since:
+            return
+        if account is not None and account.lamports == 0:
+            account = None
+        self._accounts[pubkey] = {"account": account, "updated_at": time.monotonic()}
+        self._accounts.move_to_end(pubkey)
+        while len(self._accounts) > self.max_accounts:
+            self._accounts.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def _load(self, pubkeys: Iterable[Pubkey]):
+        """Bulk-load accounts, MULTIPLE_ACCOUNTS_LIMIT per RPC call"""
+        pubkeys = list(pubkeys)
+        for offset in range(0, len(pubkeys), MULTIPLE_ACCOUNTS_LIMIT):
+            chunk = pubkeys[offset:offset + MULTIPLE_ACCOUNTS_LIMIT]
+            since = time.monotonic()
+            resp = await self.client.get_multiple_accounts(chunk, commitment=Confirmed)
+            for pubkey, account in zip(chunk, resp.value):
+                self._store(pubkey, account, since=since)
+
+    async def start(self, pubkeys: Iterable[Pubkey] = (), program_ids: Iterable[Pubkey] = ()):
+        """Follow the accounts (and whole programs) over the websocket, loading each once subscribed"""
+        self._watched.update(pubkeys)
+        self._programs.update(program_ids)
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            # Still usable: load now and let entries age out until the stream is up
+            print("Account mirror: websocket not connected yet")
+            await self._load(self._watched)
+
+    async def watch(self, pubkeys: Iterable[Pubkey]):
+        """Start mirroring more accounts"""
+        new = [pubkey for pubkey in pubkeys if pubkey not in self._watched]
+        if not new:
+            return
+        self._watched.update(new)
+        if self._websocket is None:
+            # Subscribed (and reloaded) on the next connect
+            await self._load(new)
+            return
+        self._unacknowledged += len(new)
+        for pubkey in new:
+            await self._websocket.account_subscribe(pubkey, commitment=Confirmed, encoding="base64")
+
+    async def _subscribe_all(self, websocket):
+        """Send every subscription on a fresh connection"""
+        self._unacknowledged = len(self._watched) + len(self._programs)
+        for pubkey in self._watched:
+            await websocket.account_subscribe(pubkey, commitment=Confirmed, encoding="base64")
+        for program_id in self._programs:
+            await websocket.program_subscribe(program_id, commitment=Confirmed, encoding="base64")
+
+    async def _run(self):
+        """Keep a websocket open, re-subscribing and reloading after every reconnect"""
+        first = True
+        while True:
+            try:
+                async with connect(self.ws_url) as websocket:
+                    self._websocket = websocket
+                    await self._subscribe_all(websocket)
+                    if self._unacknowledged <= 0:
+                        self._connected.set()
+                    if not first:
+                        self.stats["reconnects"] += 1
+                    first = False
+                    acknowledged = []
+                    while True:
+                        for message in await websocket.recv():
+                            self._apply(websocket, message, acknowledged)
+                        if acknowledged and (self._unacknowledged <= 0
+                                             or len(acknowledged) >= MULTIPLE_ACCOUNTS_LIMIT):
+                            # Loaded only once subscribed, so no change falls between the load
+                            # and the first notification (this also covers what a disconnect missed)
+                            await self._load(acknowledged)
+                            self._live_accounts.update(acknowledged)
+                            acknowledged = []
+                        if self._unacknowledged <= 0:
+                            self._connected.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Account mirror disconnected: {e}")
+            finally:
+                self._websocket = None
+                self._connected.clear()
+                self._live_accounts.clear()
+                self._live_programs.clear()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _apply(self, websocket, message, acknowledged: List[Pubkey]):
+        """Apply one websocket message, collecting newly acknowledged account subscriptions"""
+        if isinstance(message, AccountNotification):
+            request = websocket.subscriptions.get(message.subscription)
+            if request is not None:
+                self.stats["notifications"] += 1
+                self._store(request.account, message.result.value)
+        elif isinstance(message, ProgramNotification):
+            self.stats["notifications"] += 1
+            keyed = message.result.value
+            self._store(keyed.pubkey, keyed.account)
+        else:
+            # Subscription acknowledged: from now on notifications keep the account current
+            request = websocket.subscriptions.get(message.result)
+            self._unacknowledged -= 1
+            if hasattr(request, "account"):
+                acknowledged.append(request.account)
+            elif hasattr(request, "program"):
+                self._live_programs.add(request.program)
+
+    def _is_current(self, pubkey: Pubkey, entry: dict) -> bool:
+        """Whether a mirrored entry can be served without asking the RPC"""
+        if pubkey in self._live_accounts:
+            return True
+        account = entry["account"]
+        if account is not None and account.owner in self._live_programs:
+            return True
+        return time.monotonic() - entry["updated_at"] <= self.max_staleness
+
+    async def get_account_info(self, pubkey: Pubkey) -> Optional[Account]:
+        """Get an account from memory, falling back to the RPC when it may be stale"""
+        entry = self._accounts.get(pubkey)
+        if entry is not None and self._is_current(pubkey, entry):
+            self._accounts.move_to_end(pubkey)
+            self.stats["hits"] += 1
+            return entry["account"]
+
+        self.stats["fallbacks"] += 1
+        resp = await self.client.get_account_info(pubkey, commitment=Confirmed)
+        self._store(pubkey, resp.value)
+        return self._accounts[pubkey]["account"]
+
+    async def close(self):
+        """Stop following the websocket"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,24 +1,82 @@
 import openai
-from typing import Dict, List, Optional
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
 from openai import AsyncOpenAI
+from src.topic_matcher import TopicMatcher
+from src.single_flight import SingleFlight
+from src.rate_limit import ConcurrencyGovernor, OverloadedError
+from src.conversation_memory import ConversationMemory
+from src.model_router import ModelRouter, LatencyBudgetExceeded
+
+BUSY_MESSAGE = "The assistant is busy right now. Please try again in a few seconds."
+
+OFF_TOPIC_MESSAGE = """I apologize, but I can only assist with questions related to:
+1. Solana blockchain
+2. Wallet management
+3. SOL tokens and transactions
+4. Our ticketing system
+5. Blockchain-related topics
+
+Please rephrase your question to focus on these topics."""
+
+SLOW_MESSAGE = "The assistant is taking too long to respond right now. Please try again in a moment."
+
+# A follow-up without a topic word must be short and refer back to the conversation
+FOLLOW_UP_MAX_WORDS = 8
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|that|this|those|these|them|they|their|"
+    r"tickets?|events?|seats?|shows?|concerts?|venues?|bookings?|orders?|refunds?)\b",
+    re.IGNORECASE
+)
 
 class TicketingAIAssistant:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, allowed_topics: Optional[List[str]] = None,
+                 topic_synonyms: Optional[Dict[str, str]] = None,
+                 governor: Optional[ConcurrencyGovernor] = None,
+                 memory: Optional[ConversationMemory] = None,
+                 router: Optional[ModelRouter] = None,
+                 base_url: Optional[str] = None):
         """Initialize the AI assistant with OpenAI API key"""
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set it in the environment or pass it to the constructor.")
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # The router owns retries (hedging + fallback), so the client must not retry on its own
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=base_url, max_retries=0)
+        
+        # Latency budget, hedged requests and model fallback for completions
+        self.router = router or ModelRouter()
         
         # Define allowed topics for context checking
-        self.allowed_topics = [
+        self.allowed_topics = allowed_topics or [
             "solana", "blockchain", "wallet", "sol", "crypto", "token", "nft",
             "transaction", "airdrop", "devnet", "testnet", "mainnet", "ticket",
             "smart contract", "web3", "dapp", "decentralized", "public key",
             "private key", "balance", "lamports", "account", "signature"
         ]
         
+        # Alternative spellings mapped to the topic they count as
+        self.topic_synonyms = topic_synonyms if topic_synonyms is not None else {
+            "phantom": "wallet", "solflare": "wallet", "keypair": "wallet",
+            "seed phrase": "private key", "pubkey": "public key",
+            "spl": "token", "mint": "nft", "lamport": "lamports",
+            "tx": "transaction", "fee": "transaction", "faucet": "airdrop",
+            "cryptocurrency": "crypto"
+        }
+        
+        # Compile the vocabulary once; matching is a single pass over the query
+        self.topic_matcher = TopicMatcher(self.allowed_topics, self.topic_synonyms)
+        
+        # Identical questions asked at the same time share one OpenAI call
+        self.single_flight = SingleFlight()
+        
+        # Cap concurrent OpenAI calls; upstream 429s shrink the cap (AIMD)
+        self.governor = governor or ConcurrencyGovernor()
+        
+        # Per-session history for follow-up questions, kept under a token budget
+        self.memory = memory or ConversationMemory()
+        
         # Predefined common queries and responses
         self.common_queries = {
             "get_sol": {
@@ -78,47 +136,230 @@ Our ticketing system uses Solana for secure and efficient ticket management."""
 
     def _is_relevant_query(self, query: str) -> bool:
         """Check if the query is relevant to Solana/blockchain context"""
-        query_lower = query.lower()
-        return any(topic in query_lower for topic in self.allowed_topics)
+        return self.topic_matcher.matches(query)
+    
+    def _is_follow_up(self, query: str) -> bool:
+        """Check if a query reads as a short follow-up to the previous answer"""
+        return len(query.split()) <= FOLLOW_UP_MAX_WORDS and FOLLOW_UP_PATTERN.search(query) is not None
+    
+    def get_matched_topics(self, query: str) -> List[str]:
+        """Get the allowed topics mentioned in a query"""
+        return self.topic_matcher.find_topics(query)
+    
+    def _get_local_answer(self, user_query: str, has_context: bool = False) -> Optional[str]:
+        """Get a predefined or off-topic answer without calling OpenAI"""
+        # First check if it matches any predefined queries
+        for query_info in self.common_queries.values():
+            if query_info["question"].lower() in user_query.lower():
+                return query_info["answer"]
+        
+        # Check if query is relevant to our context (short follow-ups in an
+        # ongoing conversation need not repeat a topic word)
+        if not self._is_relevant_query(user_query) and not (has_context and self._is_follow_up(user_query)):
+            return OFF_TOPIC_MESSAGE
+        
+        return None
+    
+    def _build_messages(self, user_query: str, session_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build the chat messages sent to OpenAI"""
+        return [
+            {"role": "system", "content": """You are a specialized assistant for a Solana-based ticketing system.
+            ONLY answer questions related to Solana blockchain, wallet management, SOL tokens, and the ticketing system.
+            If a question is not related to these topics, politely decline to answer and suggest staying on topic.
+            Keep responses concise, technical, and focused on Solana/blockchain concepts."""},
+            *self.memory.get_messages(session_id),
+            {"role": "user", "content": user_query}
+        ]
+    
+    def _normalize_query(self, user_query: str) -> str:
+        """Normalize a query so trivially different duplicates share a key"""
+        return " ".join(user_query.lower().split())
+    
+    @asynccontextmanager
+    async def _upstream_slot(self):
+        """Hold a governor slot around an OpenAI call and feed back its outcome"""
+        async with self.governor.slot():
+            try:
+                yield
+            except openai.RateLimitError:
+                self.governor.on_overload()
+                raise
+            self.governor.on_success()
+    
+    async def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """Ask OpenAI for a completion through the latency-budgeted router"""
+        async def call(model: str, timeout: float) -> str:
+            async with self._upstream_slot():
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=150,
+                    temperature=0.7,
+                    timeout=timeout
+                )
+            return response.choices[0].message.content
+        
+        # Hedges only use spare capacity; they never queue behind other requests
+        return await self.router.run(call, can_hedge=self.governor.has_capacity)
     
-    async def get_response(self, user_query: str) -> str:
+    @staticmethod
+    async def _next_content(chunks) -> Optional[str]:
+        """Next non-empty token from a completion stream, or None at its end"""
+        while True:
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+            if chunk.choices and chunk.choices[0].delta.content:
+                return chunk.choices[0].delta.content
+    
+    async def _open_stream(self, messages: List[Dict[str, str]]) -> Tuple[AsyncExitStack, object, Optional[str]]:
+        """Open a completion stream through the router; the latency budget covers the first token
+        
+        Returns (stack holding the governor slot, chunk iterator, first token).
+        """
+        opened = []
+        
+        async def call(model: str, timeout: float):
+            stack = AsyncExitStack()
+            try:
+                await stack.enter_async_context(self._upstream_slot())
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=150,
+                    temperature=0.7,
+                    stream=True,
+                    timeout=timeout
+                )
+                chunks = stream.__aiter__()
+                first = await self._next_content(chunks)
+            except BaseException:
+                await stack.aclose()
+                raise
+            attempt = (stack, chunks, first)
+            opened.append(attempt)
+            return attempt
+        
+        winner = None
+        try:
+            winner = await self.router.run(call, can_hedge=self.governor.has_capacity)
+            return winner
+        finally:
+            # A losing attempt that also got its first token still holds a slot
+            for attempt in opened:
+                if attempt is not winner:
+                    await attempt[0].aclose()
+    
+    async def _stream_tokens(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Yield a routed completion's tokens, holding its governor slot until the stream ends"""
+        stack, chunks, token = await self._open_stream(messages)
+        async with stack:
+            while token is not None:
+                yield token
+                token = await self._next_content(chunks)
+    
+    def _get_faq_fallback(self, user_query: str) -> str:
+        """Get the predefined answer sharing the most topics with the query"""
+        query_topics = set(self.get_matched_topics(user_query))
+        best_answer, best_overlap = None, 0
+        for query_info in self.common_queries.values():
+            faq_topics = set(self.get_matched_topics(query_info["question"] + " " + query_info["answer"]))
+            overlap = len(query_topics & faq_topics)
+            if overlap > best_overlap:
+                best_answer, best_overlap = query_info["answer"], overlap
+        
+        if best_answer is None:
+            return SLOW_MESSAGE
+        return f"{SLOW_MESSAGE}\n\nIn the meantime, this FAQ answer may help:\n{best_answer}"
+    
+    def get_routing_stats(self) -> dict:
+        """Get hedging, fallback and timeout counters"""
+        return self.router.get_stats()
+    
+    def get_governor_stats(self) -> dict:
+        """Get the current OpenAI concurrency limit and queue counters"""
+        return self.governor.get_stats()
+    
+    def get_coalescing_stats(self) -> dict:
+        """Get counters for coalesced OpenAI calls"""
+        return self.single_flight.get_stats()
+    
+    async def get_response(self, user_query: str, session_id: Optional[str] = None) -> str:
         """Get AI response for user query"""
         try:
-            # First check if it matches any predefined queries
-            for query_info in self.common_queries.values():
-                if query_info["question"].lower() in user_query.lower():
-                    return query_info["answer"]
-            
-            # Check if query is relevant to our context
-            if not self._is_relevant_query(user_query):
-                return """I apologize, but I can only assist with questions related to:
-1. Solana blockchain
-2. Wallet management
-3. SOL tokens and transactions
-4. Our ticketing system
-5. Blockchain-related topics
-
-Please rephrase your question to focus on these topics."""
+            has_context = self.memory.has_context(session_id)
+            local_answer = self._get_local_answer(user_query, has_context)
+            if local_answer is not None:
+                if local_answer is not OFF_TOPIC_MESSAGE:
+                    self.memory.add_exchange(session_id, user_query, local_answer)
+                return local_answer
             
             # If relevant, use OpenAI
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": """You are a specialized assistant for a Solana-based ticketing system.
-                    ONLY answer questions related to Solana blockchain, wallet management, SOL tokens, and the ticketing system.
-                    If a question is not related to these topics, politely decline to answer and suggest staying on topic.
-                    Keep responses concise, technical, and focused on Solana/blockchain concepts."""},
-                    {"role": "user", "content": user_query}
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
+            messages = self._build_messages(user_query, session_id)
+            if has_context:
+                answer = await self._complete(messages)
+            else:
+                # Context-free duplicates asked at the same time await the same call
+                answer = await self.single_flight.do(
+                    self._normalize_query(user_query),
+                    lambda: self._complete(messages)
+                )
             
-            return response.choices[0].message.content
+            self.memory.add_exchange(session_id, user_query, answer)
+            return answer
             
+        except (LatencyBudgetExceeded, openai.APITimeoutError):
+            return self._get_faq_fallback(user_query)
+        except OverloadedError:
+            return BUSY_MESSAGE
         except Exception as e:
             return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
     
+    async def stream_response(self, user_query: str, session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream AI response for user query chunk by chunk"""
+        try:
+            # Predefined and off-topic answers come back as a single chunk
+            has_context = self.memory.has_context(session_id)
+            local_answer = self._get_local_answer(user_query, has_context)
+            if local_answer is not None:
+                if local_answer is not OFF_TOPIC_MESSAGE:
+                    self.memory.add_exchange(session_id, user_query, local_answer)
+                yield local_answer
+                return
+            
+            # If relevant, stream tokens from OpenAI as they arrive (hedged like get_response)
+            messages = self._build_messages(user_query, session_id)
+            if has_context:
+                tokens = self._stream_tokens(messages)
+            else:
+                # Context-free duplicates share one upstream stream; joiners replay it from the start
+                tokens = self.single_flight.stream(
+                    self._normalize_query(user_query),
+                    lambda: self._stream_tokens(messages)
+                )
+            
+            answer = []
+            try:
+                async for token in tokens:
+                    answer.append(token)
+                    yield token
+            finally:
+                await tokens.aclose()
+            
+            self.memory.add_exchange(session_id, user_query, "".join(answer))
+            
+        except (LatencyBudgetExceeded, openai.APITimeoutError):
+            yield self._get_faq_fallback(user_query)
+        except OverloadedError:
+            yield BUSY_MESSAGE
+        except Exception as e:
+            yield f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+    
+    def clear_conversation(self, session_id: str):
+        """Forget a session's conversation history"""
+        self.memory.clear(session_id)
+    
     def get_common_queries(self) -> List[str]:
         """Get list of common queries"""
         return [info["question"] for info in self.common_queries.values()]
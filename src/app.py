@@ -1,10 +1,19 @@
-from flask import Flask, render_template, request, jsonify
-from ai_assistant import TicketingAIAssistant
-import asyncio
+from flask import Flask, Response, render_template, request, jsonify
+import atexit
+import json
+import math
 import os
+import sys
 from dotenv import load_dotenv
 import pathlib
 
+# Add the parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_assistant import TicketingAIAssistant
+from src.background_loop import BackgroundLoop
+from src.rate_limit import ClientRateLimiter
+
 # Load environment variables from .env file
 env_path = pathlib.Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
@@ -17,8 +26,27 @@ api_key = os.getenv('OPENAI_API_KEY')
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
+# One long-lived event loop serves every request, so async clients keep
+# their connection pools across requests instead of getting a fresh loop each time
+background_loop = BackgroundLoop(name="app-loop")
+atexit.register(background_loop.stop)
+
+async def _create_assistant() -> TicketingAIAssistant:
+    """Create the assistant on the background loop so its clients live there"""
+    return TicketingAIAssistant(api_key=api_key)
+
 # Initialize AI assistant with API key
-ai_assistant = TicketingAIAssistant(api_key=api_key)
+ai_assistant = background_loop.run(_create_assistant())
+
+# API keys that get their own rate-limit bucket (comma-separated); any other
+# X-API-Key header is ignored, so made-up keys can't buy a fresh burst
+ask_api_keys = frozenset(key.strip() for key in os.getenv('ASK_API_KEYS', '').split(',') if key.strip())
+
+# Per-client token buckets for /ask (keyed by a known API key, else client IP)
+ask_rate_limiter = ClientRateLimiter(
+    rate=float(os.getenv('ASK_RATE_PER_SECOND', '1')),
+    burst=int(os.getenv('ASK_BURST', '5'))
+)
 
 @app.route('/')
 def home():
@@ -31,14 +59,55 @@ def home():
                          wallet_guide=wallet_guide,
                          ticket_guide=ticket_guide)
 
+def _sse(data: dict, event: str = None) -> str:
+    """Format a server-sent event"""
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+def _stream_answer(user_query: str, session_id: str = None):
+    """Yield the assistant's answer as server-sent events, token by token"""
+    for token in background_loop.iterate(ai_assistant.stream_response(user_query, session_id)):
+        yield _sse({'token': token})
+    yield _sse({}, event='done')
+
+def _client_id() -> str:
+    """Identify the caller for rate limiting"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in ask_api_keys:
+        return f"key:{api_key}"
+    return f"ip:{request.remote_addr}"
+
+def _session_id():
+    """Get the caller's conversation id, scoped to the caller"""
+    session_id = request.json.get('session_id')
+    return f"{_client_id()}:{session_id}" if session_id else None
+
+def _wants_stream() -> bool:
+    """Check if the client asked for a streamed answer"""
+    return bool(request.json.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
 @app.route('/ask', methods=['POST'])
-async def ask():
+def ask():
     """Handle user questions"""
+    allowed, retry_after = ask_rate_limiter.allow(_client_id())
+    if not allowed:
+        response = jsonify({'error': 'Too many requests. Please slow down.'})
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response, 429
+    
     user_query = request.json.get('query', '')
     if not user_query:
         return jsonify({'error': 'No query provided'}), 400
+    
+    # Stream tokens to the browser as they arrive
+    if _wants_stream():
+        return Response(
+            _stream_answer(user_query, _session_id()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
         
-    response = await ai_assistant.get_response(user_query)
+    response = background_loop.run(ai_assistant.get_response(user_query, _session_id()))
     return jsonify({'response': response})
 
 if __name__ == '__main__':
@@ -0,0 +1,68 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterable, Awaitable, Iterator, Optional
+
+
+class BackgroundLoop:
+    def __init__(self, name: str = "background-loop"):
+        """Run one long-lived event loop in a daemon thread"""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_forever(self):
+        """Thread target: serve the loop until stop() is called"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return a concurrent future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() called from its own loop; await the coroutine instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Don't leave work running for a caller that gave up
+            future.cancel()
+            raise
+
+    def iterate(self, async_iterable: AsyncIterable) -> Iterator:
+        """Drive an async iterator on the loop from a sync generator"""
+        iterator = async_iterable.__aiter__()
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            # Close early-exited generators (e.g. a client disconnect) on the loop
+            if hasattr(iterator, "aclose") and self.loop.is_running():
+                self.run(iterator.aclose())
+
+    def in_loop_thread(self) -> bool:
+        """Check if the caller is running on the loop's thread"""
+        return threading.current_thread() is self._thread
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel pending tasks, stop the loop and join its thread"""
+        if not self.loop.is_running():
+            return
+
+        async def cancel_pending():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.run(cancel_pending(), timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
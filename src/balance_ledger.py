@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+from solders.pubkey import Pubkey
+
+# Base fee charged per transaction signature (lamports)
+LAMPORTS_PER_SIGNATURE = 5_000
+
+
+class BalanceLedger:
+    def __init__(self, fetch_balance: Callable[[Pubkey], Awaitable[int]], refresh_interval: float = 30.0):
+        """Optimistic per-wallet balances: load once, debit locally, reconcile periodically"""
+        self.fetch_balance = fetch_balance
+        self.refresh_interval = refresh_interval
+        self._wallets: Dict[Pubkey, dict] = {}
+        self._locks: Dict[Pubkey, asyncio.Lock] = {}
+        self.stats = {"loads": 0, "local_checks": 0}
+
+    def _wallet(self, pubkey: Pubkey) -> dict:
+        """Get (or start) the local record for a wallet"""
+        wallet = self._wallets.get(pubkey)
+        if wallet is None:
+            wallet = {"available": 0, "pending": 0, "loaded_at": None}
+            self._wallets[pubkey] = wallet
+        return wallet
+
+    async def reconcile(self, pubkey: Pubkey) -> int:
+        """Reload a wallet's balance from the chain, keeping unsettled debits"""
+        lock = self._locks.setdefault(pubkey, asyncio.Lock())
+        async with lock:
+            chain_balance = await self.fetch_balance(pubkey)
+            wallet = self._wallet(pubkey)
+            wallet["available"] = chain_balance - wallet["pending"]
+            wallet["loaded_at"] = time.monotonic()
+            self.stats["loads"] += 1
+            return wallet["available"]
+
+    async def get_available(self, pubkey: Pubkey) -> int:
+        """Get the locally tracked spendable balance, loading or refreshing it when due"""
+        wallet = self._wallets.get(pubkey)
+        if (wallet is None or wallet["loaded_at"] is None
+                or time.monotonic() - wallet["loaded_at"] > self.refresh_interval):
+            return await self.reconcile(pubkey)
+        self.stats["local_checks"] += 1
+        return wallet["available"]
+
+    def reserve(self, pubkey: Pubkey, amount: int):
+        """Debit a submitted transaction's cost locally"""
+        wallet = self._wallet(pubkey)
+        wallet["available"] -= amount
+        wallet["pending"] += amount
+
+    def settle(self, pubkey: Pubkey, amount: int):
+        """Mark a reserved debit as confirmed on chain"""
+        wallet = self._wallet(pubkey)
+        wallet["pending"] = max(0, wallet["pending"] - amount)
+
+    def release(self, pubkey: Pubkey, amount: int):
+        """Undo a reserved debit whose transaction failed"""
+        wallet = self._wallet(pubkey)
+        wallet["pending"] = max(0, wallet["pending"] - amount)
+        wallet["available"] += amount
+
+    def credit(self, pubkey: Pubkey, amount: int):
+        """Record lamports received by a tracked wallet"""
+        if pubkey in self._wallets:
+            self._wallets[pubkey]["available"] += amount
+
+    def invalidate(self, pubkey: Pubkey):
+        """Force the next lookup to reload from the chain"""
+        if pubkey in self._wallets:
+            self._wallets[pubkey]["loaded_at"] = None
+
+    async def recover(self, pubkey: Pubkey, amount: int):
+        """Release a failed debit and reconcile, swallowing RPC errors"""
+        self.release(pubkey, amount)
+        try:
+            await self.reconcile(pubkey)
+        except Exception:
+            # Still unknown; reload on next use
+            self.invalidate(pubkey)
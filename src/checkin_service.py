@@ -0,0 +1,280 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Mapping, Optional
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import Transaction as SoldersTransaction
+from solana.transaction import Transaction
+from src.ticket_log import TicketLog, USED
+from src.transaction_packing import pack_instructions
+from src.transaction_submitter import LANDED
+
+# Most signatures one getSignatureStatuses call accepts
+STATUS_BATCH = 256
+
+
+class CheckInService:
+    def __init__(self, minter, payer: Keypair, ticket_log: TicketLog, flush_size: int = 32,
+                 flush_interval: float = 1.0, signers: Optional[Mapping[str, Keypair]] = None,
+                 on_failure: Optional[Callable[[str, str], None]] = None, max_attempts: int = 5):
+        """Admit scans immediately; burn the tickets later in coalesced, packed transactions"""
+        self.minter = minter
+        self.payer = payer
+        self.ticket_log = ticket_log
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.on_failure = on_failure
+        self.max_attempts = max_attempts
+
+        # Owner keys for burns still to send, by pubkey string; each is dropped
+        # once the last of its owner's burns settles
+        self._signers: Dict[str, Keypair] = dict(signers or {})
+        self._owner_burns: Counter = Counter()
+        self._attempts: Counter = Counter()
+
+        # Scans admitted but not yet burned (ticket -> owner), in scan order
+        self._pending: Dict[str, str] = {}
+        self._tasks: set = set()
+        self._wake = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self.failures: List[dict] = []
+        self.stats = {"admitted": 0, "rejected": 0, "flushes": 0, "transactions": 0, "burned": 0,
+                      "failed": 0, "splits": 0, "retries": 0, "reconciled": 0}
+
+        # Scans the log holds as admitted but never burned (a crash before the flush)
+        for ticket, state in ticket_log.tickets.items():
+            if state.get("burn_pending"):
+                self._pending[ticket] = state.get("checked_in_by")
+                self._owner_burns[state.get("checked_in_by")] += 1
+
+    def start(self):
+        """Start the background flusher"""
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._run())
+
+    async def scan(self, owner: Keypair, nft_address: Pubkey) -> dict:
+        """Admit a ticket at the gate; the burn happens in the background"""
+        ticket = str(nft_address)
+
+        # Local check first: a ticket already admitted here never gets in twice
+        state = self.ticket_log.get(ticket)
+        if state is not None and state["status"] == USED:
+            self.stats["rejected"] += 1
+            return {"success": False, "error": "Ticket already used"}
+        verify_result = await self.minter.verify_nft_ticket(nft_address)
+        if not verify_result["valid"]:
+            self.stats["rejected"] += 1
+            return {"success": False, "error": "Invalid ticket"}
+
+        # Re-check after the await: the same ticket may have been scanned at another lane meanwhile
+        state = self.ticket_log.get(ticket)
+        if state is not None and state["status"] == USED:
+            self.stats["rejected"] += 1
+            return {"success": False, "error": "Ticket already used"}
+
+        # Durable before the gate opens
+        owner_key = str(owner.pubkey())
+        self.ticket_log.record(USED, ticket, burn_pending=True, checked_in_by=owner_key, checked_in_at=time.time())
+        if self.minter.verification_cache is not None:
+            self.minter.verification_cache.mark_used(nft_address)
+        self._signers[owner_key] = owner
+        self._owner_burns[owner_key] += 1
+        self._pending[ticket] = owner_key
+        self.stats["admitted"] += 1
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+        return {"success": True, "status": "admitted"}
+
+    def pending(self) -> int:
+        """Admitted scans whose burn hasn't been sent yet"""
+        return len(self._pending)
+
+    async def _run(self):
+        """Flush whenever enough scans are waiting or the interval passes"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Hand every pending burn to a background send"""
+        if not self._pending:
+            return
+        batch = list(self._pending.items())
+        self._pending = {}
+        self.stats["flushes"] += 1
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, scans: List[tuple]):
+        """Pack the burns into as few transactions as fit and submit them concurrently"""
+        ready = []
+        for ticket, owner_key in scans:
+            if owner_key not in self._signers:
+                self._fail(ticket, owner_key, "Owner key unavailable to sign the burn")
+            else:
+                ready.append((ticket, owner_key))
+        if not ready:
+            return
+
+        # A retried burn may have landed after all: re-sending it would be rejected as already burned
+        try:
+            ready = await self._reconcile(ready)
+        except Exception as e:
+            self._retry(ready, f"Failed to check earlier burns: {str(e)}")
+            return
+        if not ready:
+            return
+
+        try:
+            recent_blockhash = await self.minter.client.get_latest_blockhash()
+        except Exception as e:
+            self._retry(ready, f"Failed to get blockhash: {str(e)}")
+            return
+
+        payer = self.payer.pubkey()
+        burn_ixs = [
+            self.minter.burn_instruction(Pubkey.from_string(owner_key), Pubkey.from_string(ticket))
+            for ticket, owner_key in ready
+        ]
+        jobs = []
+        start = 0
+        for batch in pack_instructions(payer, burn_ixs):
+            jobs.append(self._submit(batch, ready[start:start + len(batch)], recent_blockhash))
+            start += len(batch)
+        await asyncio.gather(*jobs)
+
+    async def _submit(self, instructions: list, scans: List[tuple], recent_blockhash):
+        """Submit one packed burn transaction and record each scan's outcome"""
+        self.stats["transactions"] += 1
+        try:
+            transaction = Transaction(fee_payer=self.payer.pubkey()).add(*instructions)
+            transaction.recent_blockhash = recent_blockhash.value.blockhash
+            owners = {owner_key: self._signers[owner_key] for _, owner_key in scans}
+            transaction.sign(self.payer, *owners.values())
+            wire = transaction.serialize()
+            signature = str(SoldersTransaction.from_bytes(wire).signatures[0])
+            # Logged before sending, so an undecided burn can be reconciled later (even after a restart)
+            for ticket, _ in scans:
+                self.ticket_log.record(
+                    USED, ticket, burn_signatures=self._burn_signatures(ticket) + [signature]
+                )
+            outcome = await self.minter.submitter.submit_raw(
+                self.minter.client, wire, recent_blockhash.value.last_valid_block_height
+            )
+        except Exception as e:
+            outcome = {"success": False, "status": "unknown", "error": str(e)}
+
+        if outcome["success"]:
+            for ticket, owner_key in scans:
+                self._burned(ticket, owner_key, signature)
+            return
+
+        error = outcome.get("error", outcome.get("status"))
+        if outcome.get("status") != "failed":
+            # Expired or undecided: nothing is known to be wrong with these burns
+            self._retry(scans, error)
+        elif len(scans) > 1:
+            # One bad burn rejects the whole transaction: split it to find the bad scan
+            self.stats["splits"] += 1
+            middle = len(scans) // 2
+            await asyncio.gather(
+                self._submit(instructions[:middle], scans[:middle], recent_blockhash),
+                self._submit(instructions[middle:], scans[middle:], recent_blockhash)
+            )
+        else:
+            # Rejected for being burned already, by an earlier attempt that landed meanwhile?
+            try:
+                unsettled = await self._reconcile(scans)
+            except Exception as e:
+                self._retry(scans, f"Failed to check earlier burns: {str(e)}")
+                return
+            for ticket, owner_key in unsettled:
+                self._fail(ticket, owner_key, error)
+
+    def _burn_signatures(self, ticket: str) -> List[str]:
+        """Signatures of every burn sent for a ticket so far"""
+        state = self.ticket_log.get(ticket) or {}
+        return list(state.get("burn_signatures", []))
+
+    async def _reconcile(self, scans: List[tuple]) -> List[tuple]:
+        """Record scans whose earlier burn landed; returns the ones still unburned"""
+        checks = [(ticket, signature) for ticket, _ in scans for signature in self._burn_signatures(ticket)]
+        landed = {}
+        for start in range(0, len(checks), STATUS_BATCH):
+            batch = checks[start:start + STATUS_BATCH]
+            resp = await self.minter.client.get_signature_statuses(
+                [Signature.from_string(signature) for _, signature in batch], search_transaction_history=True
+            )
+            for (ticket, signature), status in zip(batch, resp.value):
+                if status is not None and status.err is None and status.confirmation_status in LANDED:
+                    landed[ticket] = signature
+
+        unsettled = []
+        for ticket, owner_key in scans:
+            if ticket in landed:
+                self.stats["reconciled"] += 1
+                self._burned(ticket, owner_key, landed[ticket])
+            else:
+                unsettled.append((ticket, owner_key))
+        return unsettled
+
+    def _burned(self, ticket: str, owner_key: str, signature: str):
+        """Record a burn that landed"""
+        self.ticket_log.record(USED, ticket, burn_pending=False, burn_signature=signature)
+        self.stats["burned"] += 1
+        self._release(ticket, owner_key)
+
+    def _retry(self, scans: List[tuple], error: str):
+        """Put burns back in the queue for the next flush, up to max_attempts"""
+        for ticket, owner_key in scans:
+            self._attempts[ticket] += 1
+            if self._attempts[ticket] >= self.max_attempts:
+                self._fail(ticket, owner_key, error)
+            else:
+                self.stats["retries"] += 1
+                self._pending[ticket] = owner_key
+
+    def _release(self, ticket: str, owner_key: str):
+        """A burn settled: forget its attempts, and its owner's key once nothing else needs it"""
+        self._attempts.pop(ticket, None)
+        self._owner_burns[owner_key] -= 1
+        if self._owner_burns[owner_key] <= 0:
+            del self._owner_burns[owner_key]
+            self._signers.pop(owner_key, None)
+
+    def _fail(self, ticket: str, owner_key: str, error: str):
+        """Report a burn that can't land; the ticket stays admitted"""
+        self.ticket_log.record(USED, ticket, burn_pending=False, burn_error=error)
+        self.failures.append({"ticket": ticket, "error": error})
+        self.stats["failed"] += 1
+        self._release(ticket, owner_key)
+        if self.on_failure is not None:
+            self.on_failure(ticket, error)
+
+    async def drain(self):
+        """Flush everything pending and wait for the sends to finish"""
+        self.flush()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+    async def close(self):
+        """Stop the flusher after draining"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.drain()
+
+    def get_stats(self) -> dict:
+        """Get counters and the current backlog"""
+        return {**self.stats, "pending": self.pending(), "in_flight": len(self._tasks)}
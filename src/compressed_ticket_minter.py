@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+from typing import List, Optional, Tuple
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solana.rpc.async_api import AsyncClient
+from solana.transaction import Transaction
+from spl.memo.constants import MEMO_PROGRAM_ID
+from spl.memo.instructions import create_memo, MemoParams
+from src.merkle_tree import ConcurrentMerkleTree, hash_leaf
+from src.transaction_submitter import TransactionSubmitter
+
+# Anchor attempts for a batch whose leaves later batches have been appended on top of
+MAX_ANCHOR_ATTEMPTS = 3
+
+
+class CompressedTicketMinter:
+    def __init__(self, rpc_url="https://api.devnet.solana.com", max_depth: int = 20,
+                 canopy_depth: int = 10, tree: Optional[ConcurrentMerkleTree] = None,
+                 tree_id: Optional[Pubkey] = None, state_path: Optional[str] = None,
+                 submitter: Optional[TransactionSubmitter] = None):
+        """Mint tickets as leaves of a locally maintained Merkle tree"""
+        self.client = AsyncClient(rpc_url)
+        self.tree = tree or ConcurrentMerkleTree(max_depth, canopy_depth)
+        self.tree_id = tree_id or Keypair().pubkey()
+        self.tickets: List[dict] = []  # leaf data by index
+
+        # Root memos are signed once and rebroadcast until they land or expire
+        self.submitter = submitter or TransactionSubmitter()
+
+        # Guards the tree and tickets only; anchors are sent outside it, so batches overlap
+        self._append_lock = asyncio.Lock()
+
+        # Leaves covered by the latest anchored root (each root covers every earlier leaf)
+        self._anchored = {"size": 0, "signature": None}
+
+        # Optional file holding the tree and ticket data across restarts: a compacted
+        # first line, then one appended line per change
+        self.state_path = state_path
+        if state_path is not None and os.path.exists(state_path):
+            self._load_state(state_path)
+
+    @staticmethod
+    def encode_ticket(ticket: dict) -> bytes:
+        """Canonical bytes for a ticket leaf"""
+        return json.dumps(ticket, sort_keys=True, separators=(",", ":")).encode()
+
+    def save(self, path: Optional[str] = None):
+        """Persist (and compact) the tree id and ticket data; the tree is rebuilt from them on load"""
+        path = path or self.state_path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "tree_id": str(self.tree_id),
+                "max_depth": self.tree.max_depth,
+                "canopy_depth": self.tree.canopy_depth,
+                "tickets": self.tickets
+            }, f)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+    def _persist(self, change: dict):
+        """Append one change to the state file instead of rewriting every ticket"""
+        if self.state_path is None:
+            return
+        if not os.path.exists(self.state_path):
+            self.save()
+            return
+        with open(self.state_path, "a") as f:
+            f.write(json.dumps(change, separators=(",", ":")) + "\n")
+
+    def _load_state(self, path: str):
+        """Restore a minter saved with save() plus the changes appended since"""
+        with open(path, "r") as f:
+            data = json.loads(f.readline())
+            tickets = data["tickets"]
+            for line in f:
+                change = json.loads(line)
+                if "append" in change:
+                    tickets[change["start"]:] = change["append"]
+                elif "truncate" in change:
+                    del tickets[change["truncate"]:]
+                elif "used" in change:
+                    tickets[change["used"]] = {**tickets[change["used"]], "used": True}
+        self.tree_id = Pubkey.from_string(data["tree_id"])
+        self.tickets = tickets
+        self.tree = ConcurrentMerkleTree(data["max_depth"], data["canopy_depth"])
+        self.tree.append_batch([hash_leaf(self.encode_ticket(ticket)) for ticket in self.tickets])
+
+    def _root_memo(self, start: int, count: int) -> bytes:
+        """Memo anchoring the tree root after an append"""
+        return f"ticket-tree:{self.tree_id}:{start}:{count}:{self.tree.root.hex()}".encode()
+
+    def _sign_anchor(self, owner: Keypair, start: int, recent_blockhash) -> bytes:
+        """Sign a memo recording the current root (call with the append lock held)"""
+        memo_ix = create_memo(MemoParams(
+            program_id=MEMO_PROGRAM_ID,
+            signer=owner.pubkey(),
+            message=self._root_memo(start, self.tree.size - start)
+        ))
+        transaction = Transaction(fee_payer=owner.pubkey()).add(memo_ix)
+        transaction.recent_blockhash = recent_blockhash.value.blockhash
+        transaction.sign(owner)
+        return transaction.serialize()
+
+    async def _anchor(self, owner: Keypair, batch: List[dict]) -> Tuple[int, dict]:
+        """Append a batch's leaves and anchor the new root; returns (first leaf index, outcome)"""
+        recent_blockhash = await self.client.get_latest_blockhash()
+        async with self._append_lock:
+            start = self.tree.append_batch([hash_leaf(self.encode_ticket(ticket)) for ticket in batch])
+            self.tickets.extend(batch)
+            self._persist({"start": start, "append": batch})
+            end = self.tree.size
+            wire = self._sign_anchor(owner, start, recent_blockhash)
+
+        attempts = 1
+        while True:
+            outcome = await self.submitter.submit_raw(
+                self.client, wire, recent_blockhash.value.last_valid_block_height
+            )
+            if outcome["success"]:
+                if end > self._anchored["size"]:
+                    self._anchored = {"size": end, "signature": str(outcome["signature"])}
+                return start, outcome
+            if outcome["status"] not in ("failed", "expired"):
+                # Undecided: it may still land, and any later anchor covers these leaves too
+                return start, outcome
+
+            recent_blockhash = await self.client.get_latest_blockhash()
+            async with self._append_lock:
+                if self._anchored["size"] >= start + len(batch):
+                    # A later batch's root, anchored meanwhile, already covers these leaves
+                    return start, {"success": True, "status": "confirmed", "signature": self._anchored["signature"]}
+                if self.tree.size == start + len(batch):
+                    # The root was never anchored: the batch's leaves go too
+                    self.tree.truncate(start)
+                    del self.tickets[start:]
+                    self._persist({"truncate": start})
+                    return start, outcome
+                if attempts >= MAX_ANCHOR_ATTEMPTS:
+                    # Kept under the later leaves; whichever anchor lands next covers them
+                    return start, outcome
+                # Later batches sit on top of these leaves: anchor the current root instead
+                end = self.tree.size
+                wire = self._sign_anchor(owner, start, recent_blockhash)
+            attempts += 1
+
+    async def mint_compressed_tickets(self, owner: Keypair, event_name: str, event_date: str,
+                                      seats: List[dict], price: float, batch_size: int = 1000) -> dict:
+        """Append one leaf per seat and anchor each batch's root in one transaction"""
+        minted = []
+        transaction_ids = []
+        try:
+            for offset in range(0, len(seats), batch_size):
+                batch = [
+                    {
+                        "event": event_name,
+                        "event_date": event_date,
+                        "seat_info": seat,
+                        "price": price,
+                        "owner": str(owner.pubkey()),
+                        "used": False
+                    }
+                    for seat in seats[offset:offset + batch_size]
+                ]
+                start, outcome = await self._anchor(owner, batch)
+                entries = [{"leaf_index": start + i, "metadata": ticket} for i, ticket in enumerate(batch)]
+                if not outcome["success"]:
+                    result = self._mint_result(minted, transaction_ids)
+                    result.update({
+                        "success": False,
+                        "status": outcome["status"],
+                        "error": f"Failed to mint compressed tickets: {outcome.get('error', outcome['status'])}"
+                    })
+                    if outcome["status"] == "unknown":
+                        # Not rolled back: the leaves stay until a later anchor settles them
+                        result["unconfirmed"] = entries
+                    return result
+                transaction_ids.append(str(outcome["signature"]))
+                minted.extend(entries)
+
+            return {"success": True, **self._mint_result(minted, transaction_ids)}
+
+        except Exception as e:
+            # Earlier batches are anchored and kept; report them with the error
+            return {
+                "success": False,
+                "error": f"Failed to mint compressed tickets: {str(e)}",
+                **self._mint_result(minted, transaction_ids)
+            }
+
+    def _mint_result(self, minted: List[dict], transaction_ids: List[str]) -> dict:
+        """The tree and the tickets a mint call anchored so far"""
+        return {
+            "tree_id": str(self.tree_id),
+            "root": self.tree.root.hex(),
+            "tickets": minted,
+            "transaction_ids": transaction_ids
+        }
+
+    def get_ticket_proof(self, leaf_index: int) -> dict:
+        """Generate an ownership proof for a ticket leaf"""
+        try:
+            return {
+                "success": True,
+                "leaf_index": leaf_index,
+                "ticket": self.tickets[leaf_index],
+                "leaf": self.tree.get_leaf(leaf_index).hex(),
+                "proof": [node.hex() for node in self.tree.get_proof(leaf_index)],
+                "root": self.tree.root.hex()
+            }
+        except IndexError:
+            return {"success": False, "error": "Ticket not found"}
+
+    def verify_ticket_proof(self, ticket: dict, leaf_index: int, proof: List[str]) -> dict:
+        """Verify that a ticket is the leaf at leaf_index"""
+        leaf = hash_leaf(self.encode_ticket(ticket))
+        # Check against the current root only, so a pre-use proof can't be replayed
+        proof_nodes = [bytes.fromhex(node) for node in proof]
+        if not self.tree.verify(leaf, leaf_index, proof_nodes, self.tree.root):
+            return {"valid": False, "error": "Invalid ticket proof"}
+        if ticket.get("used"):
+            return {"valid": False, "error": "Ticket already used"}
+        return {"valid": True, "ticket": ticket}
+
+    def use_compressed_ticket(self, leaf_index: int, owner: Pubkey) -> dict:
+        """Mark a ticket leaf as used"""
+        try:
+            ticket = self.tickets[leaf_index]
+        except IndexError:
+            return {"success": False, "error": "Ticket not found"}
+        if ticket["owner"] != str(owner):
+            return {"success": False, "error": "Not the ticket owner"}
+        if ticket["used"]:
+            return {"success": False, "error": "Ticket already used"}
+        ticket = {**ticket, "used": True}
+        self.tickets[leaf_index] = ticket
+        self.tree.replace_leaf(leaf_index, hash_leaf(self.encode_ticket(ticket)))
+        self._persist({"used": leaf_index})
+        return {"success": True, "root": self.tree.root.hex()}
+
+    async def close(self):
+        """Close the client connection"""
+        await self.client.close()
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+class ConversationMemory:
+    def __init__(self, max_tokens: int = 600, summary_max_tokens: int = 200,
+                 max_sessions: int = 1000, idle_timeout: float = 1800.0):
+        """Per-session chat history kept under a strict token budget"""
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, dict]" = OrderedDict()
+
+    def _get_session(self, session_id: str, create: bool = False) -> Optional[dict]:
+        """Look up a session, refreshing its idle timer"""
+        self._evict_idle()
+        session = self._sessions.get(session_id)
+        if session is None and create:
+            session = {"turns": [], "summary": [], "tokens": 0}
+            self._sessions[session_id] = session
+            # Bound memory: drop the least recently used sessions
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        if session is not None:
+            session["last_seen"] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict_idle(self):
+        """Forget sessions that have been idle longer than idle_timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["last_seen"] >= cutoff:
+                break
+            del self._sessions[session_id]
+
+    def has_context(self, session_id: Optional[str]) -> bool:
+        """Check if a session has any remembered conversation"""
+        if session_id is None:
+            return False
+        session = self._get_session(session_id)
+        return session is not None and bool(session["turns"] or session["summary"])
+
+    def get_messages(self, session_id: Optional[str]) -> List[Dict[str, str]]:
+        """Get the remembered context as chat messages (summary first, then recent turns)"""
+        if session_id is None:
+            return []
+        session = self._get_session(session_id)
+        if session is None:
+            return []
+        messages = []
+        if session["summary"]:
+            messages.append({
+                "role": "system",
+                "content": "Summary of the earlier conversation:\n" + "\n".join(session["summary"])
+            })
+        messages.extend({"role": role, "content": content} for role, content in session["turns"])
+        return messages
+
+    def add_exchange(self, session_id: Optional[str], user_message: str, assistant_message: str):
+        """Remember one question and answer, compacting older turns to stay in budget"""
+        if session_id is None:
+            return
+        session = self._get_session(session_id, create=True)
+        for role, content in (("user", user_message), ("assistant", assistant_message)):
+            session["turns"].append((role, content))
+            session["tokens"] += estimate_tokens(content)
+        self._compact(session)
+
+    def _compact(self, session: dict):
+        """Fold the oldest turns into the rolling summary until within budget"""
+        summary_tokens = sum(estimate_tokens(line) for line in session["summary"])
+        # The latest exchange is never folded away, only truncated below
+        while len(session["turns"]) > 2 and session["tokens"] + summary_tokens > self.max_tokens:
+            role, content = session["turns"].pop(0)
+            session["tokens"] -= estimate_tokens(content)
+            line = self._summarize_turn(role, content)
+            session["summary"].append(line)
+            summary_tokens += estimate_tokens(line)
+
+        # The summary itself is bounded too; the oldest points go first
+        while session["summary"] and summary_tokens > self.summary_max_tokens:
+            summary_tokens -= estimate_tokens(session["summary"].pop(0))
+
+        # An oversized latest exchange is cut down so the total stays within max_tokens
+        if session["tokens"] + summary_tokens > self.max_tokens:
+            while session["summary"] and self.max_tokens - summary_tokens < 2 * len(session["turns"]):
+                summary_tokens -= estimate_tokens(session["summary"].pop(0))
+            share = (self.max_tokens - summary_tokens) // max(len(session["turns"]), 1)
+            session["turns"] = [(role, self._truncate(content, share)) for role, content in session["turns"]]
+            session["tokens"] = sum(estimate_tokens(content) for _, content in session["turns"])
+
+    @staticmethod
+    def _truncate(content: str, max_tokens: int) -> str:
+        """Cut a turn down to at most max_tokens, marking the cut"""
+        if estimate_tokens(content) <= max_tokens:
+            return content
+        max_chars = max(max_tokens - 1, 0) * 4
+        return content[:max(max_chars - 3, 0)] + "..."
+
+    @staticmethod
+    def _summarize_turn(role: str, content: str, max_chars: int = 160) -> str:
+        """Compact a turn to its first sentence, truncated"""
+        text = " ".join(content.split())
+        first_sentence = text.split(". ")[0]
+        if len(first_sentence) > max_chars:
+            first_sentence = first_sentence[:max_chars - 3] + "..."
+        speaker = "User asked" if role == "user" else "Assistant answered"
+        return f"- {speaker}: {first_sentence}"
+
+    def clear(self, session_id: str):
+        """Forget a session"""
+        self._sessions.pop(session_id, None)
+
+    def session_count(self) -> int:
+        """Number of sessions currently held"""
+        self._evict_idle()
+        return len(self._sessions)
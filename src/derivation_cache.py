@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Hashable, List, Optional, Sequence, Tuple
+from solders.pubkey import Pubkey
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID, TOKEN_PROGRAM_ID
+
+# A derivation job: ("ata", owner, mint), ("pda", seeds, program_id) or ("seed", base, seed, program_id)
+Job = Tuple
+
+
+def _derive(job: Job):
+    """Run one derivation (module-level so process workers can run it)"""
+    kind = job[0]
+    if kind == "ata":
+        _, owner, mint = job
+        return Pubkey.find_program_address(
+            [bytes(owner), bytes(TOKEN_PROGRAM_ID), bytes(mint)],
+            ASSOCIATED_TOKEN_PROGRAM_ID
+        )[0]
+    if kind == "pda":
+        _, seeds, program_id = job
+        return Pubkey.find_program_address(list(seeds), program_id)
+    if kind == "seed":
+        _, base, seed, program_id = job
+        return Pubkey.create_with_seed(base, seed, program_id)
+    raise ValueError(f"Unknown derivation: {kind}")
+
+
+def _derive_batch(jobs: List[Job]) -> list:
+    """Run a chunk of derivations in one worker call"""
+    return [_derive(job) for job in jobs]
+
+
+class DerivationCache:
+    def __init__(self, max_size: int = 100_000, workers: Optional[int] = None,
+                 use_processes: bool = False, chunk_size: int = 256):
+        """Bounded LRU of ATA/PDA derivations, with optional pooled batch derivation"""
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+
+        # Lookups may come from worker threads as well as the event loop
+        self._lock = threading.Lock()
+
+        # Batch misses only go to a pool when asked for one
+        self._executor: Optional[Executor] = None
+        if workers:
+            executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            self._executor = executor_cls(max_workers=workers)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(job: Job) -> Hashable:
+        """Cache key of a job (seed lists become tuples)"""
+        if job[0] == "pda":
+            return ("pda", tuple(bytes(seed) for seed in job[1]), job[2])
+        return job
+
+    def _lookup(self, key: Hashable):
+        """Cached value or None, counting the hit or miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def _store(self, key: Hashable, value):
+        """Insert a derived value, evicting the least recently used past max_size"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def derive(self, job: Job):
+        """Derive one address, from the cache when possible"""
+        key = self._key(job)
+        value = self._lookup(key)
+        if value is None:
+            value = _derive(job)
+            self._store(key, value)
+        return value
+
+    def ata(self, owner: Pubkey, mint: Pubkey) -> Pubkey:
+        """Associated token account of owner for mint"""
+        return self.derive(("ata", owner, mint))
+
+    def pda(self, seeds: Sequence[bytes], program_id: Pubkey) -> Tuple[Pubkey, int]:
+        """Program derived address and bump seed"""
+        return self.derive(("pda", tuple(seeds), program_id))
+
+    def create_with_seed(self, base: Pubkey, seed: str, program_id: Pubkey) -> Pubkey:
+        """Address of an account created with create_account_with_seed"""
+        return self.derive(("seed", base, seed, program_id))
+
+    def derive_many(self, jobs: Sequence[Job]) -> list:
+        """Derive many addresses; misses run in chunks on the pool (if any), results in order"""
+        keys = [self._key(job) for job in jobs]
+        results = [self._lookup(key) for key in keys]
+
+        # Each distinct miss is derived once, even if it repeats in the batch
+        missing = {}
+        for index, value in enumerate(results):
+            if value is None:
+                missing.setdefault(keys[index], jobs[index])
+        pending = list(missing.items())
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        if self._executor is not None and len(chunks) > 1:
+            derived = self._executor.map(_derive_batch, [[job for _, job in chunk] for chunk in chunks])
+        else:
+            derived = (_derive_batch([job for _, job in chunk]) for chunk in chunks)
+
+        found = {}
+        for chunk, values in zip(chunks, derived):
+            for (key, _), value in zip(chunk, values):
+                self._store(key, value)
+                found[key] = value
+        return [found[key] if value is None else value for key, value in zip(keys, results)]
+
+    def ata_many(self, pairs: Sequence[Tuple[Pubkey, Pubkey]]) -> List[Pubkey]:
+        """Associated token accounts for many (owner, mint) pairs"""
+        return self.derive_many([("ata", owner, mint) for owner, mint in pairs])
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters, hit rate and size"""
+        return {**self.stats, "hit_rate": self.hit_rate(), "size": len(self), "max_size": self.max_size}
+
+    def close(self):
+        """Shut the batch pool down"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+# Shared by components that aren't handed their own cache
+default_cache = DerivationCache()
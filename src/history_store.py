@@ -0,0 +1,30 @@
+import json
+import os
+from typing import Optional
+
+
+class HistoryStore:
+    def __init__(self, directory: str = "ticket_history"):
+        """Persist per-address ticket history and the newest signature seen"""
+        self.directory = directory
+
+    def _path(self, address: str) -> str:
+        """File holding one address's history"""
+        return os.path.join(self.directory, f"{address}.json")
+
+    def load(self, address: str) -> dict:
+        """Load stored history; empty if the address was never synced"""
+        path = self._path(address)
+        if not os.path.exists(path):
+            return {"newest_signature": None, "history": []}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def save(self, address: str, newest_signature: Optional[str], history: list):
+        """Atomically replace an address's stored history"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(address)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"newest_signature": newest_signature, "history": history}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,392 @@
+import asyncio
+import base64
+import json
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from src.ticket_log import MINTED
+
+# Job states; running jobs whose lease ran out are claimable again
+PENDING, RUNNING, DONE, DEAD = "pending", "running", "done", "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    job_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+
+class LeaseLost(Exception):
+    """Raised when a worker updates a job whose lease another worker has since taken"""
+
+
+class JobQueue:
+    def __init__(self, path: str = "jobs.db", lease_seconds: float = 120.0, max_attempts: int = 5,
+                 retry_delay: float = 1.0, max_retry_delay: float = 60.0):
+        """Durable SQLite job queue with leases, backoff retries and a dead-letter state"""
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        # Autocommit mode; claims take the write lock explicitly
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def enqueue(self, kind: str, payload: dict, key: Optional[str] = None) -> int:
+        """Add a job; a job with the same key is only ever enqueued once"""
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO jobs (kind, payload, job_key, status, available_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, json.dumps(payload), key, PENDING, now, now, now)
+        )
+        if cursor.rowcount == 0:
+            return self._db.execute("SELECT id FROM jobs WHERE job_key = ?", (key,)).fetchone()["id"]
+        return cursor.lastrowid
+
+    def enqueue_many(self, jobs: List[tuple]) -> List[int]:
+        """Enqueue (kind, payload, key) tuples in one transaction"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [self.enqueue(kind, payload, key) for kind, payload, key in jobs]
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def claim(self) -> Optional[dict]:
+        """Lease the next ready job (including ones abandoned by a crashed worker)
+
+        The job's attempts count is its lease token: every later update passes it back
+        and is rejected once the lease has been re-claimed.
+        """
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE (status = ? AND available_at <= ?)"
+                    " OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (PENDING, now, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                if row["status"] == RUNNING and row["attempts"] >= self.max_attempts:
+                    # Its lease kept running out (e.g. it crashes the worker): dead-letter it
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                        (DEAD, f"Lease expired on all {row['attempts']} attempts", now, row["id"])
+                    )
+                    continue
+                break
+            self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, now + self.lease_seconds, now, row["id"])
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        job = self._to_dict(row)
+        job["attempts"] += 1
+        job["status"] = RUNNING
+        return job
+
+    def checkpoint(self, job_id: int, attempts: int, payload: dict):
+        """Durably replace a running job's payload, so a retry sees what this attempt did
+
+        Raises LeaseLost if the lease was re-claimed, so a stale worker stops before its side effect.
+        """
+        cursor = self._db.execute(
+            "UPDATE jobs SET payload = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+            (json.dumps(payload), time.time(), job_id, RUNNING, attempts)
+        )
+        if cursor.rowcount == 0:
+            raise LeaseLost(f"Job {job_id} is no longer leased to attempt {attempts}")
+
+    def extend_lease(self, job_id: int, attempts: int) -> bool:
+        """Keep a long-running job's lease alive; False if the lease was lost"""
+        return self._db.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND attempts = ?",
+            (time.time() + self.lease_seconds, job_id, RUNNING, attempts)
+        ).rowcount > 0
+
+    def complete(self, job_id: int, attempts: int, result: dict) -> bool:
+        """Record a job's result; False (and nothing written) if the lease was lost"""
+        return self._db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ?"
+            " WHERE id = ? AND status = ? AND attempts = ?",
+            (DONE, json.dumps(result, default=str), time.time(), job_id, RUNNING, attempts)
+        ).rowcount > 0
+
+    def fail(self, job_id: int, attempts: int, error: str) -> Optional[str]:
+        """Schedule a retry with exponential backoff, or dead-letter the job
+
+        Returns its new status, or None (and nothing written) if the lease was lost.
+        """
+        now = time.time()
+        if attempts >= self.max_attempts:
+            status, available_at = DEAD, now
+        else:
+            status = PENDING
+            available_at = now + min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL, updated_at = ?"
+            " WHERE id = ? AND status = ? AND attempts = ?",
+            (status, error, available_at, now, job_id, RUNNING, attempts)
+        )
+        return status if cursor.rowcount > 0 else None
+
+    def retry_dead(self) -> int:
+        """Move dead-lettered jobs back to pending with fresh attempts"""
+        now = time.time()
+        return self._db.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+            (PENDING, now, now, DEAD)
+        ).rowcount
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Look up one job"""
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def jobs(self, status: Optional[str] = None) -> List[dict]:
+        """All jobs, or those in one state, oldest first"""
+        if status is None:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        else:
+            rows = self._db.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def dead_letters(self) -> List[dict]:
+        """Jobs that used up their attempts"""
+        return self.jobs(DEAD)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, DEAD: 0}
+        for row in self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def has_unfinished(self) -> bool:
+        """Whether any job is still pending or running"""
+        counts = self.counts()
+        return counts[PENDING] + counts[RUNNING] > 0
+
+    def next_ready_in(self) -> Optional[float]:
+        """Seconds until the next pending job or lease expiry, if any"""
+        row = self._db.execute(
+            "SELECT MIN(CASE WHEN status = ? THEN available_at ELSE lease_until END) AS at"
+            " FROM jobs WHERE status IN (?, ?)",
+            (PENDING, PENDING, RUNNING)
+        ).fetchone()
+        if row["at"] is None:
+            return None
+        return max(0.0, row["at"] - time.time())
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+
+# A handler runs one job's payload and returns a {"success": ...} result dict; it can
+# call checkpoint(payload) to persist progress before a side effect
+Handler = Callable[[dict, Callable[[dict], None]], Awaitable[dict]]
+
+
+class JobWorkerPool:
+    def __init__(self, queue: JobQueue, handlers: Mapping[str, Handler], workers: int = 4,
+                 poll_interval: float = 0.5):
+        """Async workers that drain a JobQueue through per-kind handlers"""
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stats = {"completed": 0, "retried": 0, "dead": 0, "lease_lost": 0}
+
+    async def _run_one(self, job: dict):
+        """Run a leased job and record its outcome"""
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            error = f"No handler for job kind {job['kind']}"
+        else:
+            # Renew the lease while the handler is still working
+            renew = asyncio.ensure_future(self._keep_leased(job["id"], job["attempts"]))
+            try:
+                result = await handler(
+                    job["payload"], lambda payload: self.queue.checkpoint(job["id"], job["attempts"], payload)
+                )
+                error = None if result.get("success") else str(result.get("error", "Job failed"))
+            except Exception as e:
+                error = str(e)
+            finally:
+                renew.cancel()
+
+        # Another worker re-claimed the job (our lease ran out): its attempt owns the outcome
+        if error is None:
+            status = DONE if self.queue.complete(job["id"], job["attempts"], result) else None
+        else:
+            status = self.queue.fail(job["id"], job["attempts"], error)
+        if status is None:
+            self.stats["lease_lost"] += 1
+        elif status == DONE:
+            self.stats["completed"] += 1
+        elif status == DEAD:
+            self.stats["dead"] += 1
+        else:
+            self.stats["retried"] += 1
+
+    async def _keep_leased(self, job_id: int, attempts: int):
+        """Extend a job's lease at half the lease period, until it is lost"""
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 2)
+            if not self.queue.extend_lease(job_id, attempts):
+                return
+
+    async def _worker(self, stop: asyncio.Event, until_empty: bool):
+        """Claim and run jobs until stopped (or, if until_empty, until nothing is left)"""
+        while not stop.is_set():
+            job = self.queue.claim()
+            if job is not None:
+                await self._run_one(job)
+                continue
+            if until_empty and not self.queue.has_unfinished():
+                return
+            # Nothing ready yet: wait for a retry to come due (or a lease to run out)
+            wait = self.queue.next_ready_in()
+            await asyncio.sleep(self.poll_interval if wait is None else min(wait, self.poll_interval))
+
+    async def run_until_empty(self):
+        """Process jobs until every one is done or dead-lettered"""
+        stop = asyncio.Event()
+        await asyncio.gather(*[self._worker(stop, until_empty=True) for _ in range(self.workers)])
+
+    async def run(self, stop: asyncio.Event):
+        """Process jobs as they arrive until stop is set"""
+        await asyncio.gather(*[self._worker(stop, until_empty=False) for _ in range(self.workers)])
+
+
+def _record_send(payload: dict, checkpoint: Callable[[dict], None]):
+    """on_signed callback that checkpoints the signed bytes before they're sent"""
+    def on_signed(address: Pubkey, wire: bytes, last_valid_block_height: int):
+        payload["sent"] = {
+            "address": str(address),
+            "wire": base64.b64encode(wire).decode("ascii"),
+            "last_valid_block_height": last_valid_block_height
+        }
+        checkpoint(payload)
+    return on_signed
+
+
+async def _resume_send(client, submitter, payload: dict) -> Optional[dict]:
+    """Settle a send checkpointed by an earlier attempt; None if it can never land"""
+    sent = payload.get("sent")
+    if sent is None:
+        return None
+    # Rebroadcasting the same bytes can't land twice; the signature status decides
+    outcome = await submitter.submit_raw(
+        client, base64.b64decode(sent["wire"]), sent["last_valid_block_height"]
+    )
+    if outcome["success"]:
+        return {"success": True, "address": sent["address"], "transaction_id": str(outcome["signature"])}
+    if outcome["status"] == "unknown":
+        # It may still land: retry the job later rather than paying for a second one
+        return {"success": False, "status": "unknown", "error": outcome.get("error", "Outcome unknown")}
+    return None
+
+
+def ticket_handlers(keypairs: Mapping[str, Keypair], minter=None, ticket_system=None) -> Dict[str, Handler]:
+    """Handlers for ticket jobs; payloads name signers by pubkey, secrets never enter the queue"""
+    handlers: Dict[str, Handler] = {}
+
+    if minter is not None:
+        async def create_nft_ticket(payload: dict, checkpoint: Callable[[dict], None]) -> dict:
+            owner = keypairs[payload["owner"]]
+            seat_info = payload["seat_info"]
+
+            # A mint signed by an earlier attempt is settled before anything new is signed
+            resumed = await _resume_send(minter.client, minter.submitter, payload)
+            if resumed is not None:
+                if not resumed["success"]:
+                    return resumed
+                if minter.ticket_log is not None and minter.ticket_log.get(resumed["address"]) is None:
+                    minter.ticket_log.record(
+                        MINTED, resumed["address"], owner.pubkey(), event_name=payload["event_name"],
+                        event_date=payload["event_date"], seat_info=seat_info, price=payload["price"]
+                    )
+                return {"success": True, "nft_address": resumed["address"],
+                        "transaction_id": resumed["transaction_id"], "resumed": True}
+
+            if minter.ticket_addresser is not None and all(key in seat_info for key in ("section", "row", "seat")):
+                # A retried seat mint may already have landed before the crash
+                address = minter.get_ticket_address(
+                    owner.pubkey(), payload["event_name"], payload["event_date"], seat_info
+                )
+                existing = await minter.verify_nft_ticket(address["nft_address"])
+                if existing["valid"]:
+                    return {"success": True, "nft_address": str(address["nft_address"]), "resumed": True}
+            return await minter.create_nft_ticket(
+                owner, payload["event_name"], payload["event_date"], seat_info, payload["price"],
+                on_signed=_record_send(payload, checkpoint)
+            )
+
+        async def use_nft_ticket(payload: dict, checkpoint: Callable[[dict], None]) -> dict:
+            return await minter.use_nft_ticket(
+                keypairs[payload["owner"]], Pubkey.from_string(payload["nft_address"])
+            )
+
+        handlers["create_nft_ticket"] = create_nft_ticket
+        handlers["use_nft_ticket"] = use_nft_ticket
+
+    if ticket_system is not None:
+        async def create_ticket(payload: dict, checkpoint: Callable[[dict], None]) -> dict:
+            owner = keypairs[payload["owner"]]
+            resumed = await _resume_send(ticket_system.client, ticket_system.submitter, payload)
+            if resumed is not None:
+                if not resumed["success"]:
+                    return resumed
+                if ticket_system.ticket_log is not None and ticket_system.ticket_log.get(resumed["address"]) is None:
+                    ticket_system.ticket_log.record(MINTED, resumed["address"], owner.pubkey(), price=payload["price"])
+                return {"success": True, "ticket_pubkey": resumed["address"],
+                        "transaction_id": resumed["transaction_id"], "resumed": True}
+            return await ticket_system.create_ticket(owner, payload["price"], on_signed=_record_send(payload, checkpoint))
+
+        async def use_ticket(payload: dict, checkpoint: Callable[[dict], None]) -> dict:
+            return await ticket_system.use_ticket(
+                Pubkey.from_string(payload["ticket_pubkey"]), keypairs[payload["user"]]
+            )
+
+        handlers["create_ticket"] = create_ticket
+        handlers["use_ticket"] = use_ticket
+
+    return handlers
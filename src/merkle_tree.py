@@ -0,0 +1,177 @@
+import hashlib
+import json
+from collections import deque
+from typing import List, Optional
+
+
+def hash_leaf(data: bytes) -> bytes:
+    """Hash leaf data (domain-separated from inner nodes)"""
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes into their parent"""
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+class ConcurrentMerkleTree:
+    def __init__(self, max_depth: int = 20, canopy_depth: int = 10, max_buffer_size: int = 64):
+        """Append-only Merkle tree kept locally, with a canopy and recent-root buffer"""
+        if not 0 <= canopy_depth <= max_depth:
+            raise ValueError("canopy_depth must be between 0 and max_depth")
+        self.max_depth = max_depth
+        self.canopy_depth = canopy_depth
+
+        # Hash of an empty subtree at each height
+        self.zeros = [bytes(32)]
+        for _ in range(max_depth):
+            self.zeros.append(hash_node(self.zeros[-1], self.zeros[-1]))
+
+        # levels[0] are leaves, levels[max_depth][0] is the root; missing
+        # entries are empty subtrees
+        self.levels: List[List[bytes]] = [[] for _ in range(max_depth + 1)]
+
+        # Recent roots, so proofs made just before a concurrent append still verify
+        self.recent_roots = deque([self.root], maxlen=max_buffer_size)
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of leaves"""
+        return 1 << self.max_depth
+
+    @property
+    def size(self) -> int:
+        """Number of leaves appended so far"""
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> bytes:
+        """Current root hash"""
+        return self._node(self.max_depth, 0)
+
+    def _node(self, height: int, index: int) -> bytes:
+        """Get a node hash, defaulting to the empty subtree"""
+        level = self.levels[height]
+        return level[index] if index < len(level) else self.zeros[height]
+
+    def _set(self, height: int, index: int, value: bytes):
+        """Store a node hash"""
+        level = self.levels[height]
+        if index < len(level):
+            level[index] = value
+        else:
+            level.append(value)
+
+    def _rehash(self, first: int, last: int):
+        """Recompute every ancestor of leaves first..last, each node once"""
+        for height in range(1, self.max_depth + 1):
+            first //= 2
+            last //= 2
+            for index in range(first, last + 1):
+                self._set(height, index, hash_node(
+                    self._node(height - 1, 2 * index),
+                    self._node(height - 1, 2 * index + 1)
+                ))
+        self.recent_roots.append(self.root)
+
+    def append(self, leaf: bytes) -> int:
+        """Append one leaf hash; returns its index"""
+        return self.append_batch([leaf])
+
+    def append_batch(self, leaves: List[bytes]) -> int:
+        """Append many leaf hashes with one pass up the tree; returns the first index"""
+        start = self.size
+        if not leaves:
+            return start
+        if start + len(leaves) > self.capacity:
+            raise ValueError("Merkle tree is full")
+        self.levels[0].extend(leaves)
+        self._rehash(start, self.size - 1)
+        return start
+
+    def truncate(self, size: int):
+        """Drop every leaf from index size on, e.g. to roll back an append that never landed"""
+        if not 0 <= size <= self.size:
+            raise IndexError("Leaf index out of range")
+        if size == self.size:
+            return
+        stale_root = self.root
+        width = size
+        for level in self.levels:
+            del level[width:]
+            width = (width + 1) // 2
+
+        # The rolled-back root was never anchored, so proofs against it must not verify
+        if stale_root in self.recent_roots:
+            self.recent_roots.remove(stale_root)
+        if size:
+            self._rehash(size - 1, size - 1)
+
+    def replace_leaf(self, index: int, leaf: bytes):
+        """Replace an existing leaf (e.g. after a transfer or use)"""
+        if not 0 <= index < self.size:
+            raise IndexError("Leaf index out of range")
+        self.levels[0][index] = leaf
+        self._rehash(index, index)
+
+    def get_leaf(self, index: int) -> bytes:
+        """Get a leaf hash"""
+        return self.levels[0][index]
+
+    def get_proof(self, index: int, truncate_canopy: bool = True) -> List[bytes]:
+        """Sibling hashes from leaf to root (minus the canopy levels when truncated)"""
+        if not 0 <= index < self.size:
+            raise IndexError("Leaf index out of range")
+        depth = self.max_depth - self.canopy_depth if truncate_canopy else self.max_depth
+        proof = []
+        for height in range(depth):
+            proof.append(self._node(height, index ^ 1))
+            index //= 2
+        return proof
+
+    def get_canopy(self) -> List[bytes]:
+        """Cached upper nodes (below the root) that let proofs be truncated"""
+        canopy = []
+        for height in range(self.max_depth - 1, self.max_depth - self.canopy_depth - 1, -1):
+            width = 1 << (self.max_depth - height)
+            canopy.extend(self._node(height, index) for index in range(width))
+        return canopy
+
+    def verify(self, leaf: bytes, index: int, proof: List[bytes], root: Optional[bytes] = None) -> bool:
+        """Check a proof against a root (default: any recent root), using the canopy if truncated"""
+        node = leaf
+        position = index
+        for sibling in proof:
+            node = hash_node(sibling, node) if position & 1 else hash_node(node, sibling)
+            position //= 2
+
+        height = len(proof)
+        if height < self.max_depth:
+            # Truncated proof: must match the cached canopy node, which the current root covers
+            if height != self.max_depth - self.canopy_depth:
+                return False
+            if node != self._node(height, position):
+                return False
+            return root is None or root == self.root
+
+        if root is not None:
+            return node == root
+        return node in self.recent_roots
+
+    def save(self, path: str):
+        """Persist the leaves so the tree can be rebuilt after a restart"""
+        with open(path, "w") as f:
+            json.dump({
+                "max_depth": self.max_depth,
+                "canopy_depth": self.canopy_depth,
+                "leaves": [leaf.hex() for leaf in self.levels[0]]
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "ConcurrentMerkleTree":
+        """Rebuild a tree saved with save()"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        tree = cls(data["max_depth"], data["canopy_depth"])
+        tree.append_batch([bytes.fromhex(leaf) for leaf in data["leaves"]])
+        return tree
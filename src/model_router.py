@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+
+class LatencyBudgetExceeded(Exception):
+    """Raised when no model answered within the latency budget"""
+
+
+class ModelRouter:
+    def __init__(self, primary_model: str = "gpt-3.5-turbo", fallback_model: Optional[str] = None,
+                 latency_budget: float = 8.0, hedge_after: float = 2.0, hedge_percentile: float = 0.95,
+                 window: int = 200, min_samples: int = 20):
+        """Route completions under a latency budget, hedging slow calls"""
+        self.primary_model = primary_model
+        self.fallback_model = fallback_model
+        self.latency_budget = latency_budget
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.latencies: deque = deque(maxlen=window)
+        self.stats = {"calls": 0, "hedges": 0, "hedges_skipped": 0, "hedge_wins": 0, "timeouts": 0, "errors": 0}
+
+    def hedge_delay(self) -> float:
+        """Delay before hedging: the observed primary p95, or hedge_after until enough samples"""
+        if len(self.latencies) < self.min_samples:
+            return self.hedge_after
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))
+        return ordered[index]
+
+    async def _timed(self, call: Callable[[str, float], Awaitable[Any]], model: str, timeout: float) -> Any:
+        """Run one attempt and record the primary model's latency on success"""
+        start = time.monotonic()
+        result = await call(model, timeout)
+        if model == self.primary_model:
+            self.latencies.append(time.monotonic() - start)
+        return result
+
+    async def run(self, call: Callable[[str, float], Awaitable[Any]],
+                  can_hedge: Optional[Callable[[], bool]] = None) -> Any:
+        """Call `call(model, timeout)`, hedging a slow primary after the p95 (if can_hedge()) and giving up at the budget"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.latency_budget
+        self.stats["calls"] += 1
+
+        primary = asyncio.ensure_future(self._timed(call, self.primary_model, self.latency_budget))
+        attempts = [primary]
+        last_error = None
+        try:
+            await asyncio.wait({primary}, timeout=min(self.hedge_delay(), self.latency_budget))
+            if primary.done():
+                if primary.exception() is None:
+                    return primary.result()
+                # A fast failure (a 429, an overload) is not slowness: a second request
+                # would only add load, so report it
+                self.stats["errors"] += 1
+                raise primary.exception()
+
+            # The primary is slow: race a second request, on the fallback model when one is configured
+            remaining = deadline - loop.time()
+            if remaining > 0 and (can_hedge is None or can_hedge()):
+                hedge_model = self.fallback_model or self.primary_model
+                attempts.append(asyncio.ensure_future(self._timed(call, hedge_model, remaining)))
+                self.stats["hedges"] += 1
+            elif remaining > 0:
+                self.stats["hedges_skipped"] += 1
+
+            pending = set(attempts)
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+
+            # Every attempt failed before the deadline: report the real error
+            if last_error is not None and not pending:
+                self.stats["errors"] += 1
+                raise last_error
+
+            self.stats["timeouts"] += 1
+            raise LatencyBudgetExceeded(f"No answer within {self.latency_budget:.1f}s")
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark losing attempts' errors as retrieved
+
+    def get_stats(self) -> dict:
+        """Get routing counters and the current hedge delay"""
+        return {**self.stats, "hedge_delay": self.hedge_delay()}
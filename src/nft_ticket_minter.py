@@ -1,123 +1,262 @@
 from solders.keypair import Keypair
+from solders.message import Message
 from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import Transaction as SoldersTransaction
 from solana.rpc.async_api import AsyncClient
 from solana.transaction import Transaction
-from solders.system_program import create_account, CreateAccountParams
-from solana.rpc.commitment import Commitment
+from solders.system_program import (
+    create_account, CreateAccountParams, create_account_with_seed, CreateAccountWithSeedParams
+)
+from solana.rpc.commitment import Commitment, Confirmed, Finalized
 from spl.token.instructions import (
     initialize_mint, 
     mint_to,
     create_associated_token_account,
-    get_associated_token_address,
     burn,
+    BurnParams,
     InitializeMintParams,
     MintToParams
 )
 import json
 from datetime import datetime
 import os
+from typing import Callable, Optional
+from src.balance_ledger import BalanceLedger, LAMPORTS_PER_SIGNATURE
+from src.derivation_cache import DerivationCache, default_cache
+from src.history_store import HistoryStore
+from src.rpc_limiter import LimitedClient
+from src.transaction_cache import TransactionCache
+from src.transaction_submitter import TransactionSubmitter
+from src.transaction_template import TransactionTemplate
+from src.verification_cache import VerificationCache
+from src.ticket_log import TicketLog, MINTED, USED
+from src.ticket_address import TicketAddresser, TOKEN_PROGRAM_ID, event_key, seat_seed
+
+# Rent-exempt minimum for a 165-byte token account (lamports)
+TOKEN_ACCOUNT_RENT = 2_039_280
+
+# Size of an SPL token mint account (bytes)
+MINT_SPACE = 82
+
+# Most signatures the RPC returns per getSignaturesForAddress call
+SIGNATURE_PAGE_LIMIT = 1000
 
 class NFTTicketMinter:
-    def __init__(self, rpc_url="https://api.devnet.solana.com"):
+    def __init__(self, rpc_url="https://api.devnet.solana.com", history_store: Optional[HistoryStore] = None,
+                 transaction_cache: Optional[TransactionCache] = None, account_mirror=None, rpc_limiter=None,
+                 signing_pool=None, ticket_addresser: Optional[TicketAddresser] = None,
+                 derivation_cache: Optional[DerivationCache] = None, ticket_log: Optional[TicketLog] = None,
+                 verification_cache: Optional[VerificationCache] = None):
         """Initialize NFT ticket minter with Solana client"""
-        self.client = AsyncClient(rpc_url)  # Remove commitment parameter
+        # Every RPC call goes through an adaptive concurrency limiter
+        self.client = LimitedClient(AsyncClient(rpc_url), rpc_limiter)  # Remove commitment parameter
         
-    async def create_nft_ticket(self, owner: Keypair, event_name: str, event_date: str, seat_info: dict, price: float):
-        """Create a new NFT ticket"""
-        try:
-            # Create mint account
-            mint_account = Keypair()
-            
-            # Get token program ID
-            token_program_id = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-            
-            # Calculate rent-exempt minimum for mint account
-            mint_space = 82  # Standard token account size
-            mint_rent_response = await self.client.get_minimum_balance_for_rent_exemption(mint_space)
-            mint_rent = mint_rent_response.value  # Extract the actual value from the response
-            
-            # Check owner's balance
-            owner_balance = await self.client.get_balance(owner.pubkey())
-            print(f"Owner balance: {owner_balance.value}")
-            if owner_balance.value < mint_rent + 5_000_000:  # mint_rent + extra for fees
-                return {
-                    "success": False,
-                    "error": f"Insufficient balance. Need at least {(mint_rent + 5_000_000) / 1_000_000_000} SOL"
-                }
-            
-            # Create transaction
-            transaction = Transaction()
-            
+        # Optional HistoryStore: synced ticket history and per-address checkpoints for incremental refreshes
+        self.history_store = history_store
+        
+        # Optional TransactionCache: finalized transactions never change, so history lookups can read through disk
+        self.transaction_cache = transaction_cache
+        
+        # Optional AccountMirror answering verifications from memory
+        self.account_mirror = account_mirror
+        
+        # Mint costs are checked against local balances instead of a get_balance per ticket
+        self.ledger = BalanceLedger(self._fetch_balance)
+        self._rent_cache = {}
+        self._mint_templates = {}
+        
+        # Signatures of mints being sent, so a concurrent identical seat retry isn't charged twice
+        self._seat_signatures = set()
+        
+        # Mints are signed once and rebroadcast until they land or expire
+        self.submitter = TransactionSubmitter()
+        
+        # Optional SigningPool that signs mints off the event loop
+        self.signing_pool = signing_pool
+        
+        # Optional TicketAddresser: mints get addresses derived from the seat
+        self.ticket_addresser = ticket_addresser
+        
+        # Token accounts are re-derived on every mint, use and lookup, so memoize them
+        self.derivations = derivation_cache if derivation_cache is not None else default_cache
+        
+        # Optional TicketLog recording each ticket's lifecycle
+        self.ticket_log = ticket_log
+        
+        # Optional VerificationCache answering repeat scans from memory
+        self.verification_cache = verification_cache
+        
+    async def _fetch_balance(self, pubkey: Pubkey) -> int:
+        """Fetch a wallet's balance from the chain"""
+        # Confirmed, the level debits are settled at; a finalized read can still miss a settled debit
+        balance_response = await self.client.get_balance(pubkey, commitment=Confirmed)
+        return balance_response.value
+        
+    async def _get_rent(self, space: int) -> int:
+        """Rent-exempt minimum for an account size (constant, so fetched once)"""
+        if space not in self._rent_cache:
+            rent_response = await self.client.get_minimum_balance_for_rent_exemption(space)
+            self._rent_cache[space] = rent_response.value
+        return self._rent_cache[space]
+        
+    def _mint_instructions(self, owner: Pubkey, mint: Pubkey, mint_rent: int, seed: Optional[str] = None) -> list:
+        """Instructions that create a mint, its owner's token account and one token"""
+        token_program_id = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+        token_account = self.derivations.ata(owner, mint)
+        if seed is None:
             # Create mint account with proper rent
             create_mint_account_ix = create_account(
                 CreateAccountParams(
-                    from_pubkey=owner.pubkey(),
-                    to_pubkey=mint_account.pubkey(),
+                    from_pubkey=owner,
+                    to_pubkey=mint,
                     lamports=mint_rent,
-                    space=mint_space,
+                    space=MINT_SPACE,
                     owner=token_program_id
                 )
             )
-            transaction.add(create_mint_account_ix)
-            
+        else:
+            # Seat-addressed mint: derived from the owner and seed, so no mint keypair signs
+            create_mint_account_ix = create_account_with_seed(
+                CreateAccountWithSeedParams(
+                    from_pubkey=owner,
+                    to_pubkey=mint,
+                    base=owner,
+                    seed=seed,
+                    lamports=mint_rent,
+                    space=MINT_SPACE,
+                    owner=token_program_id
+                )
+            )
+        return [
+            create_mint_account_ix,
             # Initialize mint
-            init_mint_ix = initialize_mint(
+            initialize_mint(
                 InitializeMintParams(
                     program_id=token_program_id,
-                    mint=mint_account.pubkey(),
+                    mint=mint,
                     decimals=0,
-                    mint_authority=owner.pubkey(),
+                    mint_authority=owner,
                     freeze_authority=None
                 )
-            )
-            transaction.add(init_mint_ix)
-            
-            # Get associated token account
-            token_account = get_associated_token_address(
-                owner.pubkey(),
-                mint_account.pubkey()
-            )
-            
+            ),
             # Create associated token account
-            create_ata_ix = create_associated_token_account(
-                owner.pubkey(),  # payer
-                owner.pubkey(),  # wallet_address
-                mint_account.pubkey()  # token_mint
-            )
-            transaction.add(create_ata_ix)
-            
+            create_associated_token_account(owner, owner, mint),
             # Mint one token
-            mint_to_ix = mint_to(
+            mint_to(
                 MintToParams(
                     program_id=token_program_id,
-                    mint=mint_account.pubkey(),
+                    mint=mint,
                     dest=token_account,
-                    mint_authority=owner.pubkey(),
+                    mint_authority=owner,
                     amount=1,
                     signers=[]  # Empty list since we're signing with the transaction
                 )
             )
-            transaction.add(mint_to_ix)
+        ]
+        
+    def _get_mint_template(self, mint_rent: int, seeded: bool = False) -> TransactionTemplate:
+        """Mint transaction compiled once (per rent value and shape) with placeholder keys"""
+        key = (mint_rent, seeded)
+        if key not in self._mint_templates:
+            owner = Keypair().pubkey()
+            fields = {"owner": owner}
+            if seeded:
+                # Seeds are 32 characters, so they patch like any other 32-byte field
+                seed = os.urandom(16).hex()
+                mint = Pubkey.create_with_seed(owner, seed, TOKEN_PROGRAM_ID)
+                fields["seed"] = seed.encode()
+            else:
+                seed = None
+                mint = Keypair().pubkey()
+            fields["mint"] = mint
+            fields["token_account"] = self.derivations.ata(owner, mint)
+            # Owner pays the fee (otherwise the payer is whichever signer sorts first)
+            self._mint_templates[key] = TransactionTemplate(
+                self._mint_instructions(owner, mint, mint_rent, seed),
+                owner,
+                fields
+            )
+        return self._mint_templates[key]
+        
+    def get_ticket_address(self, issuer: Pubkey, event_name: str, event_date: str, seat_info: dict) -> dict:
+        """Compute a seat-addressed ticket's mint and token account without any lookup"""
+        if self.ticket_addresser is None:
+            raise ValueError("Seat addressing is not enabled")
+        mint = self.ticket_addresser.mint_address(
+            issuer, event_key(event_name, event_date), seat_info["section"], seat_info["row"], seat_info["seat"]
+        )
+        return {
+            "nft_address": mint,
+            "token_account": self.derivations.ata(issuer, mint)
+        }
+        
+    async def create_nft_ticket(self, owner: Keypair, event_name: str, event_date: str, seat_info: dict, price: float,
+                                on_signed: Optional[Callable[[Pubkey, bytes, int], None]] = None):
+        """Create a new NFT ticket; on_signed(mint, wire, last_valid_block_height) runs before the send"""
+        try:
+            # Calculate rent-exempt minimum for mint account
+            mint_rent = await self._get_rent(MINT_SPACE)
+            
+            # Check owner's balance (tracked locally after the first load)
+            owner_balance = await self.ledger.get_available(owner.pubkey())
+            print(f"Owner balance: {owner_balance}")
+            if owner_balance < mint_rent + 5_000_000:  # mint_rent + extra for fees
+                return {
+                    "success": False,
+                    "error": f"Insufficient balance. Need at least {(mint_rent + 5_000_000) / 1_000_000_000} SOL"
+                }
+            
+            # Seat-addressed tickets derive the mint from the seat; others use a fresh keypair
+            seated = self.ticket_addresser is not None and all(
+                key in seat_info for key in ("section", "row", "seat")
+            )
+            if seated:
+                mint_account = None
+                address = self.get_ticket_address(owner.pubkey(), event_name, event_date, seat_info)
+                mint_pubkey = address["nft_address"]
+                token_account = address["token_account"]
+                signers = {"owner": owner}
+            else:
+                # Create mint account
+                mint_account = Keypair()
+                mint_pubkey = mint_account.pubkey()
+                
+                # Get associated token account
+                token_account = self.derivations.ata(owner.pubkey(), mint_pubkey)
+                signers = {"owner": owner, "mint": mint_account}
+            
+            # The four mint instructions only differ in these keys, so patch a compiled template
+            template = self._get_mint_template(mint_rent, seeded=seated)
+            fields = {
+                "owner": owner.pubkey(),
+                "mint": mint_pubkey,
+                "token_account": token_account
+            }
+            if seated:
+                fields["seed"] = seat_seed(
+                    event_key(event_name, event_date), seat_info["section"], seat_info["row"], seat_info["seat"]
+                ).encode()
+            
+            # Mint rent + token account rent + one fee per signature
+            mint_cost = mint_rent + TOKEN_ACCOUNT_RENT + template.num_signers * LAMPORTS_PER_SIGNATURE
             
             # Get recent blockhash
             recent_blockhash = await self.client.get_latest_blockhash()
-            transaction.recent_blockhash = recent_blockhash.value.blockhash
+            blockhash = recent_blockhash.value.blockhash
             
-            try:
-                # Send and confirm transaction with both signers
-                signers = [owner, mint_account]
-                result = await self.client.send_transaction(
-                    transaction,
-                    *signers
-                )
-                
-                # Wait for confirmation
-                await self.client.confirm_transaction(result.value)
-                
-                # Return success response
+            # Sign with both signers
+            if self.signing_pool is not None:
+                message = Message.from_bytes(template.message_bytes(blockhash, **fields))
+                wire = await self.signing_pool.sign(message, list(signers.values()))
+            else:
+                wire = template.sign(blockhash, signers, **fields)
+            signature = str(SoldersTransaction.from_bytes(wire).signatures[0])
+            
+            def minted(outcome: dict) -> dict:
                 return {
                     "success": True,
-                    "nft_address": str(mint_account.pubkey()),
+                    "nft_address": str(mint_pubkey),
                     "token_account": str(token_account),
                     "metadata": {
                         "name": f"{event_name} Ticket",
@@ -126,10 +265,71 @@ class NFTTicketMinter:
                         "price": price
                     },
                     "owner": str(owner.pubkey()),
-                    "transaction_id": str(result.value)
+                    "transaction_id": str(outcome["signature"])
                 }
+            
+            if seated:
+                # A retry under the same blockhash is the same transaction: share its outcome
+                # without charging the mint cost again
+                if self.submitter.get_outcome(signature) is not None or signature in self._seat_signatures:
+                    outcome = await self.submitter.submit_raw(
+                        self.client, wire, recent_blockhash.value.last_valid_block_height
+                    )
+                    if not outcome["success"]:
+                        return {
+                            "success": False,
+                            "status": outcome["status"],
+                            "transaction_id": str(outcome["signature"]),
+                            "error": outcome["error"]
+                        }
+                    return minted(outcome)
+                
+                # A seat minted by an earlier transaction can't be minted again
+                _, found = await self._lookup_nft_ticket(mint_pubkey)
+                if found:
+                    return {
+                        "success": False,
+                        "error": f"Seat ticket {mint_pubkey} already minted: account already in use"
+                    }
+            
+            # Debit locally before sending so concurrent mints see it
+            self.ledger.reserve(owner.pubkey(), mint_cost)
+            
+            try:
+                # Send until confirmed or the blockhash expires
+                if on_signed is not None:
+                    on_signed(mint_pubkey, wire, recent_blockhash.value.last_valid_block_height)
+                self._seat_signatures.add(signature)
+                try:
+                    outcome = await self.submitter.submit_raw(
+                        self.client, wire, recent_blockhash.value.last_valid_block_height
+                    )
+                finally:
+                    self._seat_signatures.discard(signature)
+                if not outcome["success"]:
+                    await self.ledger.recover(owner.pubkey(), mint_cost)
+                    return {
+                        "success": False,
+                        "status": outcome["status"],
+                        "transaction_id": str(outcome["signature"]),
+                        "error": outcome["error"]
+                    }
+                self.ledger.settle(owner.pubkey(), mint_cost)
+                if self.ticket_log is not None:
+                    self.ticket_log.record(
+                        MINTED, mint_pubkey, owner.pubkey(),
+                        event_name=event_name, event_date=event_date, seat_info=seat_info, price=price
+                    )
+                if self.verification_cache is not None:
+                    # Seat addresses are predictable, so this one may be cached as missing
+                    self.verification_cache.invalidate(mint_pubkey)
+                
+                # Return success response
+                return minted(outcome)
                 
             except Exception as e:
+                # Outcome unknown: undo the local debit and re-read the chain
+                await self.ledger.recover(owner.pubkey(), mint_cost)
                 return {
                     "success": False,
                     "error": str(e)
@@ -143,26 +343,45 @@ class NFTTicketMinter:
     
     async def verify_nft_ticket(self, nft_address: Pubkey) -> dict:
         """Verify if an NFT ticket is valid"""
+        if self.verification_cache is not None:
+            return await self.verification_cache.get(nft_address, self._lookup_nft_ticket)
+        return (await self._lookup_nft_ticket(nft_address))[0]
+    
+    async def _lookup_nft_ticket(self, nft_address: Pubkey):
+        """Verification result, and whether the ticket was found (None if the lookup failed)"""
         try:
             # Get token account info
-            account_info = await self.client.get_account_info(nft_address)
+            if self.account_mirror is not None:
+                token_data = await self.account_mirror.get_account_info(nft_address)
+            else:
+                token_data = (await self.client.get_account_info(nft_address)).value
             
-            if not account_info.value:
+            if not token_data:
                 return {
                     "valid": False,
                     "error": "Token account not found"
-                }
+                }, False
             
             return {
                 "valid": True,
-                "token_data": account_info.value
-            }
+                "token_data": token_data
+            }, True
             
         except Exception as e:
             return {
                 "valid": False,
                 "error": f"Failed to verify ticket: {str(e)}"
-            }
+            }, None
+    
+    def burn_instruction(self, owner: Pubkey, nft_address: Pubkey):
+        """Instruction burning the owner's ticket token"""
+        return burn(BurnParams(
+            program_id=TOKEN_PROGRAM_ID,
+            account=self.derivations.ata(owner, nft_address),
+            mint=nft_address,
+            owner=owner,
+            amount=1
+        ))
     
     async def use_nft_ticket(self, owner: Keypair, nft_address: Pubkey) -> dict:
         """Mark an NFT ticket as used by burning the token"""
@@ -174,17 +393,8 @@ class NFTTicketMinter:
                     "error": "Invalid ticket"
                 }
             
-            # Get token account
-            token_account = get_associated_token_address(owner.pubkey(), nft_address)
-            
             # Create burn instruction
-            burn_ix = burn(
-                program_id=Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"),
-                mint=nft_address,
-                account=token_account,
-                owner=owner.pubkey(),
-                amount=1
-            )
+            burn_ix = self.burn_instruction(owner.pubkey(), nft_address)
             
             # Build transaction
             transaction = Transaction().add(burn_ix)
@@ -201,6 +411,10 @@ class NFTTicketMinter:
             
             # Wait for confirmation
             await self.client.confirm_transaction(result.value)
+            if self.ticket_log is not None:
+                self.ticket_log.record(USED, nft_address)
+            if self.verification_cache is not None:
+                self.verification_cache.mark_used(nft_address)
             
             return {
                 "success": True,
@@ -213,24 +427,95 @@ class NFTTicketMinter:
                 "error": f"Failed to use ticket: {str(e)}"
             }
     
-    async def get_ticket_history(self, nft_address: Pubkey) -> dict:
+    async def _fetch_signatures(self, address: Pubkey, until: Optional[Signature] = None) -> list:
+        """Fetch signatures newer than `until` (newest first), paging as needed"""
+        signatures = []
+        before = None
+        while True:
+            page = await self.client.get_signatures_for_address(
+                address, before=before, until=until, limit=SIGNATURE_PAGE_LIMIT
+            )
+            signatures.extend(page.value)
+            if len(page.value) < SIGNATURE_PAGE_LIMIT:
+                return signatures
+            before = page.value[-1].signature
+    
+    async def _fetch_transaction(self, signature: Signature):
+        """Finalized transaction (through the cache if any), else the confirmed one; None if neither"""
+        if self.transaction_cache is not None:
+            tx = await self.transaction_cache.get_transaction(self.client, signature)
+        else:
+            tx = (await self.client.get_transaction(
+                signature, encoding="base64", commitment=Finalized, max_supported_transaction_version=0
+            )).value
+        if tx is None:
+            # Not finalized yet: read it at confirmed, which is never cached
+            tx = (await self.client.get_transaction(
+                signature, encoding="base64", commitment=Confirmed, max_supported_transaction_version=0
+            )).value
+        return tx
+    
+    async def _fetch_history_entries(self, signatures: list) -> list:
+        """Fetch the transactions behind signatures and describe each one, skipping any not yet available"""
+        history = []
+        for sig in signatures:
+            tx = await self._fetch_transaction(sig.signature)
+            if tx is None:
+                continue
+            history.append({
+                "signature": str(sig.signature),
+                "timestamp": tx.block_time,
+                "slot": tx.slot,
+                "type": self._determine_transaction_type(tx.transaction)
+            })
+        return history
+    
+    async def get_ticket_history(self, nft_address: Pubkey, incremental: bool = False) -> dict:
         """Get the transaction history for an NFT ticket"""
         try:
-            signatures = await self.client.get_signatures_for_address(nft_address)
-            
-            history = []
-            for sig in signatures:
-                tx = await self.client.get_transaction(sig.signature)
-                history.append({
-                    "signature": str(sig.signature),
-                    "timestamp": tx.block_time,
-                    "slot": tx.slot,
-                    "type": self._determine_transaction_type(tx)
-                })
+            if not incremental:
+                signatures = await self._fetch_signatures(nft_address)
+                return {
+                    "success": True,
+                    "history": await self._fetch_history_entries(signatures)
+                }
+            
+            if self.history_store is None:
+                return {
+                    "success": False,
+                    "error": "Incremental history needs a HistoryStore"
+                }
+            
+            # Only fetch what is newer than the stored checkpoint
+            address = str(nft_address)
+            stored = self.history_store.load(address)
+            newest = stored["newest_signature"]
+            signatures = await self._fetch_signatures(
+                nft_address,
+                until=Signature.from_string(newest) if newest else None
+            )
+            
+            history = stored["history"]
+            new_entries = []
+            if signatures:
+                new_entries = await self._fetch_history_entries(signatures)
+                
+                # Only checkpoint past entries older than anything that couldn't be fetched yet,
+                # so those are retried on the next sync
+                fetched = {entry["signature"] for entry in new_entries}
+                settled = len(signatures)
+                for index, sig in enumerate(signatures):
+                    if str(sig.signature) not in fetched:
+                        settled = len(signatures) - index - 1
+                settled_entries = new_entries[len(new_entries) - settled:] if settled else []
+                if settled_entries:
+                    self.history_store.save(address, settled_entries[0]["signature"], settled_entries + history)
+                history = new_entries + history
             
             return {
                 "success": True,
-                "history": history
+                "history": history,
+                "new_entries": len(new_entries)
             }
             
         except Exception as e:
@@ -241,11 +526,15 @@ class NFTTicketMinter:
     
     def _determine_transaction_type(self, transaction) -> str:
         """Helper method to determine transaction type"""
-        if "Initialize Mint" in str(transaction.transaction.message):
+        # Raw (base64) transactions carry the instruction names in the program logs
+        text = str(transaction.transaction.message)
+        if transaction.meta is not None and transaction.meta.log_messages:
+            text += "\n".join(transaction.meta.log_messages)
+        if "Initialize Mint" in text or "InitializeMint" in text:
             return "Mint"
-        elif "Transfer" in str(transaction.transaction.message):
+        elif "Transfer" in text:
             return "Transfer"
-        elif "Burn" in str(transaction.transaction.message):
+        elif "Burn" in text:
             return "Usage"
         return "Unknown"
     
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
+
+
+class OverloadedError(Exception):
+    """Raised when the concurrency governor cannot admit a request in time"""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Take one token; return (allowed, seconds until a token is available)"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    def __init__(self, rate: float = 1.0, burst: int = 5, max_clients: int = 10_000):
+        """Per-client token buckets, bounded to the most recently seen clients"""
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()  # called from Flask worker threads
+
+    def allow(self, client_id: str) -> Tuple[bool, float]:
+        """Check a request from client_id; return (allowed, retry_after seconds)"""
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[client_id] = bucket
+                # Forgetting an idle client only ever gives it a fresh burst
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            return bucket.take()
+
+
+class ConcurrencyGovernor:
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 max_queue: int = 100, queue_timeout: float = 10.0, backoff: float = 0.5,
+                 cooldown: float = 1.0):
+        """Cap concurrent upstream calls with an AIMD-adjusted limit and a bounded queue"""
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_use = 0
+        self._waiters: deque = deque()
+        self._last_decrease = float("-inf")
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "decreases": 0}
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self):
+        """Wait for a slot, failing fast when the queue is full or the wait too long"""
+        if self.in_use < int(self.limit) and not self._waiters:
+            self.in_use += 1
+            self.stats["admitted"] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise OverloadedError("Too many queued requests")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timed_out"] += 1
+                raise OverloadedError("Timed out waiting for a free slot") from None
+            raise
+        self.stats["admitted"] += 1
+
+    def has_capacity(self) -> bool:
+        """Whether a slot is free right now, without queueing"""
+        return self.in_use < int(self.limit) and not self._waiters
+
+    def release(self):
+        """Return a slot and hand free capacity to queued waiters"""
+        self.in_use -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """Admit queued waiters while the limit allows"""
+        while self._waiters and self.in_use < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(None)
+
+    def on_success(self):
+        """Additive increase: roughly +1 slot per limit's worth of successes"""
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake_waiters()
+
+    def on_overload(self):
+        """Multiplicative decrease after an upstream 429 (once per cooldown)"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.stats["decreases"] += 1
+
+    def get_stats(self) -> dict:
+        """Get the current limit, usage and counters"""
+        return {
+            **self.stats,
+            "limit": int(self.limit),
+            "in_use": self.in_use,
+            "queued": len(self._waiters)
+        }
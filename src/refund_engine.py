@@ -0,0 +1,261 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import TransferParams, transfer
+from solders.transaction import Transaction as SoldersTransaction
+from solana.rpc.commitment import Confirmed
+from solana.transaction import Transaction
+from src.balance_ledger import LAMPORTS_PER_SIGNATURE
+from src.ticket_log import TicketLog, MINTED, REFUNDED
+from src.transaction_packing import pack_instructions
+from src.transaction_submitter import LANDED, TransactionSubmitter
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# How a checkpointed batch resolved
+PAID, REJECTED, EXPIRED = "paid", "rejected", "expired"
+
+
+def ticket_price_lamports(ticket: dict) -> int:
+    """Refund owed for a ticket: NFT ticket prices are logged in SOL"""
+    return int(round(ticket["price"] * LAMPORTS_PER_SOL))
+
+
+class RefundEngine:
+    def __init__(self, client, treasury: Keypair, ticket_log: TicketLog,
+                 submitter: Optional[TransactionSubmitter] = None, concurrency: int = 8,
+                 checkpoint_directory: str = "refund_checkpoints",
+                 refund_amount: Callable[[dict], int] = ticket_price_lamports):
+        """Refund every ticket of a cancelled event from a treasury, in packed batches"""
+        self.client = client
+        self.treasury = treasury
+        self.ticket_log = ticket_log
+        self.submitter = submitter or TransactionSubmitter()
+        self.concurrency = concurrency
+        self.checkpoint_directory = checkpoint_directory
+        self.refund_amount = refund_amount
+
+    def _checkpoint_path(self, event: str) -> str:
+        """File holding an event's signed-but-unsettled batches"""
+        name = hashlib.sha256(event.encode()).hexdigest()[:16]
+        return os.path.join(self.checkpoint_directory, f"{name}.json")
+
+    def _load_checkpoint(self, event: str) -> dict:
+        path = self._checkpoint_path(event)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)["pending"]
+
+    def _save_checkpoint(self, event: str, pending: dict):
+        """Atomically replace the checkpoint (removed once nothing is pending)"""
+        path = self._checkpoint_path(event)
+        if not pending:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.checkpoint_directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"event": event, "pending": pending}, f)
+        os.replace(tmp_path, path)
+
+    def outstanding_tickets(self, event_name: str, event_date: Optional[str] = None) -> Dict[str, dict]:
+        """Tickets of the event that are neither used nor refunded yet"""
+        return {
+            address: ticket
+            for address, ticket in self.ticket_log.tickets.items()
+            if ticket["status"] == MINTED
+            and ticket.get("event_name") == event_name
+            and (event_date is None or ticket.get("event_date") == event_date)
+        }
+
+    async def refund_event(self, event_name: str, event_date: Optional[str] = None) -> dict:
+        """Refund every outstanding ticket of an event; safe to re-run after a crash"""
+        event = f"{event_name}|{event_date}"
+        payer = self.treasury.pubkey()
+        report = {
+            "event_name": event_name,
+            "event_date": event_date,
+            "refunded": [],
+            "failed": [],
+            "transactions": 0,
+            "resumed_batches": 0,
+            "moved_lamports": 0
+        }
+        # Balances at confirmed, the commitment batches are settled at, so the reconcile adds up
+        treasury_before = (await self.client.get_balance(payer, commitment=Confirmed)).value
+
+        # Settle batches signed before a crash. Each is resolved from its status first; the
+        # same bytes are only rebroadcast while the blockhash is live, and a batch is only
+        # dropped once it landed or provably never can, so no owner is ever paid twice
+        pending = self._load_checkpoint(event)
+        for signature, batch in list(pending.items()):
+            report["resumed_batches"] += 1
+            resolution = await self._resolve(signature, batch)
+            moved = False
+            if resolution is None:
+                outcome = await self.submitter.submit_raw(
+                    self.client, base64.b64decode(batch["wire"]), batch["last_valid_block_height"]
+                )
+                moved = True
+                resolution = PAID if outcome["success"] else await self._resolve(signature, batch)
+            if resolution is None:
+                # Still undecided: keep it checkpointed and leave its tickets alone
+                continue
+            if resolution == PAID:
+                self._settle(batch, {"success": True, "signature": signature}, report, moved=moved)
+            elif resolution == REJECTED and moved:
+                report["moved_lamports"] += LAMPORTS_PER_SIGNATURE
+            # Otherwise nothing was paid and its tickets are simply packed again below
+            del pending[signature]
+            self._save_checkpoint(event, pending)
+        held = {address for batch in pending.values() for address, _, _ in batch["refunds"]}
+
+        # Enumerate what is still owed, one transfer per owner
+        tickets = self.outstanding_tickets(event_name, event_date)
+        owed: Dict[str, List[tuple]] = {}
+        for address, ticket in tickets.items():
+            if address in held:
+                continue
+            owed.setdefault(ticket["owner"], []).append((address, self.refund_amount(ticket)))
+        owners = list(owed)
+        transfer_ixs = [
+            transfer(TransferParams(
+                from_pubkey=payer,
+                to_pubkey=Pubkey.from_string(owner),
+                lamports=sum(amount for _, amount in owed[owner])
+            ))
+            for owner in owners
+        ]
+        batches = pack_instructions(payer, transfer_ixs)
+
+        # Refuse to start a refund the treasury can't finish
+        needed = sum(amount for refunds in owed.values() for _, amount in refunds)
+        needed += LAMPORTS_PER_SIGNATURE * len(batches)
+        available = (await self.client.get_balance(payer, commitment=Confirmed)).value
+        if batches and available < needed:
+            report["error"] = (
+                f"Insufficient treasury balance. Has {available / LAMPORTS_PER_SOL} SOL, "
+                f"needs {needed / LAMPORTS_PER_SOL} SOL"
+            )
+            batches = []
+
+        slots = asyncio.Semaphore(self.concurrency)
+        start = 0
+        jobs = []
+        for batch in batches:
+            batch_owners = owners[start:start + len(batch)]
+            start += len(batch)
+            refunds = [
+                [address, owner, amount]
+                for owner in batch_owners
+                for address, amount in owed[owner]
+            ]
+            jobs.append(self._run_batch(event, pending, batch, refunds, slots, report))
+        await asyncio.gather(*jobs)
+
+        # Reconcile: the treasury moved by exactly what landed in this run (refunds plus fees)
+        treasury_after = (await self.client.get_balance(payer, commitment=Confirmed)).value
+        report.update({
+            "tickets": len(report["refunded"]) + len(report["failed"]),
+            "refunded_lamports": sum(refund["amount"] for refund in report["refunded"]),
+            "fees": LAMPORTS_PER_SIGNATURE * report["transactions"],
+            "treasury_before": treasury_before,
+            "treasury_after": treasury_after,
+            "reconciled": treasury_before - treasury_after == report["moved_lamports"],
+            "outstanding": len(self.outstanding_tickets(event_name, event_date)),
+            "unsettled_batches": len(pending)
+        })
+        report["success"] = not report["failed"] and report["outstanding"] == 0 and "error" not in report
+        return report
+
+    async def _run_batch(self, event: str, pending: dict, instructions: list, refunds: List[list],
+                         slots: asyncio.Semaphore, report: dict):
+        """Sign, checkpoint and submit one packed batch"""
+        async with slots:
+            try:
+                recent_blockhash = await self.client.get_latest_blockhash()
+                transaction = Transaction(fee_payer=self.treasury.pubkey()).add(*instructions)
+                transaction.recent_blockhash = recent_blockhash.value.blockhash
+                transaction.sign(self.treasury)
+                wire = transaction.serialize()
+            except Exception as e:
+                self._settle({"refunds": refunds}, {"success": False, "error": str(e)}, report)
+                return
+
+            # Persist the signed bytes before they can land
+            signature = str(SoldersTransaction.from_bytes(wire).signatures[0])
+            batch = {
+                "refunds": refunds,
+                "wire": base64.b64encode(wire).decode("ascii"),
+                "last_valid_block_height": recent_blockhash.value.last_valid_block_height
+            }
+            pending[signature] = batch
+            self._save_checkpoint(event, pending)
+
+            outcome = await self.submitter.submit_raw(
+                self.client, wire, recent_blockhash.value.last_valid_block_height
+            )
+            resolution = PAID if outcome["success"] else await self._resolve(signature, batch)
+            if resolution is None:
+                # Undecided: it may still pay out, so it stays checkpointed (an unsettled batch)
+                # and the next run settles it; its tickets haven't failed
+                return
+            if resolution == PAID:
+                outcome = {"success": True, "signature": signature}
+            elif resolution == REJECTED:
+                report["moved_lamports"] += LAMPORTS_PER_SIGNATURE
+            self._settle(batch, outcome, report)
+            del pending[signature]
+            self._save_checkpoint(event, pending)
+
+    async def _resolve(self, signature: str, batch: dict) -> Optional[str]:
+        """PAID, REJECTED (landed with an error), EXPIRED (can never land), or None if undecided"""
+        try:
+            status = await self._landed_status(signature)
+            if status is None:
+                block_height = (await self.client.get_block_height()).value
+                if block_height <= batch["last_valid_block_height"]:
+                    return None
+                # Look again now that the blockhash is dead: it can no longer land
+                status = await self._landed_status(signature)
+                if status is None:
+                    return EXPIRED
+        except Exception as e:
+            print(f"Status check for refund batch {signature} failed: {e}")
+            return None
+        if status.confirmation_status not in LANDED:
+            return None
+        return PAID if status.err is None else REJECTED
+
+    async def _landed_status(self, signature: str):
+        """Status of a signature anywhere in the ledger's history"""
+        response = await self.client.get_signature_statuses(
+            [Signature.from_string(signature)], search_transaction_history=True
+        )
+        return response.value[0]
+
+    def _settle(self, batch: dict, outcome: dict, report: dict, moved: bool = True):
+        """Record a batch's outcome in the ticket log and the report"""
+        if outcome["success"]:
+            report["transactions"] += 1
+            if moved:
+                report["moved_lamports"] += LAMPORTS_PER_SIGNATURE + sum(amount for _, _, amount in batch["refunds"])
+        for address, owner, amount in batch["refunds"]:
+            entry = {"ticket": address, "owner": owner, "amount": amount}
+            if outcome["success"]:
+                entry["signature"] = str(outcome["signature"])
+                self.ticket_log.record(
+                    REFUNDED, address, refund_signature=entry["signature"], refund_lamports=amount
+                )
+                report["refunded"].append(entry)
+            else:
+                entry["error"] = outcome.get("error", outcome.get("status"))
+                report["failed"].append(entry)
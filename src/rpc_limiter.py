@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import httpx
+from src.rate_limit import ConcurrencyGovernor
+
+
+def _find_http_error(exc: BaseException) -> Optional[httpx.HTTPStatusError]:
+    """Dig the HTTP status error out of solana-py's wrapped exceptions"""
+    while exc is not None:
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    """Whether an exception (or what it wraps) is a request timeout"""
+    while exc is not None:
+        if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RpcLimiter:
+    def __init__(self, initial_limit: int = 8, max_limit: int = 64, max_retries: int = 3,
+                 retry_delay: float = 1.0, latency_tolerance: float = 2.0, latency_window: int = 100):
+        """Adaptive cap on concurrent RPC calls: grow while latency holds, cut on 429s and timeouts"""
+        self.governor = ConcurrencyGovernor(
+            initial_limit=initial_limit,
+            max_limit=max_limit,
+            max_queue=10_000,
+            queue_timeout=60.0
+        )
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.latency_tolerance = latency_tolerance
+
+        # Recent latencies; the fastest is the uncongested baseline
+        self._latencies = deque(maxlen=latency_window)
+        self._paused_until = 0.0
+        self.stats = {"calls": 0, "throttled": 0, "timeouts": 0, "retries": 0, "slow": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current number of concurrent calls allowed"""
+        return int(self.governor.limit)
+
+    def _record_latency(self, latency: float):
+        """Grow the window only while latency stays near the baseline"""
+        baseline = min(self._latencies) if self._latencies else latency
+        self._latencies.append(latency)
+        if latency <= baseline * self.latency_tolerance:
+            self.governor.on_success()
+        else:
+            self.stats["slow"] += 1
+
+    async def _wait_if_paused(self):
+        """Hold new calls while a Retry-After window is open"""
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, fn, *args, **kwargs):
+        """Run one RPC call under the limiter, retrying 429s after the advised delay"""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_if_paused()
+            async with self.governor.slot():
+                self.stats["calls"] += 1
+                started = time.monotonic()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    http_error = _find_http_error(e)
+                    if http_error is not None and http_error.response.status_code == 429:
+                        self.stats["throttled"] += 1
+                        self.governor.on_overload()
+                        retry_after = parse_retry_after(http_error.response.headers.get("Retry-After"))
+                        if retry_after is None:
+                            retry_after = self.retry_delay * 2 ** attempt
+                        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                        if attempt < self.max_retries:
+                            self.stats["retries"] += 1
+                            continue
+                    elif _is_timeout(e):
+                        self.stats["timeouts"] += 1
+                        self.governor.on_overload()
+                    raise
+                self._record_latency(time.monotonic() - started)
+                return result
+
+    def get_stats(self) -> dict:
+        """Get the current limit, latency baseline and counters"""
+        return {
+            **self.stats,
+            **self.governor.get_stats(),
+            "limit": self.limit,
+            "baseline_latency": min(self._latencies) if self._latencies else None
+        }
+
+
+class LimitedClient:
+    def __init__(self, client, limiter: Optional[RpcLimiter] = None):
+        """Wrap an AsyncClient so every RPC coroutine goes through an RpcLimiter"""
+        self.client = client
+        self.limiter = limiter or RpcLimiter()
+
+    def __getattr__(self, name):
+        if name == "confirm_transaction":
+            # A polling loop, not one RPC: holding a slot for it would starve other calls.
+            # Bound to this wrapper, each status poll inside it is limited on its own
+            return getattr(type(self.client), name).__get__(self)
+        attr = getattr(self.client, name)
+        if name == "close" or not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def limited(*args, **kwargs):
+            return await self.limiter.call(attr, *args, **kwargs)
+        return limited
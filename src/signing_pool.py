@@ -0,0 +1,79 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.transaction import Transaction as SoldersTransaction
+
+# Long-lived keys, loaded once into each worker by _init_worker
+_worker_keys: Dict[str, Keypair] = {}
+
+
+def _init_worker(secrets: List[bytes]):
+    """Load the pool's keys into this worker's memory"""
+    for secret in secrets:
+        keypair = Keypair.from_bytes(secret)
+        _worker_keys[str(keypair.pubkey())] = keypair
+
+
+def _sign_batch(jobs: List[Tuple[bytes, List[bytes]]]) -> List[bytes]:
+    """Sign serialized messages; each job may carry extra one-off signer secrets"""
+    signed = []
+    for message_bytes, extra_secrets in jobs:
+        message = Message.from_bytes(message_bytes)
+        extra = {}
+        for secret in extra_secrets:
+            keypair = Keypair.from_bytes(secret)
+            extra[str(keypair.pubkey())] = keypair
+
+        # One signature per required signer, in account-key order
+        signatures = []
+        for pubkey in message.account_keys[:message.header.num_required_signatures]:
+            keypair = extra.get(str(pubkey)) or _worker_keys[str(pubkey)]
+            signatures.append(keypair.sign_message(message_bytes))
+        signed.append(bytes(SoldersTransaction.populate(message, signatures)))
+    return signed
+
+
+class SigningPool:
+    def __init__(self, keypairs: Iterable[Keypair], workers: Optional[int] = None,
+                 use_processes: bool = True, chunk_size: int = 64):
+        """Sign transactions off the event loop in a process (or thread) pool"""
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        keypairs = list(keypairs)
+        self.pubkeys = {str(keypair.pubkey()) for keypair in keypairs}
+        secrets = [bytes(keypair) for keypair in keypairs]
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor: Executor = executor_cls(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(secrets,)
+        )
+        self.stats = {"signed": 0, "batches": 0}
+
+    def _job(self, message: Message, extra_signers: Sequence[Keypair]) -> Tuple[bytes, List[bytes]]:
+        """Serialize one signing job (only one-off signers travel with it)"""
+        extra = [bytes(keypair) for keypair in extra_signers if str(keypair.pubkey()) not in self.pubkeys]
+        return bytes(message), extra
+
+    async def sign(self, message: Message, extra_signers: Sequence[Keypair] = ()) -> bytes:
+        """Sign one message; returns signed wire bytes"""
+        return (await self.sign_many([(message, extra_signers)]))[0]
+
+    async def sign_many(self, jobs: Sequence[Tuple[Message, Sequence[Keypair]]]) -> List[bytes]:
+        """Sign many messages across the workers, in chunks; returns wire bytes in order"""
+        loop = asyncio.get_running_loop()
+        serialized = [self._job(message, extra) for message, extra in jobs]
+        chunks = [serialized[i:i + self.chunk_size] for i in range(0, len(serialized), self.chunk_size)]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _sign_batch, chunk) for chunk in chunks
+        ])
+        self.stats["signed"] += len(serialized)
+        self.stats["batches"] += len(chunks)
+        return [wire for chunk in results for wire in chunk]
+
+    def close(self):
+        """Shut the workers down"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        """Coalesce concurrent calls that share a key into one upstream call"""
+        self._flights: Dict[Hashable, dict] = {}
+        self._streams: Dict[Hashable, dict] = {}
+        self.stats = {
+            "calls": 0,       # upstream calls actually made
+            "saved": 0,       # callers that joined an in-flight call instead
+            "errors": 0,      # upstream calls that raised
+            "cancelled": 0    # upstream calls abandoned by every caller
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key at a time; concurrent callers share its result"""
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = {"task": task, "waiters": 0}
+            self._flights[key] = flight
+            task.add_done_callback(lambda t: self._finish(key, flight))
+            self.stats["calls"] += 1
+        else:
+            self.stats["saved"] += 1
+
+        flight["waiters"] += 1
+        try:
+            # Shield so one caller being cancelled doesn't cancel the others
+            return await asyncio.shield(flight["task"])
+        except asyncio.CancelledError:
+            # Only abandon the upstream call once nobody is waiting for it
+            if flight["waiters"] == 1 and not flight["task"].done():
+                flight["task"].cancel()
+            raise
+        finally:
+            flight["waiters"] -= 1
+
+    def _finish(self, key: Hashable, flight: dict):
+        """Forget a finished call so the next caller starts a fresh one"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        task = flight["task"]
+        if task.cancelled():
+            self.stats["cancelled"] += 1
+        elif task.exception() is not None:
+            self.stats["errors"] += 1
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate fn once per key at a time; concurrent callers replay its items from the start"""
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = {"items": [], "done": False, "error": None, "changed": asyncio.Event(), "readers": 0}
+            flight["task"] = asyncio.ensure_future(self._pump(key, flight, fn))
+            self._streams[key] = flight
+            self.stats["calls"] += 1
+        else:
+            self.stats["saved"] += 1
+
+        flight["readers"] += 1
+        position = 0
+        try:
+            while True:
+                # Replay what's buffered (everything, for a caller that joined late), then wait for more
+                while position < len(flight["items"]):
+                    yield flight["items"][position]
+                    position += 1
+                if flight["done"]:
+                    if flight["error"] is not None:
+                        raise flight["error"]
+                    return
+                await flight["changed"].wait()
+        finally:
+            flight["readers"] -= 1
+            # Only abandon the upstream stream once nobody is reading it
+            if flight["readers"] == 0 and not flight["task"].done():
+                flight["task"].cancel()
+
+    async def _pump(self, key: Hashable, flight: dict, fn: Callable[[], AsyncIterator[Any]]):
+        """Buffer a shared stream's items and wake its readers after each one"""
+        items = fn()
+        try:
+            async for item in items:
+                flight["items"].append(item)
+                self._notify(flight)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        except Exception as e:
+            flight["error"] = e
+            self.stats["errors"] += 1
+        finally:
+            flight["done"] = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            self._notify(flight)
+            await items.aclose()
+
+    @staticmethod
+    def _notify(flight: dict):
+        """Wake every reader waiting on a shared stream"""
+        changed, flight["changed"] = flight["changed"], asyncio.Event()
+        changed.set()
+
+    def in_flight(self) -> int:
+        """Number of upstream calls currently running"""
+        return len(self._flights) + len(self._streams)
+
+    def get_stats(self) -> dict:
+        """Get counters, including how many upstream calls were saved"""
+        return {**self.stats, "in_flight": self.in_flight()}
@@ -0,0 +1,68 @@
+import hashlib
+from typing import List, Optional, Tuple
+from solders.pubkey import Pubkey
+from src.derivation_cache import DerivationCache
+
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+
+# First seed of every ticket PDA
+TICKET_SEED = b"ticket"
+
+# Longest seed Solana accepts (bytes)
+MAX_SEED_LENGTH = 32
+
+
+def _component(value) -> bytes:
+    """One seat component as a length-prefixed seed (PDA seeds are hashed run together)"""
+    raw = str(value).encode()
+    if len(raw) > MAX_SEED_LENGTH - 1:
+        raise ValueError(f"Seat component too long for a seed: {value!r}")
+    return bytes([len(raw)]) + raw
+
+
+def event_key(event_name: str, event_date) -> str:
+    """One unambiguous string per (event name, date), whatever characters the name holds"""
+    return "".join(f"{len(str(part))}:{part}" for part in (event_name, event_date))
+
+
+def ticket_seeds(event: str, section, row, seat) -> List[bytes]:
+    """PDA seeds for a seat (the event name is hashed so any length fits)"""
+    return [
+        TICKET_SEED,
+        hashlib.sha256(event.encode()).digest(),
+        _component(section),
+        _component(row),
+        _component(seat)
+    ]
+
+
+def seat_seed(event: str, section, row, seat) -> str:
+    """32-character seed string for create_account_with_seed, unique per seat"""
+    digest = hashlib.sha256()
+    for part in (event, section, row, seat):
+        raw = str(part).encode()
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(raw).to_bytes(4, "little") + raw)
+    return digest.hexdigest()[:MAX_SEED_LENGTH]
+
+
+class TicketAddresser:
+    def __init__(self, program_id: Optional[Pubkey] = None, cache_size: int = 100_000,
+                 cache: Optional[DerivationCache] = None):
+        """Derive ticket addresses from (program, event, section, row, seat), memoized"""
+        self.program_id = program_id
+        self.cache = cache if cache is not None else DerivationCache(max_size=cache_size)
+
+    def ticket_pda(self, event: str, section, row, seat) -> Tuple[Pubkey, int]:
+        """Ticket account address and bump seed owned by the ticket program"""
+        if self.program_id is None:
+            raise ValueError("No ticket program configured")
+        return self.cache.pda(ticket_seeds(event, section, row, seat), self.program_id)
+
+    def mint_address(self, issuer: Pubkey, event: str, section, row, seat) -> Pubkey:
+        """NFT mint address for a seat, created by the issuer with create_account_with_seed"""
+        return self.cache.create_with_seed(issuer, seat_seed(event, section, row, seat), TOKEN_PROGRAM_ID)
+
+    def cache_info(self) -> dict:
+        """Hit/miss counts of the derivation cache"""
+        return self.cache.get_stats()
@@ -8,14 +8,23 @@ import struct
 from datetime import datetime
 from typing import Optional, Dict
 import base58
+from src.rpc_limiter import LimitedClient
 
 class TicketClient:
-    def __init__(self, rpc_url="https://api.devnet.solana.com"):
-        self.client = AsyncClient(rpc_url, commitment=Commitment.CONFIRMED)
+    def __init__(self, rpc_url="https://api.devnet.solana.com", account_mirror=None, rpc_limiter=None):
+        # Every RPC call goes through an adaptive concurrency limiter
+        self.client = LimitedClient(AsyncClient(rpc_url, commitment=Commitment.CONFIRMED), rpc_limiter)
+        self.account_mirror = account_mirror  # optional AccountMirror for validations
         self.program_id = PublicKey("YOUR_PROGRAM_ID_HERE")  # You'll get this after deploying
         
     async def create_ticket(self, payer: Keypair, event_id: int, price: int):
-        """Create a new ticket"""
+        """Create a new ticket
+        
+        The ticket program takes the new account as a signer, so it gets a fresh keypair and
+        its address must be saved. A seat PDA (TicketAddresser.ticket_pda) would need the program
+        to create the account itself; seat-addressed tickets go through
+        NFTTicketMinter(ticket_addresser=...) instead.
+        """
         # Generate a new account for the ticket
         ticket_account = Keypair()
         
@@ -58,11 +67,14 @@ class TicketClient:
     
     async def validate_ticket(self, ticket_account: PublicKey):
         """Validate if a ticket is valid and unused"""
-        account_info = await self.client.get_account_info(ticket_account)
-        if account_info.value is None:
+        if self.account_mirror is not None:
+            account = await self.account_mirror.get_account_info(ticket_account)
+        else:
+            account = (await self.client.get_account_info(ticket_account)).value
+        if account is None:
             return False
             
-        data = account_info.value.data
+        data = account.data
         event_id, price, is_used = struct.unpack("<QQB", data)
         return not bool(is_used)
     
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+# Ticket lifecycle events
+MINTED, TRANSFERRED, USED, REFUNDED = "minted", "transferred", "used", "refunded"
+EVENT_TYPES = (MINTED, TRANSFERRED, USED, REFUNDED)
+
+# Tickets encoded per json.dumps call when writing a snapshot, so the writer
+# thread hands the GIL back to the event loop between chunks
+SNAPSHOT_CHUNK = 1000
+
+
+def apply_event(tickets: Dict[str, dict], event: dict):
+    """Fold one event into the ticket state"""
+    address = event["ticket"]
+    kind = event["type"]
+    if kind == MINTED:
+        tickets[address] = {
+            "status": MINTED,
+            "owner": event.get("owner"),
+            **event.get("data", {})
+        }
+        return
+    # Ticket states are replaced, never mutated, so a shallow copy of the map is a snapshot
+    ticket = dict(tickets.get(address, {"status": MINTED, "owner": None}))
+    if kind == TRANSFERRED:
+        ticket["owner"] = event["owner"]
+    else:
+        ticket["status"] = kind
+    ticket.update(event.get("data", {}))
+    tickets[address] = ticket
+
+
+class TicketLog:
+    def __init__(self, directory: str = "ticket_log", snapshot_every: int = 100_000, fsync: bool = False):
+        """Append-only log of ticket lifecycle events, compacted into periodic snapshots"""
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.tickets: Dict[str, dict] = {}
+        self.seq = 0
+        self._since_snapshot = 0
+        self.stats = {"recorded": 0, "replayed": 0, "snapshots": 0}
+
+        # Snapshots triggered by record() are written by this thread, one at a time
+        self._snapshot_writer = ThreadPoolExecutor(max_workers=1)
+        self._snapshot_future: Optional[Future] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._log = open(self._log_path, "a")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, "events.log")
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "snapshot.json")
+
+    def _rotated_logs(self) -> List[tuple]:
+        """(last seq, path) of logs set aside for a snapshot that hasn't replaced them yet"""
+        rotated = []
+        for name in os.listdir(self.directory):
+            if name.startswith("events-") and name.endswith(".log"):
+                rotated.append((int(name[len("events-"):-len(".log")]), os.path.join(self.directory, name)))
+        return sorted(rotated)
+
+    def _load(self):
+        """Restore the latest snapshot, then replay only the events after it"""
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            self.seq = snapshot["seq"]
+            self.tickets = snapshot["tickets"]
+        paths = [path for _, path in self._rotated_logs()] + [self._log_path]
+        for path in paths:
+            for event in self._read_log(path):
+                # Events already folded into the snapshot (crash before the log was reset)
+                if event["seq"] <= self.seq:
+                    continue
+                apply_event(self.tickets, event)
+                self.seq = event["seq"]
+                self._since_snapshot += 1
+                self.stats["replayed"] += 1
+
+    def _read_log(self, path: str) -> Iterator[dict]:
+        """Events in a log file; a torn final line from a crash is cut off"""
+        if not os.path.exists(path):
+            return
+        good = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                yield json.loads(line)
+        if good < os.path.getsize(path):
+            # Later appends must start on a fresh line
+            with open(path, "r+b") as f:
+                f.truncate(good)
+
+    def record(self, kind: str, ticket, owner=None, **data) -> dict:
+        """Append an event and apply it to the in-memory state"""
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"Unknown ticket event: {kind}")
+        self.seq += 1
+        event = {"seq": self.seq, "type": kind, "ticket": str(ticket), "time": time.time()}
+        if owner is not None:
+            event["owner"] = str(owner)
+        if data:
+            event["data"] = data
+        line = json.dumps(event, separators=(",", ":"), default=str)
+        self._log.write(line + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+        # Apply what was written, so memory matches a later replay
+        apply_event(self.tickets, json.loads(line) if data else event)
+        self.stats["recorded"] += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            # Written in the background: encoding a million tickets takes seconds. A failed
+            # snapshot loses nothing, its events stay in the set-aside logs
+            try:
+                self.snapshot(wait=False)
+            except Exception as e:
+                print(f"Ticket log snapshot failed: {e}")
+        return event
+
+    def snapshot(self, wait: bool = True):
+        """Compact the log: capture the state, then write it atomically (in a thread unless wait)"""
+        # One snapshot at a time; waiting here only happens if they fall behind
+        self.wait_for_snapshot()
+
+        # Set the covered events aside and start a fresh log; the state copy is
+        # shallow because ticket states are never mutated in place
+        self._log.close()
+        os.replace(self._log_path, os.path.join(self.directory, f"events-{self.seq:012d}.log"))
+        self._log = open(self._log_path, "a")
+        self._since_snapshot = 0
+        future = self._snapshot_writer.submit(self._write_snapshot, self.seq, dict(self.tickets))
+        self._snapshot_future = future
+        if wait:
+            self.wait_for_snapshot()
+
+    def wait_for_snapshot(self):
+        """Block until a background snapshot has been written"""
+        if self._snapshot_future is not None:
+            future, self._snapshot_future = self._snapshot_future, None
+            future.result()
+
+    def _write_snapshot(self, seq: int, tickets: Dict[str, dict]):
+        """Write a captured state atomically, then drop the logs it covers"""
+        tmp_path = self._snapshot_path + ".tmp"
+        items = iter(tickets.items())
+        with open(tmp_path, "w") as f:
+            f.write(f'{{"seq":{seq},"tickets":{{')
+            separator = ""
+            while True:
+                chunk = dict(islice(items, SNAPSHOT_CHUNK))
+                if not chunk:
+                    break
+                # dumps runs the C encoder in one pass; dump would stream it through Python
+                f.write(separator + json.dumps(chunk, separators=(",", ":"))[1:-1])
+                separator = ","
+            f.write("}}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+
+        # Every set-aside event is now in the snapshot
+        for last_seq, path in self._rotated_logs():
+            if last_seq <= seq:
+                os.remove(path)
+        self.stats["snapshots"] += 1
+
+    def get(self, ticket) -> Optional[dict]:
+        """Current state of one ticket"""
+        return self.tickets.get(str(ticket))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tickets in each status"""
+        counts = {kind: 0 for kind in (MINTED, USED, REFUNDED)}
+        for ticket in self.tickets.values():
+            counts[ticket["status"]] += 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    def close(self):
+        """Finish any background snapshot and close the log file"""
+        try:
+            self.wait_for_snapshot()
+        finally:
+            self._snapshot_writer.shutdown()
+            self._log.close()
@@ -4,14 +4,49 @@ from solders.pubkey import Pubkey
 from solana.rpc.async_api import AsyncClient
 from solana.transaction import Transaction
 from solders.system_program import TransferParams, transfer
-from solana.rpc.commitment import Commitment
+from solana.rpc.commitment import Commitment, Confirmed
 import struct
 from datetime import datetime
+from typing import Callable, List, Optional
+from src.balance_ledger import BalanceLedger, LAMPORTS_PER_SIGNATURE
+from src.rpc_limiter import LimitedClient
+from src.ticket_log import MINTED, USED
+from src.transaction_packing import MAX_TRANSACTION_SIZE, pack_instructions
+from src.transaction_submitter import TransactionSubmitter
+
+# Lamports reserved for fees per transaction (0.0001 SOL)
+FEE_RESERVE = 100_000
 
 class TicketSystem:
-    def __init__(self, rpc_url="https://api.devnet.solana.com"):
+    def __init__(self, rpc_url="https://api.devnet.solana.com", account_mirror=None, rpc_limiter=None,
+                 signing_pool=None, ticket_log=None, verification_cache=None):
         """Initialize ticket system with Solana client"""
-        self.client = AsyncClient(rpc_url)  # Remove commitment parameter
+        # Every RPC call goes through an adaptive concurrency limiter
+        self.client = LimitedClient(AsyncClient(rpc_url), rpc_limiter)  # Remove commitment parameter
+        
+        # Optional AccountMirror answering verifications from memory
+        self.account_mirror = account_mirror
+        
+        # Purchases are checked against local balances instead of a get_balance per ticket
+        self.ledger = BalanceLedger(self._fetch_balance)
+        
+        # Purchases are signed once and rebroadcast until they land or expire
+        self.submitter = TransactionSubmitter()
+        
+        # Optional SigningPool that signs bulk orders off the event loop
+        self.signing_pool = signing_pool
+        
+        # Optional TicketLog recording each ticket's lifecycle
+        self.ticket_log = ticket_log
+        
+        # Optional VerificationCache answering repeat scans from memory
+        self.verification_cache = verification_cache
+        
+    async def _fetch_balance(self, pubkey: Pubkey) -> int:
+        """Fetch a wallet's balance from the chain"""
+        # Confirmed, the level debits are settled at; a finalized read can still miss a settled debit
+        balance_response = await self.client.get_balance(pubkey, commitment=Confirmed)
+        return balance_response.value
         
     async def check_wallet_balance(self, pubkey: Pubkey):
         """Check if wallet has enough SOL"""
@@ -23,12 +58,15 @@ class TicketSystem:
             print(f"Error checking balance: {e}")
             return 0
             
-    async def create_ticket(self, owner: Keypair, price: int):
-        """Create a new ticket"""
+    async def create_ticket(self, owner: Keypair, price: int,
+                            on_signed: Optional[Callable[[Pubkey, bytes, int], None]] = None):
+        """Create a new ticket; on_signed(ticket, wire, last_valid_block_height) runs before the send"""
+        cost = price + LAMPORTS_PER_SIGNATURE
+        reserved = False
         try:
-            # Check wallet balance first
-            balance = await self.check_wallet_balance(owner.pubkey())
-            if balance == 0:
+            # Check wallet balance first (tracked locally after the first load)
+            balance = await self.ledger.get_available(owner.pubkey())
+            if balance <= 0:
                 return {
                     "success": False,
                     "error": "Wallet has 0 SOL. Please airdrop some SOL first."
@@ -36,13 +74,17 @@ class TicketSystem:
             
             # Make sure wallet has enough SOL
             # Only need price + minimal fee (0.0001 SOL for fees)
-            min_required = price + 100_000  # price + 0.0001 SOL for fees
+            min_required = price + FEE_RESERVE  # price + 0.0001 SOL for fees
             if balance < min_required:
                 return {
                     "success": False,
                     "error": f"Insufficient balance. Wallet has {balance/1_000_000_000} SOL, needs at least {min_required/1_000_000_000} SOL"
                 }
             
+            # Debit locally before sending so concurrent purchases see it
+            self.ledger.reserve(owner.pubkey(), cost)
+            reserved = True
+            
             # Create ticket account
             ticket_account = Keypair()
             
@@ -62,19 +104,33 @@ class TicketSystem:
             recent_blockhash = await self.client.get_latest_blockhash()
             transaction.recent_blockhash = recent_blockhash.value.blockhash
             
-            # Send transaction
-            result = await self.client.send_transaction(
-                transaction,
-                owner
-            )
+            # Sign first so the caller can persist the exact bytes before they can land
+            transaction.sign(owner)
+            wire = transaction.serialize()
+            if on_signed is not None:
+                on_signed(ticket_account.pubkey(), wire, recent_blockhash.value.last_valid_block_height)
             
-            # Wait for confirmation
-            await self.client.confirm_transaction(result.value)
+            # Send until confirmed or the blockhash expires
+            outcome = await self.submitter.submit_raw(
+                self.client, wire, recent_blockhash.value.last_valid_block_height
+            )
+            if not outcome["success"]:
+                reserved = False
+                await self.ledger.recover(owner.pubkey(), cost)
+                return {
+                    "success": False,
+                    "status": outcome["status"],
+                    "transaction_id": outcome["signature"],
+                    "error": f"Failed to create ticket: {outcome['error']}"
+                }
+            self.ledger.settle(owner.pubkey(), cost)
+            if self.ticket_log is not None:
+                self.ticket_log.record(MINTED, ticket_account.pubkey(), owner.pubkey(), price=price)
             
             return {
                 "success": True,
                 "ticket_pubkey": ticket_account.pubkey(),
-                "transaction_id": result.value,
+                "transaction_id": outcome["signature"],
                 "ticket_data": {
                     "owner": str(owner.pubkey()),
                     "price": price,
@@ -83,33 +139,165 @@ class TicketSystem:
             }
             
         except Exception as e:
+            if reserved:
+                # Outcome unknown: undo the local debit and re-read the chain
+                await self.ledger.recover(owner.pubkey(), cost)
             return {
                 "success": False,
                 "error": f"Failed to create ticket: {str(e)}"
             }
     
+    async def create_tickets(self, owner: Keypair, prices: List[int]) -> List[dict]:
+        """Create many tickets, packing their transfers into as few transactions as possible"""
+        if not prices:
+            return []
+        
+        # Create one ticket account and transfer per price
+        ticket_accounts = [Keypair() for _ in prices]
+        transfer_ixs = [
+            transfer(
+                TransferParams(
+                    from_pubkey=owner.pubkey(),
+                    to_pubkey=ticket_account.pubkey(),
+                    lamports=price
+                )
+            )
+            for ticket_account, price in zip(ticket_accounts, prices)
+        ]
+        batches = pack_instructions(owner.pubkey(), transfer_ixs)
+        
+        def failed(error: str) -> List[dict]:
+            return [{"success": False, "error": error} for _ in prices]
+        
+        # Check balance once for the whole order
+        try:
+            balance = await self.ledger.get_available(owner.pubkey())
+        except Exception as e:
+            return failed(f"Failed to create ticket: {str(e)}")
+        if balance <= 0:
+            return failed("Wallet has 0 SOL. Please airdrop some SOL first.")
+        
+        min_required = sum(prices) + FEE_RESERVE * len(batches)
+        if balance < min_required:
+            return failed(f"Insufficient balance. Wallet has {balance/1_000_000_000} SOL, needs at least {min_required/1_000_000_000} SOL")
+        
+        # Debit every batch locally up front
+        costs = []
+        start = 0
+        for batch in batches:
+            costs.append(sum(prices[start:start + len(batch)]) + LAMPORTS_PER_SIGNATURE)
+            start += len(batch)
+        self.ledger.reserve(owner.pubkey(), sum(costs))
+        
+        try:
+            # One blockhash is valid long enough for every batch
+            recent_blockhash = await self.client.get_latest_blockhash()
+            blockhash = recent_blockhash.value.blockhash
+            last_valid_block_height = recent_blockhash.value.last_valid_block_height
+            
+            transactions = []
+            for batch in batches:
+                transaction = Transaction().add(*batch)
+                transaction.recent_blockhash = blockhash
+                transactions.append(transaction)
+            
+            if self.signing_pool is not None:
+                # Sign every batch in the pool instead of on the event loop
+                wires = await self.signing_pool.sign_many(
+                    [(transaction.compile_message(), [owner]) for transaction in transactions]
+                )
+            else:
+                wires = []
+                for transaction in transactions:
+                    transaction.sign(owner)
+                    wires.append(transaction.serialize())
+        except Exception as e:
+            await self.ledger.recover(owner.pubkey(), sum(costs))
+            return failed(f"Failed to create ticket: {str(e)}")
+        
+        # Send and confirm every batch concurrently
+        outcomes = await asyncio.gather(
+            *[self.submitter.submit_raw(self.client, wire, last_valid_block_height) for wire in wires],
+            return_exceptions=True
+        )
+        
+        # Settle confirmed batches; undo failed ones and reconcile once
+        failed_cost = 0
+        for cost, outcome in zip(costs, outcomes):
+            if isinstance(outcome, Exception) or not outcome["success"]:
+                failed_cost += cost
+            else:
+                self.ledger.settle(owner.pubkey(), cost)
+        if failed_cost:
+            await self.ledger.recover(owner.pubkey(), failed_cost)
+        
+        results = []
+        index = 0
+        for batch, outcome in zip(batches, outcomes):
+            for _ in batch:
+                if isinstance(outcome, Exception):
+                    results.append({
+                        "success": False,
+                        "error": f"Failed to create ticket: {str(outcome)}"
+                    })
+                elif not outcome["success"]:
+                    # Like create_ticket: the status says whether the batch may still land
+                    results.append({
+                        "success": False,
+                        "status": outcome["status"],
+                        "transaction_id": outcome["signature"],
+                        "error": f"Failed to create ticket: {outcome['error']}"
+                    })
+                else:
+                    if self.ticket_log is not None:
+                        self.ticket_log.record(
+                            MINTED, ticket_accounts[index].pubkey(), owner.pubkey(), price=prices[index]
+                        )
+                    results.append({
+                        "success": True,
+                        "ticket_pubkey": ticket_accounts[index].pubkey(),
+                        "transaction_id": outcome["signature"],
+                        "ticket_data": {
+                            "owner": str(owner.pubkey()),
+                            "price": prices[index],
+                            "is_used": False
+                        }
+                    })
+                index += 1
+        return results
+    
     async def verify_ticket(self, ticket_pubkey: Pubkey) -> dict:
         """Verify if a ticket is valid and unused"""
+        if self.verification_cache is not None:
+            return await self.verification_cache.get(ticket_pubkey, self._lookup_ticket)
+        return (await self._lookup_ticket(ticket_pubkey))[0]
+    
+    async def _lookup_ticket(self, ticket_pubkey: Pubkey):
+        """Verification result, and whether the ticket was found (None if the lookup failed)"""
         try:
             # Get account balance as verification
-            balance = await self.client.get_balance(ticket_pubkey)
+            if self.account_mirror is not None:
+                account = await self.account_mirror.get_account_info(ticket_pubkey)
+                balance = account.lamports if account is not None else 0
+            else:
+                balance = (await self.client.get_balance(ticket_pubkey)).value
             
-            if balance.value == 0:
-                return {"valid": False, "error": "Ticket not found or invalid"}
+            if balance == 0:
+                return {"valid": False, "error": "Ticket not found or invalid"}, False
             
             return {
                 "valid": True,
-                "balance": balance.value
-            }
+                "balance": balance
+            }, True
             
         except Exception as e:
-            return {"valid": False, "error": str(e)}
+            return {"valid": False, "error": str(e)}, None
     
     async def use_ticket(self, ticket_pubkey: Pubkey, user: Keypair) -> dict:
         """Mark a ticket as used by transferring SOL back"""
         try:
-            # Verify ticket first
-            verify_result = await self.verify_ticket(ticket_pubkey)
+            # Verify ticket first (uncached: the transfer needs the current balance)
+            verify_result, _ = await self._lookup_ticket(ticket_pubkey)
             if not verify_result["valid"]:
                 return {"success": False, "error": "Invalid ticket"}
             
@@ -137,6 +325,11 @@ class TicketSystem:
             
             # Wait for confirmation
             await self.client.confirm_transaction(result.value)
+            self.ledger.credit(user.pubkey(), verify_result["balance"] - LAMPORTS_PER_SIGNATURE)
+            if self.ticket_log is not None:
+                self.ticket_log.record(USED, ticket_pubkey)
+            if self.verification_cache is not None:
+                self.verification_cache.mark_used(ticket_pubkey)
             
             return {"success": True, "transaction_id": result.value}
             
@@ -0,0 +1,75 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+
+class TopicMatcher:
+    def __init__(self, topics: Iterable[str], synonyms: Optional[Dict[str, str]] = None):
+        """Compile topic vocabulary (plus synonyms) into a single-pass matcher"""
+        # Map every normalized term to the topic it reports
+        self.terms: Dict[str, str] = {}
+        for topic in topics:
+            term = self._normalize(topic)
+            if term:
+                self.terms[term] = term
+        for synonym, topic in (synonyms or {}).items():
+            term = self._normalize(synonym)
+            if term:
+                self.terms[term] = self._normalize(topic)
+
+        # One regex built from a trie of all terms, so each position in the
+        # input is checked against shared prefixes instead of every topic.
+        # Plurals ("tickets", "transactions") are accepted; word boundaries
+        # stop "unsolanaish" from matching "solana".
+        if self.terms:
+            self.pattern = re.compile(
+                r"\b(" + self._build_trie_regex(self.terms) + r")(?:e?s)?\b",
+                re.IGNORECASE
+            )
+        else:
+            self.pattern = None
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _build_trie_regex(terms: Iterable[str]) -> str:
+        """Build a prefix-factored alternation regex for the given terms"""
+        trie: dict = {}
+        for term in terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def to_regex(node: dict) -> str:
+            end = "" in node
+            branches = []
+            # Longer continuations first so the regex prefers the longest term
+            for char in sorted(k for k in node if k):
+                piece = r"\s+" if char == " " else re.escape(char)
+                branches.append(piece + to_regex(node[char]))
+            if not branches:
+                return ""
+            if len(branches) == 1 and not end:
+                return branches[0]
+            group = "(?:" + "|".join(branches) + ")"
+            return group + "?" if end else group
+
+        return to_regex(trie)
+
+    def find_topics(self, text: str) -> List[str]:
+        """Return the distinct topics mentioned in text, in order of first appearance"""
+        if self.pattern is None:
+            return []
+        found: Dict[str, None] = {}
+        for match in self.pattern.finditer(text):
+            topic = self.terms.get(self._normalize(match.group(1)))
+            if topic is not None:
+                found.setdefault(topic)
+        return list(found)
+
+    def matches(self, text: str) -> bool:
+        """Check if text mentions any topic (stops at the first hit)"""
+        return self.pattern is not None and self.pattern.search(text) is not None
@@ -0,0 +1,165 @@
+import os
+import struct
+from collections import OrderedDict
+from typing import Optional
+from solders.signature import Signature
+from solders.transaction import Legacy, VersionedTransaction
+from solders.transaction_status import (
+    EncodedConfirmedTransactionWithStatusMeta,
+    EncodedTransactionWithStatusMeta,
+    UiTransactionStatusMeta
+)
+from solana.rpc.commitment import Finalized
+
+# slot, has block time, block time, version (-2 none, -1 legacy), wire transaction length
+RECORD_HEADER = struct.Struct("<Q?qbI")
+
+
+def encode_transaction(tx: EncodedConfirmedTransactionWithStatusMeta) -> bytes:
+    """Pack a base64-encoded transaction response as header + wire bytes + status meta"""
+    wire = bytes(tx.transaction.transaction)
+    version = tx.transaction.version
+    if version is None:
+        version_code = -2
+    elif version == Legacy.Legacy:
+        version_code = -1
+    else:
+        version_code = version
+    meta = tx.transaction.meta.to_json().encode() if tx.transaction.meta is not None else b""
+    header = RECORD_HEADER.pack(
+        tx.slot,
+        tx.block_time is not None,
+        tx.block_time or 0,
+        version_code,
+        len(wire)
+    )
+    return header + wire + meta
+
+
+def decode_transaction(data: bytes) -> EncodedConfirmedTransactionWithStatusMeta:
+    """Rebuild a transaction response packed with encode_transaction"""
+    slot, has_block_time, block_time, version_code, wire_length = RECORD_HEADER.unpack_from(data)
+    offset = RECORD_HEADER.size
+    wire = data[offset:offset + wire_length]
+    meta = data[offset + wire_length:]
+    if version_code == -2:
+        version = None
+    elif version_code == -1:
+        version = Legacy.Legacy
+    else:
+        version = version_code
+    return EncodedConfirmedTransactionWithStatusMeta(
+        slot=slot,
+        transaction=EncodedTransactionWithStatusMeta(
+            transaction=VersionedTransaction.from_bytes(wire),
+            meta=UiTransactionStatusMeta.from_json(meta.decode()) if meta else None,
+            version=version
+        ),
+        block_time=block_time if has_block_time else None
+    )
+
+
+class TransactionCache:
+    def __init__(self, directory: str = "transaction_cache", max_bytes: int = 64 * 1024 * 1024):
+        """On-disk cache of finalized transactions keyed by signature, evicting least recently used"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        # Signature -> record size, oldest use first; rebuilt from file mtimes on startup
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self._load_index()
+
+    def _path(self, signature: str) -> str:
+        """File holding one transaction, sharded by signature prefix"""
+        return os.path.join(self.directory, signature[:2], f"{signature}.bin")
+
+    def _load_index(self):
+        """Scan existing records so the size bound and LRU order survive restarts"""
+        if not os.path.isdir(self.directory):
+            return
+        records = []
+        for shard in os.listdir(self.directory):
+            shard_path = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                if not name.endswith(".bin"):
+                    continue
+                stat = os.stat(os.path.join(shard_path, name))
+                records.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, signature, size in sorted(records):
+            self._index[signature] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used records until under max_bytes"""
+        while self.total_bytes > self.max_bytes and self._index:
+            signature, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(signature))
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, signature) -> bool:
+        return str(signature) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, signature) -> Optional[EncodedConfirmedTransactionWithStatusMeta]:
+        """Get a cached transaction, or None on a miss"""
+        signature = str(signature)
+        if signature not in self._index:
+            self.stats["misses"] += 1
+            return None
+        path = self._path(signature)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Removed behind our back; forget it
+            self.total_bytes -= self._index.pop(signature)
+            self.stats["misses"] += 1
+            return None
+        self._index.move_to_end(signature)
+        os.utime(path)
+        self.stats["hits"] += 1
+        return decode_transaction(data)
+
+    def put(self, signature, tx: EncodedConfirmedTransactionWithStatusMeta):
+        """Store a finalized transaction (it can never change, so it is never refreshed)"""
+        signature = str(signature)
+        if signature in self._index:
+            return
+        data = encode_transaction(tx)
+        path = self._path(signature)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._index[signature] = len(data)
+        self.total_bytes += len(data)
+        self._evict()
+
+    async def get_transaction(self, client, signature: Signature) -> Optional[EncodedConfirmedTransactionWithStatusMeta]:
+        """Read-through lookup: serve from disk, else fetch the finalized transaction and cache it"""
+        cached = self.get(signature)
+        if cached is not None:
+            return cached
+
+        # Only finalized transactions are safe to keep forever
+        resp = await client.get_transaction(
+            signature,
+            encoding="base64",
+            commitment=Finalized,
+            max_supported_transaction_version=0
+        )
+        if resp.value is not None:
+            self.put(signature, resp.value)
+        return resp.value
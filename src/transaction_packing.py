@@ -0,0 +1,31 @@
+from typing import List
+from solders.instruction import Instruction
+from solders.message import Message
+from solders.pubkey import Pubkey
+
+# Largest serialized transaction the network accepts (bytes)
+MAX_TRANSACTION_SIZE = 1232
+
+
+def transaction_size(payer: Pubkey, instructions: List[Instruction]) -> int:
+    """Serialized size of a transaction, counting one signature per required signer"""
+    message = Message(instructions, payer)
+    # compact signature count (1 byte) + 64 bytes per signature + message
+    return 1 + 64 * message.header.num_required_signatures + len(bytes(message))
+
+
+def pack_instructions(payer: Pubkey, instructions: List[Instruction],
+                      max_size: int = MAX_TRANSACTION_SIZE) -> List[List[Instruction]]:
+    """Split instructions into as few transactions as fit the size limit"""
+    batches = []
+    current = []
+    for ix in instructions:
+        candidate = current + [ix]
+        if current and transaction_size(payer, candidate) > max_size:
+            batches.append(current)
+            current = [ix]
+        else:
+            current = candidate
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,124 @@
+import asyncio
+from collections import OrderedDict
+from solders.signature import Signature
+from solders.transaction import Transaction as SoldersTransaction
+from solders.transaction_status import TransactionConfirmationStatus
+from solana.rpc.core import RPCException
+from solana.rpc.types import TxOpts
+from solana.transaction import Transaction
+from src.single_flight import SingleFlight
+
+# Statuses that count as landed
+LANDED = (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)
+
+
+class TransactionSubmitter:
+    def __init__(self, rebroadcast_interval: float = 2.0, poll_interval: float = 0.5,
+                 max_outcomes: int = 10_000, max_failed_polls: int = 20):
+        """Sign once, rebroadcast the same bytes until confirmed or expired, report one outcome"""
+        self.rebroadcast_interval = rebroadcast_interval
+        self.poll_interval = poll_interval
+        self.max_outcomes = max_outcomes
+        
+        # Give up (status "unknown") after this many status checks in a row fail
+        self.max_failed_polls = max_failed_polls
+
+        # Concurrent submissions of the same signature share one broadcast loop
+        self.single_flight = SingleFlight()
+
+        # Signature -> final outcome, so repeated submissions never send again
+        self._outcomes: "OrderedDict[str, dict]" = OrderedDict()
+        self.stats = {"submitted": 0, "rebroadcasts": 0, "deduplicated": 0,
+                      "confirmed": 0, "failed": 0, "expired": 0, "unknown": 0}
+
+    async def submit(self, client, transaction: Transaction, *signers, last_valid_block_height: int) -> dict:
+        """Sign a transaction (its blockhash must be set) and submit it through client"""
+        transaction.sign(*signers)
+        return await self.submit_raw(client, transaction.serialize(), last_valid_block_height)
+
+    async def submit_raw(self, client, wire: bytes, last_valid_block_height: int) -> dict:
+        """Submit signed wire bytes; the signature is the idempotency key"""
+        signature = SoldersTransaction.from_bytes(wire).signatures[0]
+        key = str(signature)
+        if key in self._outcomes:
+            self.stats["deduplicated"] += 1
+            return self._outcomes[key]
+        return await self.single_flight.do(key, lambda: self._land(client, wire, signature, last_valid_block_height))
+
+    def get_outcome(self, signature) -> dict:
+        """Final outcome of an earlier submission, if known"""
+        return self._outcomes.get(str(signature))
+
+    def _finish(self, signature: Signature, status: str, error: str = None) -> dict:
+        """Record a definitive outcome"""
+        outcome = {"success": status == "confirmed", "status": status, "signature": signature}
+        if error is not None:
+            outcome["error"] = error
+        self.stats[status] += 1
+        self._outcomes[str(signature)] = outcome
+        while len(self._outcomes) > self.max_outcomes:
+            self._outcomes.popitem(last=False)
+        return outcome
+
+    def _unknown(self, signature: Signature, error: str) -> dict:
+        """Give up without a definitive outcome; it isn't remembered, so a resubmit checks again"""
+        self.stats["unknown"] += 1
+        return {"success": False, "status": "unknown", "signature": signature, "error": error}
+
+    async def _status(self, client, signature: Signature, search_history: bool = False):
+        """Current status of a signature, or None if the node hasn't seen it"""
+        resp = await client.get_signature_statuses([signature], search_transaction_history=search_history)
+        return resp.value[0]
+
+    async def _land(self, client, wire: bytes, signature: Signature, last_valid_block_height: int) -> dict:
+        """Broadcast until the transaction lands, fails, or its blockhash expires"""
+        loop = asyncio.get_running_loop()
+        self.stats["submitted"] += 1
+        first = True
+        last_sent = None
+        failed_polls = 0
+        while True:
+            if last_sent is None or loop.time() - last_sent >= self.rebroadcast_interval:
+                try:
+                    # Preflight only the first send; rebroadcasts go straight to the leader
+                    await client.send_raw_transaction(
+                        wire, opts=TxOpts(skip_preflight=not first, max_retries=0)
+                    )
+                except RPCException as e:
+                    if first:
+                        # Rejected in simulation, unless it was rejected for having landed already
+                        try:
+                            missing = await self._status(client, signature, search_history=True) is None
+                        except Exception:
+                            # Can't tell yet; the polling below decides
+                            missing = False
+                        if missing:
+                            return self._finish(signature, "failed", str(e))
+                except Exception:
+                    # Timeouts and dropped connections: the status check decides
+                    pass
+                if not first:
+                    self.stats["rebroadcasts"] += 1
+                first = False
+                last_sent = loop.time()
+
+            try:
+                status = await self._status(client, signature)
+                if status is not None and status.confirmation_status in LANDED:
+                    if status.err is not None:
+                        return self._finish(signature, "failed", str(status.err))
+                    return self._finish(signature, "confirmed")
+
+                block_height = (await client.get_block_height()).value
+                if block_height > last_valid_block_height:
+                    # The blockhash is dead; unless it already landed it never will
+                    status = await self._status(client, signature, search_history=True)
+                    if status is None:
+                        return self._finish(signature, "expired", "Blockhash expired before the transaction landed")
+                failed_polls = 0
+            except Exception as e:
+                failed_polls += 1
+                if failed_polls >= self.max_failed_polls:
+                    return self._unknown(signature, f"Status checks kept failing: {e}")
+
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,75 @@
+from typing import Dict, List
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+
+
+def _compact_u16(value: int) -> bytes:
+    """Solana's short-vec length prefix"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+class TransactionTemplate:
+    def __init__(self, instructions: List[Instruction], payer: Pubkey, fields: Dict[str, Pubkey]):
+        """Compile a message once; later builds patch 32-byte fields and the blockhash in place"""
+        # fields maps a name to the placeholder pubkey used for it in the instructions;
+        # every occurrence (account keys and instruction data) is patched
+        message = Message.new_with_blockhash(instructions, payer, Hash.default())
+        self._message = bytes(message)
+        self.num_signers = message.header.num_required_signatures
+
+        # The blockhash follows the header and the account key list
+        num_keys = len(message.account_keys)
+        self._blockhash_offset = 3 + len(_compact_u16(num_keys)) + 32 * num_keys
+
+        # Byte offsets of every field, found once
+        self._offsets: Dict[str, List[int]] = {}
+        for name, placeholder in fields.items():
+            raw = bytes(placeholder)
+            offsets = []
+            start = self._message.find(raw)
+            while start != -1:
+                offsets.append(start)
+                start = self._message.find(raw, start + 32)
+            if not offsets:
+                raise ValueError(f"Field {name} does not appear in the message")
+            self._offsets[name] = offsets
+
+        # Each signer slot is either a fixed key or a field
+        by_placeholder = {placeholder: name for name, placeholder in fields.items()}
+        self._signer_slots = [
+            by_placeholder.get(pubkey, pubkey)
+            for pubkey in message.account_keys[:self.num_signers]
+        ]
+        self._signature_prefix = _compact_u16(self.num_signers)
+        self._buffer = bytearray(self._message)
+
+    def message_bytes(self, blockhash: Hash, **values: Pubkey) -> bytes:
+        """Serialized message with the blockhash and every field filled in"""
+        buffer = self._buffer
+        for name, offsets in self._offsets.items():
+            raw = bytes(values[name])
+            for offset in offsets:
+                buffer[offset:offset + 32] = raw
+        buffer[self._blockhash_offset:self._blockhash_offset + 32] = bytes(blockhash)
+        return bytes(buffer)
+
+    def sign(self, blockhash: Hash, signers: Dict[str, Keypair], **values: Pubkey) -> bytes:
+        """Build and sign a transaction; signers are keyed by field name (or fixed pubkey string)"""
+        # Keyed by name because Keypair.pubkey() re-derives the key on every call
+        message = self.message_bytes(blockhash, **values)
+        signatures = b"".join(
+            bytes(signers[slot if isinstance(slot, str) else str(slot)].sign_message(message))
+            for slot in self._signer_slots
+        )
+        return self._signature_prefix + signatures + message
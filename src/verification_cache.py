@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from src.single_flight import SingleFlight
+
+# What a scan of a used ticket returns
+USED_RESULT = {"valid": False, "error": "Ticket already used"}
+
+
+class VerificationCache:
+    def __init__(self, valid_ttl: float = 2.0, negative_ttl: float = 30.0,
+                 max_entries: int = 100_000, max_used: int = 1_000_000):
+        """Bounded read-through cache of ticket verifications"""
+        # Valid results go stale quickly (the ticket may be used elsewhere);
+        # missing accounts stay invalid much longer
+        self.valid_ttl = valid_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        # Key -> (expires_at, result), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+        # Locally used tickets, oldest first. They never expire: a burned ticket's mint
+        # still exists, so a fresh lookup would call it valid again. Kept apart from the
+        # LRU so a flood of bogus pubkeys can't evict them, and bounded on their own
+        self.max_used = max_used
+        self._used: "OrderedDict[str, None]" = OrderedDict()
+
+        # Concurrent scans of the same ticket share one lookup
+        self.single_flight = SingleFlight()
+
+        # Key -> generation while its lookup is in flight; invalidating the key bumps
+        # it so that lookup doesn't store a stale result
+        self._generations: Dict[str, int] = {}
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "invalidations": 0, "evictions": 0,
+                      "used_evictions": 0}
+
+    def _get(self, key: str) -> Optional[dict]:
+        """Unexpired cached result, if any"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put(self, key: str, result: dict, ttl: float):
+        """Store a result, evicting the least recently used past max_entries"""
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, pubkey, fetch: Callable[[object], Awaitable[Tuple[dict, Optional[bool]]]]) -> dict:
+        """Cached verification of pubkey, or fetch(pubkey) -> (result, found) on a miss"""
+        key = str(pubkey)
+        if key in self._used:
+            self.stats["negative_hits"] += 1
+            return dict(USED_RESULT)
+        result = self._get(key)
+        if result is not None:
+            self.stats["hits" if result["valid"] else "negative_hits"] += 1
+            return result
+        self.stats["misses"] += 1
+        return await self.single_flight.do(key, lambda: self._load(key, pubkey, fetch))
+
+    async def _load(self, key: str, pubkey, fetch) -> dict:
+        """Fetch and cache by outcome: found, missing, or errored (found is None, not cached)"""
+        # Single flight runs one load per key at a time
+        self._generations[key] = 0
+        try:
+            result, found = await fetch(pubkey)
+        finally:
+            invalidated = self._generations.pop(key)
+        if not invalidated and found is not None and key not in self._used:
+            self._put(key, result, self.valid_ttl if found else self.negative_ttl)
+        return result
+
+    def invalidate(self, pubkey):
+        """Drop any cached result for pubkey"""
+        key = str(pubkey)
+        self._entries.pop(key, None)
+        if key in self._generations:
+            self._generations[key] += 1
+        self.stats["invalidations"] += 1
+
+    def mark_used(self, pubkey):
+        """A ticket was used here: scans reject it without another lookup"""
+        key = str(pubkey)
+        self.invalidate(key)
+        self._used[key] = None
+        while len(self._used) > self.max_used:
+            self._used.popitem(last=False)
+            self.stats["used_evictions"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and size"""
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        hits = self.stats["hits"] + self.stats["negative_hits"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self),
+            "used": len(self._used),
+            "coalesced": self.single_flight.stats["saved"]
+        }
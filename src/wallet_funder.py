@@ -0,0 +1,155 @@
+import asyncio
+import random
+from typing import Dict, List, Mapping, Optional
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.system_program import TransferParams, transfer
+from solana.rpc.commitment import Confirmed
+from solana.transaction import Transaction
+from src.balance_ledger import LAMPORTS_PER_SIGNATURE
+from src.transaction_packing import pack_instructions
+from src.transaction_submitter import TransactionSubmitter
+
+# Accounts per getMultipleAccounts request
+ACCOUNTS_PER_REQUEST = 100
+
+# Largest amount requested per airdrop; devnet refuses bigger requests (lamports)
+MAX_AIRDROP = 1_000_000_000
+
+
+class WalletFunder:
+    def __init__(self, client, treasury: Optional[Keypair] = None, submitter: Optional[TransactionSubmitter] = None,
+                 max_concurrent_airdrops: int = 4, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        """Bring many wallets up to target balances, from a treasury or the faucet"""
+        self.client = client
+        self.treasury = treasury
+        self.submitter = submitter or TransactionSubmitter()
+
+        # The faucet rate-limits hard, so airdrops run a few at a time
+        self._airdrop_slots = asyncio.Semaphore(max_concurrent_airdrops)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"transactions": 0, "transfers": 0, "airdrops": 0, "airdrop_retries": 0}
+
+    async def get_balances(self, pubkeys: List[Pubkey]) -> Dict[Pubkey, int]:
+        """Current balances, read 100 accounts per request"""
+        chunks = [pubkeys[i:i + ACCOUNTS_PER_REQUEST] for i in range(0, len(pubkeys), ACCOUNTS_PER_REQUEST)]
+        # Confirmed, like the transfers: a finalized read lags them and would top wallets up twice
+        responses = await asyncio.gather(*[
+            self.client.get_multiple_accounts(chunk, commitment=Confirmed) for chunk in chunks
+        ])
+        balances = {}
+        for chunk, response in zip(chunks, responses):
+            for pubkey, account in zip(chunk, response.value):
+                balances[pubkey] = account.lamports if account is not None else 0
+        return balances
+
+    async def fund(self, targets: Mapping[Pubkey, int]) -> dict:
+        """Top every wallet up to its target (lamports); returns a per-wallet report"""
+        pubkeys = list(targets)
+        balances = await self.get_balances(pubkeys)
+        deficits = {
+            pubkey: targets[pubkey] - balances[pubkey]
+            for pubkey in pubkeys
+            if balances[pubkey] < targets[pubkey]
+        }
+
+        if not deficits:
+            errors = {}
+        elif self.treasury is not None:
+            errors = await self._fan_out(deficits)
+        else:
+            errors = await self._airdrop_all(deficits)
+
+        # Report what actually landed
+        final = await self.get_balances(pubkeys) if deficits else balances
+        wallets = {}
+        for pubkey in pubkeys:
+            wallets[str(pubkey)] = {
+                "target": targets[pubkey],
+                "balance": final[pubkey],
+                "funded": final[pubkey] >= targets[pubkey]
+            }
+            if pubkey in errors and not wallets[str(pubkey)]["funded"]:
+                wallets[str(pubkey)]["error"] = errors[pubkey]
+        return {
+            "success": all(wallet["funded"] for wallet in wallets.values()),
+            "funded": sum(wallet["funded"] for wallet in wallets.values()),
+            "total": len(wallets),
+            "wallets": wallets
+        }
+
+    async def _fan_out(self, deficits: Dict[Pubkey, int]) -> Dict[Pubkey, str]:
+        """Send every deficit from the treasury, packed into as few transactions as fit"""
+        payer = self.treasury.pubkey()
+        recipients = list(deficits)
+        transfer_ixs = [
+            transfer(TransferParams(from_pubkey=payer, to_pubkey=pubkey, lamports=deficits[pubkey]))
+            for pubkey in recipients
+        ]
+        batches = pack_instructions(payer, transfer_ixs)
+
+        # Check the treasury covers the transfers and fees
+        needed = sum(deficits.values()) + LAMPORTS_PER_SIGNATURE * len(batches)
+        balance = (await self.client.get_balance(payer)).value
+        if balance < needed:
+            error = f"Treasury has {balance / 1_000_000_000} SOL, needs {needed / 1_000_000_000} SOL"
+            return {pubkey: error for pubkey in recipients}
+
+        # One blockhash covers every batch
+        recent_blockhash = await self.client.get_latest_blockhash()
+        wires = []
+        for batch in batches:
+            transaction = Transaction(fee_payer=payer).add(*batch)
+            transaction.recent_blockhash = recent_blockhash.value.blockhash
+            transaction.sign(self.treasury)
+            wires.append(transaction.serialize())
+        outcomes = await asyncio.gather(*[
+            self.submitter.submit_raw(self.client, wire, recent_blockhash.value.last_valid_block_height)
+            for wire in wires
+        ])
+        self.stats["transactions"] += len(wires)
+
+        errors = {}
+        start = 0
+        for batch, outcome in zip(batches, outcomes):
+            batch_recipients = recipients[start:start + len(batch)]
+            start += len(batch)
+            if outcome["success"]:
+                self.stats["transfers"] += len(batch)
+            else:
+                for pubkey in batch_recipients:
+                    errors[pubkey] = outcome["error"]
+        return errors
+
+    async def _airdrop_all(self, deficits: Dict[Pubkey, int]) -> Dict[Pubkey, str]:
+        """Airdrop every deficit concurrently"""
+        results = await asyncio.gather(*[
+            self._airdrop(pubkey, amount) for pubkey, amount in deficits.items()
+        ])
+        return {pubkey: error for pubkey, error in zip(deficits, results) if error is not None}
+
+    async def _airdrop(self, pubkey: Pubkey, amount: int) -> Optional[str]:
+        """Airdrop amount in faucet-sized pieces; returns the last error if it couldn't"""
+        remaining = amount
+        attempt = 0
+        while remaining > 0:
+            request = min(remaining, MAX_AIRDROP)
+            try:
+                async with self._airdrop_slots:
+                    result = await self.client.request_airdrop(pubkey, request)
+                    await self.client.confirm_transaction(result.value)
+                remaining -= request
+                attempt = 0
+                self.stats["airdrops"] += 1
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    return f"Airdrop failed: {str(e)}"
+                # Full jitter keeps concurrent wallets from retrying in lockstep
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                self.stats["airdrop_retries"] += 1
+                await asyncio.sleep(delay)
+        return None
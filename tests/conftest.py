@@ -0,0 +1,237 @@
+import json
+import pytest
+from collections import Counter
+from types import SimpleNamespace
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import (
+    ID as SYSTEM_PROGRAM_ID, TransferParams, decode_create_account, decode_create_account_with_seed,
+    decode_transfer, transfer
+)
+from solders.transaction import Legacy, Transaction as SoldersTransaction, VersionedTransaction
+from solders.transaction_status import (
+    EncodedConfirmedTransactionWithStatusMeta, EncodedTransactionWithStatusMeta, UiTransactionStatusMeta
+)
+from solders.transaction_status import TransactionConfirmationStatus
+from solana.rpc.core import RPCException
+from solana.transaction import Transaction
+
+LAMPORTS_PER_SIGNATURE = 5_000
+
+
+class FakeRpcClient:
+    def __init__(self):
+        """In-memory stand-in for AsyncClient covering the calls the ticket code makes"""
+        self.balances = {}
+        self.accounts = {}
+        self.sent = []
+        self.calls = Counter()
+        self.block_height = 100
+        self.blockhash = Hash.new_unique()
+        self.fail_sends = 0
+        self.drop_sends = 0       # sends silently lost before reaching a leader
+        self.lose_responses = 0   # sends that land but whose response times out
+        self.statuses = {}
+        self.signatures = {}
+        self.transactions = {}
+        self.slot = 1000
+        self.fail_airdrops = 0
+        self.reject_accounts = set()  # transactions touching these fail simulation
+
+    def add_history(self, address: Pubkey, instruction: str = "Transfer") -> Signature:
+        """Record a finalized transaction touching address"""
+        self.slot += 1
+        payer = Keypair()
+        tx = SoldersTransaction(
+            [payer],
+            Message([transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=address, lamports=1))], payer.pubkey()),
+            self.blockhash
+        )
+        signature = tx.signatures[0]
+        meta = UiTransactionStatusMeta.from_json(json.dumps({
+            "err": None, "status": {"Ok": None}, "fee": LAMPORTS_PER_SIGNATURE,
+            "preBalances": [], "postBalances": [], "innerInstructions": [],
+            "logMessages": [f"Program log: Instruction: {instruction}"],
+            "preTokenBalances": [], "postTokenBalances": [], "rewards": [],
+            "loadedAddresses": {"writable": [], "readonly": []}
+        }))
+        self.signatures.setdefault(address, []).insert(0, SimpleNamespace(
+            signature=signature, slot=self.slot, block_time=1_700_000_000 + self.slot
+        ))
+        self.transactions[signature] = EncodedConfirmedTransactionWithStatusMeta(
+            slot=self.slot,
+            transaction=EncodedTransactionWithStatusMeta(
+                transaction=VersionedTransaction.from_legacy(tx),
+                meta=meta,
+                version=Legacy.Legacy
+            ),
+            block_time=1_700_000_000 + self.slot
+        )
+        return signature
+
+    def _decompile(self, message):
+        """Turn a compiled message back into instructions"""
+        keys = message.account_keys
+        instructions = []
+        for compiled in message.instructions:
+            accounts = [
+                AccountMeta(keys[i], message.is_signer(i), message.is_writable(i))
+                for i in compiled.accounts
+            ]
+            instructions.append(Instruction(keys[compiled.program_id_index], bytes(compiled.data), accounts))
+        return instructions
+
+    def _apply(self, tx: SoldersTransaction):
+        """Charge fees and apply system transfers; raise like the RPC on failure"""
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise RPCException("Transaction simulation failed")
+        if self.reject_accounts.intersection(tx.message.account_keys):
+            raise RPCException("Transaction simulation failed: custom program error: 0x1")
+        if tx.signatures[0] in self.statuses:
+            # Already processed: the cluster deduplicates by signature
+            return tx.signatures[0]
+        payer = tx.message.account_keys[0]
+        fee = LAMPORTS_PER_SIGNATURE * len(tx.signatures)
+        transfers = []
+        created = []
+        for ix in self._decompile(tx.message):
+            if ix.program_id != SYSTEM_PROGRAM_ID:
+                continue
+            kind = int.from_bytes(bytes(ix.data)[:4], "little")
+            if kind in (0, 3):
+                params = decode_create_account(ix) if kind == 0 else decode_create_account_with_seed(ix)
+                if params["to_pubkey"] in self.accounts:
+                    raise RPCException("Create Account: account already in use")
+                created.append(params)
+                transfers.append(params)
+            elif kind == 2:
+                transfers.append(decode_transfer(ix))
+        needed = {}
+        for params in transfers:
+            needed[params["from_pubkey"]] = needed.get(params["from_pubkey"], 0) + params["lamports"]
+        needed[payer] = needed.get(payer, 0) + fee
+        for pubkey, amount in needed.items():
+            if self.balances.get(pubkey, 0) < amount:
+                raise Exception("Attempt to debit an account but found no record of a prior credit.")
+        self.balances[payer] -= fee
+        for params in transfers:
+            self.balances[params["from_pubkey"]] -= params["lamports"]
+            self.balances[params["to_pubkey"]] = self.balances.get(params["to_pubkey"], 0) + params["lamports"]
+        for params in created:
+            self.accounts[params["to_pubkey"]] = SimpleNamespace(
+                lamports=params["lamports"],
+                owner=params["owner"],
+                data=bytes(params["space"])
+            )
+        self.sent.append(tx)
+        self.statuses[tx.signatures[0]] = SimpleNamespace(
+            err=None, confirmation_status=TransactionConfirmationStatus.Confirmed
+        )
+        return tx.signatures[0]
+
+    async def get_balance(self, pubkey: Pubkey, commitment=None):
+        self.calls["get_balance"] += 1
+        return SimpleNamespace(value=self.balances.get(pubkey, 0))
+
+    async def get_latest_blockhash(self, commitment=None):
+        self.calls["get_latest_blockhash"] += 1
+        return SimpleNamespace(value=SimpleNamespace(
+            blockhash=self.blockhash,
+            last_valid_block_height=self.block_height + 150
+        ))
+
+    async def get_minimum_balance_for_rent_exemption(self, size: int, commitment=None):
+        self.calls["get_minimum_balance_for_rent_exemption"] += 1
+        return SimpleNamespace(value=(size + 128) * 6_960)
+
+    async def get_account_info(self, pubkey: Pubkey, commitment=None, encoding="base64", data_slice=None):
+        self.calls["get_account_info"] += 1
+        return SimpleNamespace(value=self.accounts.get(pubkey))
+
+    def _account(self, pubkey: Pubkey):
+        """Created account, or a plain system account for a funded wallet"""
+        if pubkey in self.accounts:
+            return self.accounts[pubkey]
+        if self.balances.get(pubkey):
+            return SimpleNamespace(lamports=self.balances[pubkey], owner=SYSTEM_PROGRAM_ID, data=b"")
+        return None
+
+    async def get_multiple_accounts(self, pubkeys, commitment=None, encoding="base64", data_slice=None):
+        self.calls["get_multiple_accounts"] += 1
+        return SimpleNamespace(value=[self._account(pubkey) for pubkey in pubkeys])
+
+    async def request_airdrop(self, pubkey: Pubkey, lamports: int, commitment=None):
+        self.calls["request_airdrop"] += 1
+        if self.fail_airdrops:
+            self.fail_airdrops -= 1
+            raise Exception("429 Too Many Requests")
+        self.balances[pubkey] = self.balances.get(pubkey, 0) + lamports
+        signature = Signature.new_unique()
+        self.statuses[signature] = SimpleNamespace(
+            err=None, confirmation_status=TransactionConfirmationStatus.Confirmed
+        )
+        return SimpleNamespace(value=signature)
+
+    async def send_transaction(self, txn, *signers, opts=None, recent_blockhash=None):
+        self.calls["send_transaction"] += 1
+        if isinstance(txn, Transaction):
+            if txn.recent_blockhash is None:
+                txn.recent_blockhash = recent_blockhash or self.blockhash
+            txn.sign(*signers)
+            txn = txn.to_solders()
+        return SimpleNamespace(value=self._apply(txn))
+
+    async def send_raw_transaction(self, txn: bytes, opts=None):
+        self.calls["send_raw_transaction"] += 1
+        tx = SoldersTransaction.from_bytes(txn)
+        if tx.signatures[0] in self.statuses and not (opts is not None and opts.skip_preflight):
+            # Preflight rejects a transaction that already landed
+            raise RPCException("Transaction simulation failed: This transaction has already been processed")
+        if self.drop_sends:
+            self.drop_sends -= 1
+            return SimpleNamespace(value=tx.signatures[0])
+        signature = self._apply(tx)
+        if self.lose_responses:
+            self.lose_responses -= 1
+            raise TimeoutError("send_raw_transaction timed out")
+        return SimpleNamespace(value=signature)
+
+    async def get_signature_statuses(self, signatures, search_transaction_history=False):
+        self.calls["get_signature_statuses"] += 1
+        return SimpleNamespace(value=[self.statuses.get(signature) for signature in signatures])
+
+    async def get_block_height(self, commitment=None):
+        self.calls["get_block_height"] += 1
+        return SimpleNamespace(value=self.block_height)
+
+    async def confirm_transaction(self, tx_sig, commitment=None, sleep_seconds=0.5, last_valid_block_height=None):
+        self.calls["confirm_transaction"] += 1
+        return SimpleNamespace(value=[SimpleNamespace(err=None)])
+
+    async def get_signatures_for_address(self, account: Pubkey, before=None, until=None, limit=None, commitment=None):
+        self.calls["get_signatures_for_address"] += 1
+        infos = self.signatures.get(account, [])
+        signatures = [info.signature for info in infos]
+        start = signatures.index(before) + 1 if before is not None else 0
+        end = signatures.index(until) if until is not None else len(infos)
+        page = infos[start:end]
+        return SimpleNamespace(value=page[:limit] if limit else page)
+
+    async def get_transaction(self, tx_sig: Signature, encoding="json", commitment=None,
+                              max_supported_transaction_version=None):
+        self.calls["get_transaction"] += 1
+        return SimpleNamespace(value=self.transactions.get(tx_sig))
+
+    async def close(self):
+        self.calls["close"] += 1
+
+
+@pytest.fixture
+def fake_rpc():
+    """A fresh in-memory RPC client"""
+    return FakeRpcClient()
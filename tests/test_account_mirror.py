@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import json
+import pytest
+import pytest_asyncio
+import websockets
+from types import SimpleNamespace
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from src.account_mirror import AccountMirror
+from src.ticket_system import TicketSystem
+
+
+class FakeWebsocketNode:
+    """Local stand-in for the RPC websocket: acknowledges subscriptions and pushes notifications"""
+
+    def __init__(self):
+        self.connections = []
+        self.account_subscriptions = {}  # pubkey string -> (connection, subscription id)
+        self.program_subscriptions = {}
+        self.next_subscription = 1
+        self.release_acks = None  # when set to an Event, acknowledgements wait for it
+
+    async def handler(self, websocket, path=None):
+        self.connections.append(websocket)
+        async for raw in websocket:
+            request = json.loads(raw)
+            subscription = self.next_subscription
+            self.next_subscription += 1
+            target = request["params"][0]
+            if request["method"] == "accountSubscribe":
+                self.account_subscriptions[target] = (websocket, subscription)
+            elif request["method"] == "programSubscribe":
+                self.program_subscriptions[target] = (websocket, subscription)
+            if self.release_acks is not None:
+                await self.release_acks.wait()
+            await websocket.send(json.dumps({"jsonrpc": "2.0", "result": subscription, "id": request["id"]}))
+
+    @staticmethod
+    def _account_json(lamports: int, owner: Pubkey, data: bytes = b"") -> dict:
+        return {
+            "data": [base64.b64encode(data).decode(), "base64"],
+            "executable": False,
+            "lamports": lamports,
+            "owner": str(owner),
+            "rentEpoch": 0,
+            "space": len(data)
+        }
+
+    async def notify_account(self, pubkey: Pubkey, lamports: int, owner: Pubkey):
+        websocket, subscription = self.account_subscriptions[str(pubkey)]
+        await websocket.send(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "accountNotification",
+            "params": {
+                "result": {"context": {"slot": 1}, "value": self._account_json(lamports, owner)},
+                "subscription": subscription
+            }
+        }))
+
+    async def notify_program(self, program_id: Pubkey, pubkey: Pubkey, lamports: int):
+        websocket, subscription = self.program_subscriptions[str(program_id)]
+        await websocket.send(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "programNotification",
+            "params": {
+                "result": {
+                    "context": {"slot": 1},
+                    "value": {"pubkey": str(pubkey), "account": self._account_json(lamports, program_id)}
+                },
+                "subscription": subscription
+            }
+        }))
+
+
+async def wait_for(condition, timeout=2.0):
+    """Poll until condition() holds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def node():
+    """Websocket stand-in listening on a free local port"""
+    node = FakeWebsocketNode()
+    server = await websockets.serve(node.handler, "127.0.0.1", 0)
+    node.url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    node.server = server
+    yield node
+    server.close()
+    await server.wait_closed()
+
+
+def add_account(fake_rpc, lamports=1_000_000, owner=None):
+    pubkey = Keypair().pubkey()
+    fake_rpc.accounts[pubkey] = SimpleNamespace(lamports=lamports, owner=owner or Pubkey.default(), data=b"")
+    return pubkey
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_then_serve_from_memory(fake_rpc, node):
+    """Accounts are loaded in one call and later reads never touch the RPC"""
+    tickets = [add_account(fake_rpc) for _ in range(5)]
+    mirror = AccountMirror(fake_rpc, node.url)
+    await mirror.start(tickets)
+    await wait_for(lambda: len(mirror._live_accounts) == 5)
+    for _ in range(3):
+        for ticket in tickets:
+            assert (await mirror.get_account_info(ticket)).lamports == 1_000_000
+    assert fake_rpc.calls["get_multiple_accounts"] == 1
+    assert fake_rpc.calls["get_account_info"] == 0
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_notifications_update_the_mirror(fake_rpc, node):
+    """Account changes pushed over the websocket are reflected in verifications"""
+    ticket = add_account(fake_rpc)
+    mirror = AccountMirror(fake_rpc, node.url)
+    system = TicketSystem(account_mirror=mirror)
+    system.client = fake_rpc
+    await mirror.start([ticket])
+    await wait_for(lambda: ticket in mirror._live_accounts)
+    assert (await system.verify_ticket(ticket))["valid"]
+    
+    # The ticket's lamports are swept when it is used
+    await node.notify_account(ticket, 0, Pubkey.default())
+    await wait_for(lambda: mirror.stats["notifications"] == 1)
+    assert not (await system.verify_ticket(ticket))["valid"]
+    assert fake_rpc.calls["get_balance"] == 0
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_program_subscription_tracks_new_accounts(fake_rpc, node):
+    """Accounts created under a subscribed program appear without an RPC read"""
+    program_id = Keypair().pubkey()
+    mirror = AccountMirror(fake_rpc, node.url)
+    await mirror.start(program_ids=[program_id])
+    await wait_for(lambda: program_id in mirror._live_programs)
+    ticket = Keypair().pubkey()
+    await node.notify_program(program_id, ticket, 2_000_000)
+    await wait_for(lambda: mirror.stats["notifications"] == 1)
+    assert (await mirror.get_account_info(ticket)).lamports == 2_000_000
+    assert fake_rpc.calls["get_account_info"] == 0
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_stale_entries_fall_back_to_rpc(fake_rpc):
+    """Without a live subscription, entries older than max_staleness are re-read"""
+    ticket = add_account(fake_rpc)
+    mirror = AccountMirror(fake_rpc, "ws://127.0.0.1:9", max_staleness=0.3, connect_timeout=0.05)
+    await mirror.start([ticket])
+    assert (await mirror.get_account_info(ticket)) is not None
+    assert fake_rpc.calls["get_account_info"] == 0
+    
+    await asyncio.sleep(0.35)
+    del fake_rpc.accounts[ticket]
+    assert (await mirror.get_account_info(ticket)) is None
+    assert mirror.stats["fallbacks"] == 1
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_reconnect_resubscribes_and_reloads(fake_rpc, node):
+    """A dropped connection is re-established and missed changes reloaded"""
+    ticket = add_account(fake_rpc)
+    mirror = AccountMirror(fake_rpc, node.url, reconnect_delay=0.01)
+    await mirror.start([ticket])
+    await wait_for(lambda: ticket in mirror._live_accounts)
+    
+    fake_rpc.accounts[ticket] = SimpleNamespace(lamports=5, owner=Pubkey.default(), data=b"")
+    await node.connections[0].close()
+    await wait_for(lambda: mirror.stats["reconnects"] == 1 and ticket in mirror._live_accounts)
+    assert (await mirror.get_account_info(ticket)).lamports == 5
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_accounts_are_loaded_after_the_subscription_is_acknowledged(fake_rpc, node):
+    """A change made before the node confirms the subscription is not served stale"""
+    ticket = add_account(fake_rpc)
+    node.release_acks = asyncio.Event()
+    mirror = AccountMirror(fake_rpc, node.url)
+    starting = asyncio.ensure_future(mirror.start([ticket]))
+    await wait_for(lambda: str(ticket) in node.account_subscriptions)
+    
+    # Used (and swept) while the subscription is still unacknowledged: no notification follows
+    fake_rpc.accounts[ticket] = SimpleNamespace(lamports=0, owner=Pubkey.default(), data=b"")
+    node.release_acks.set()
+    await starting
+    assert ticket in mirror._live_accounts
+    assert (await mirror.get_account_info(ticket)) is None
+    assert fake_rpc.calls["get_account_info"] == 0
+    await mirror.close()
+
+@pytest.mark.asyncio
+async def test_mirror_keeps_only_the_most_recent_accounts(fake_rpc, node):
+    """Accounts a program subscription streams in are bounded by max_accounts"""
+    program_id = Keypair().pubkey()
+    mirror = AccountMirror(fake_rpc, node.url, max_accounts=2)
+    await mirror.start(program_ids=[program_id])
+    tickets = [Keypair().pubkey() for _ in range(3)]
+    for ticket in tickets:
+        await node.notify_program(program_id, ticket, 2_000_000)
+    await wait_for(lambda: mirror.stats["notifications"] == 3)
+    assert list(mirror._accounts) == tickets[1:]
+    assert mirror.stats["evictions"] == 1
+    await mirror.close()
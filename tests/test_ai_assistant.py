@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.ai_assistant import TicketingAIAssistant
+from src.model_router import ModelRouter
+
+def make_chunk(content):
+    """Build a fake streamed completion chunk"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+class FakeStream:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        
+    def __aiter__(self):
+        return self._iterate()
+        
+    async def _iterate(self):
+        for token in self.tokens:
+            yield make_chunk(token)
+
+def make_assistant(tokens):
+    """Create an assistant whose OpenAI client streams the given tokens"""
+    assistant = TicketingAIAssistant(api_key="test-key")
+    calls = []
+    
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return FakeStream(tokens)
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return assistant, calls
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_tokens():
+    """OpenAI tokens are forwarded one by one"""
+    assistant, calls = make_assistant(["Solana ", None, "is ", "fast."])
+    tokens = [token async for token in assistant.stream_response("Why is solana fast?")]
+    assert tokens == ["Solana ", "is ", "fast."]
+    assert calls[0]["stream"] is True
+
+@pytest.mark.asyncio
+async def test_stream_response_local_answer_single_chunk():
+    """Predefined answers are streamed without calling OpenAI"""
+    assistant, calls = make_assistant([])
+    tokens = [token async for token in assistant.stream_response("What is Solana?")]
+    assert tokens == [assistant.common_queries["what_is_solana"]["answer"]]
+    assert calls == []
+
+@pytest.mark.asyncio
+async def test_stream_response_reports_errors_in_stream():
+    """Upstream errors come back over the same channel"""
+    assistant, _ = make_assistant([])
+    
+    async def failing_create(**kwargs):
+        raise RuntimeError("upstream down")
+    
+    assistant.client.chat.completions.create = failing_create
+    tokens = [token async for token in assistant.stream_response("solana wallet help")]
+    assert len(tokens) == 1
+    assert "upstream down" in tokens[0]
+
+@pytest.mark.asyncio
+async def test_stream_response_hedges_slow_first_token():
+    """A stream whose first token is slow is hedged to the fallback model"""
+    assistant, calls = make_assistant([])
+    assistant.router = ModelRouter(primary_model="primary", fallback_model="fallback",
+                                   latency_budget=1.0, hedge_after=0.05)
+    
+    async def create(**kwargs):
+        calls.append(kwargs)
+        delay = 5 if kwargs["model"] == "primary" else 0
+        
+        async def iterate():
+            await asyncio.sleep(delay)
+            for token in [kwargs["model"], " answer"]:
+                yield make_chunk(token)
+        
+        return SimpleNamespace(__aiter__=iterate)
+    
+    assistant.client.chat.completions.create = create
+    tokens = [token async for token in assistant.stream_response("solana wallet help")]
+    assert tokens == ["fallback", " answer"]
+    assert [call["model"] for call in calls] == ["primary", "fallback"]
+    assert assistant.get_routing_stats()["hedge_wins"] == 1
+    # The cancelled primary gives its slot back once it unwinds
+    await asyncio.sleep(0.01)
+    assert assistant.governor.in_use == 0
+
+@pytest.mark.asyncio
+async def test_stream_response_falls_back_to_faq_past_budget():
+    """When no first token arrives within the budget the FAQ answer is streamed"""
+    assistant, _ = make_assistant([])
+    assistant.router = ModelRouter(primary_model="primary", latency_budget=0.05, hedge_after=0.01)
+    
+    async def create(**kwargs):
+        async def iterate():
+            await asyncio.sleep(5)
+            yield make_chunk("late")
+        
+        return SimpleNamespace(__aiter__=iterate)
+    
+    assistant.client.chat.completions.create = create
+    tokens = [token async for token in assistant.stream_response("solana wallet help")]
+    assert tokens == [assistant._get_faq_fallback("solana wallet help")]
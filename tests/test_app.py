@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src import app as app_module
+from src.rate_limit import ClientRateLimiter
+
+@pytest.fixture
+def client(monkeypatch):
+    """Flask test client with a fake streaming assistant"""
+    async def fake_stream(user_query, session_id=None):
+        for token in ["Hello", " from", " Solana"]:
+            yield token
+    
+    async def fake_response(user_query, session_id=None):
+        return "Hello from Solana"
+    
+    monkeypatch.setattr(app_module.ai_assistant, "stream_response", fake_stream)
+    monkeypatch.setattr(app_module.ai_assistant, "get_response", fake_response)
+    monkeypatch.setattr(app_module, "ask_rate_limiter", ClientRateLimiter(rate=1, burst=5))
+    monkeypatch.setattr(app_module, "ask_api_keys", frozenset({"partner", "k1"}))
+    return app_module.app.test_client()
+
+def parse_events(body: str):
+    """Parse server-sent events into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = None
+        data = None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+def test_ask_streams_tokens(client):
+    """Streaming mode returns one event per token and a done event"""
+    response = client.post("/ask", json={"query": "hi solana", "stream": True})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = parse_events(response.get_data(as_text=True))
+    assert events == [
+        (None, {"token": "Hello"}),
+        (None, {"token": " from"}),
+        (None, {"token": " Solana"}),
+        ("done", {}),
+    ]
+
+def test_ask_streams_on_accept_header(client):
+    """Accept: text/event-stream also selects streaming mode"""
+    response = client.post("/ask", json={"query": "hi"}, headers={"Accept": "text/event-stream"})
+    assert response.mimetype == "text/event-stream"
+
+def test_ask_json_mode_unchanged(client):
+    """Non-streaming requests still get a JSON reply"""
+    response = client.post("/ask", json={"query": "hi solana"})
+    assert response.get_json() == {"response": "Hello from Solana"}
+
+def test_ask_requires_query(client):
+    """Empty queries are rejected"""
+    response = client.post("/ask", json={"stream": True})
+    assert response.status_code == 400
+
+def test_requests_share_background_loop(client, monkeypatch):
+    """Every /ask request runs on the app's persistent loop"""
+    loops = []
+    
+    async def fake_response(user_query, session_id=None):
+        loops.append(asyncio.get_running_loop())
+        return "ok"
+    
+    monkeypatch.setattr(app_module.ai_assistant, "get_response", fake_response)
+    for _ in range(3):
+        client.post("/ask", json={"query": "solana"})
+    assert set(loops) == {app_module.background_loop.loop}
+
+def test_ask_rate_limited_per_client(client):
+    """A client over its burst gets 429 with Retry-After; others are unaffected"""
+    for _ in range(5):
+        assert client.post("/ask", json={"query": "solana"}).status_code == 200
+    
+    limited = client.post("/ask", json={"query": "solana"})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    
+    other = client.post("/ask", json={"query": "solana"}, headers={"X-API-Key": "partner"})
+    assert other.status_code == 200
+
+def test_session_id_scoped_to_client(client, monkeypatch):
+    """Conversation ids are passed through, prefixed with the caller's identity"""
+    seen = []
+    
+    async def fake_response(user_query, session_id=None):
+        seen.append(session_id)
+        return "ok"
+    
+    monkeypatch.setattr(app_module.ai_assistant, "get_response", fake_response)
+    client.post("/ask", json={"query": "solana", "session_id": "abc"}, headers={"X-API-Key": "k1"})
+    client.post("/ask", json={"query": "solana"})
+    assert seen == ["key:k1:abc", None]
+
+def test_unknown_api_keys_share_the_ip_bucket(client):
+    """Made-up X-API-Key values don't each get a fresh burst"""
+    statuses = [
+        client.post("/ask", json={"query": "solana"}, headers={"X-API-Key": f"made-up-{i}"}).status_code
+        for i in range(10)
+    ]
+    assert statuses.count(200) == 5
+    assert statuses.count(429) == 5
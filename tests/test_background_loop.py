@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.background_loop import BackgroundLoop
+
+@pytest.fixture
+def background_loop():
+    """A background loop stopped after each test"""
+    loop = BackgroundLoop()
+    yield loop
+    loop.stop()
+
+def test_concurrent_callers_share_one_loop(background_loop):
+    """Blocking callers on many threads run concurrently on the same loop"""
+    loops = []
+    
+    async def work():
+        loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0.2)
+        return "ok"
+    
+    with ThreadPoolExecutor(max_workers=200) as pool:
+        results = list(pool.map(lambda _: background_loop.run(work()), range(200)))
+    
+    assert results == ["ok"] * 200
+    assert set(loops) == {background_loop.loop}
+
+def test_run_propagates_exceptions(background_loop):
+    """Exceptions raised on the loop reach the caller"""
+    async def fail():
+        raise ValueError("bad")
+    
+    with pytest.raises(ValueError):
+        background_loop.run(fail())
+
+def test_run_timeout_cancels_work(background_loop):
+    """A timed-out call cancels its coroutine"""
+    cancelled = []
+    
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    with pytest.raises(Exception):
+        background_loop.run(slow(), timeout=0.05)
+    background_loop.run(asyncio.sleep(0.01))
+    assert cancelled == [True]
+
+def test_iterate_and_early_close(background_loop):
+    """Async generators are driven and closed on the loop"""
+    closed = []
+    
+    async def numbers():
+        try:
+            for i in range(5):
+                yield i
+        finally:
+            closed.append(True)
+    
+    assert list(background_loop.iterate(numbers())) == [0, 1, 2, 3, 4]
+    
+    generator = background_loop.iterate(numbers())
+    assert next(generator) == 0
+    generator.close()
+    assert closed == [True, True]
+
+def test_run_from_loop_thread_is_rejected(background_loop):
+    """Blocking on the loop from inside the loop would deadlock"""
+    async def nested():
+        background_loop.run(asyncio.sleep(0))
+    
+    with pytest.raises(RuntimeError):
+        background_loop.run(nested())
@@ -0,0 +1,113 @@
+import pytest
+from solders.keypair import Keypair
+from solana.rpc.commitment import Confirmed
+from src.balance_ledger import BalanceLedger, LAMPORTS_PER_SIGNATURE
+from src.ticket_system import TicketSystem
+from src.nft_ticket_minter import NFTTicketMinter
+
+@pytest.mark.asyncio
+async def test_ledger_loads_once_and_debits_locally():
+    """Balance is fetched once, then tracked in memory"""
+    fetches = []
+    
+    async def fetch(pubkey):
+        fetches.append(pubkey)
+        return 1_000
+    
+    ledger = BalanceLedger(fetch)
+    wallet = Keypair().pubkey()
+    assert await ledger.get_available(wallet) == 1_000
+    ledger.reserve(wallet, 300)
+    assert await ledger.get_available(wallet) == 700
+    ledger.settle(wallet, 300)
+    ledger.reserve(wallet, 100)
+    ledger.release(wallet, 100)
+    assert await ledger.get_available(wallet) == 700
+    assert len(fetches) == 1
+
+@pytest.mark.asyncio
+async def test_reconcile_keeps_pending_debits(monkeypatch):
+    """Reconciling subtracts debits the chain hasn't seen yet; stale entries reload"""
+    chain = {"balance": 1_000}
+    
+    async def fetch(pubkey):
+        return chain["balance"]
+    
+    clock = [0.0]
+    monkeypatch.setattr("src.balance_ledger.time.monotonic", lambda: clock[0])
+    ledger = BalanceLedger(fetch, refresh_interval=10)
+    wallet = Keypair().pubkey()
+    await ledger.get_available(wallet)
+    ledger.reserve(wallet, 400)
+    chain["balance"] = 900
+    clock[0] = 11
+    assert await ledger.get_available(wallet) == 500
+
+@pytest.mark.asyncio
+async def test_ticket_purchases_skip_balance_rpc(fake_rpc):
+    """Repeated purchases check the balance in memory"""
+    system = TicketSystem()
+    system.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 10_000_000
+    
+    for _ in range(5):
+        result = await system.create_ticket(owner, 1_000_000)
+        assert result["success"]
+    assert fake_rpc.calls["get_balance"] == 1
+    
+    # The local ledger tracks what the chain actually holds
+    expected = 10_000_000 - 5 * (1_000_000 + LAMPORTS_PER_SIGNATURE)
+    assert fake_rpc.balances[owner.pubkey()] == expected
+    assert await system.ledger.get_available(owner.pubkey()) == expected
+    
+    # Running out is detected locally
+    result = await system.create_ticket(owner, 5_000_000)
+    assert not result["success"]
+    assert "Insufficient balance" in result["error"]
+    assert fake_rpc.calls["get_balance"] == 1
+
+@pytest.mark.asyncio
+async def test_failed_purchase_reconciles(fake_rpc):
+    """A failed send undoes the local debit and re-reads the chain"""
+    system = TicketSystem()
+    system.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 10_000_000
+    fake_rpc.fail_sends = 1
+    result = await system.create_ticket(owner, 1_000_000)
+    assert not result["success"]
+    assert fake_rpc.calls["get_balance"] == 2
+    assert await system.ledger.get_available(owner.pubkey()) == 10_000_000
+
+@pytest.mark.asyncio
+async def test_nft_mints_skip_balance_and_rent_rpc(fake_rpc):
+    """Mints reuse the cached rent and the local balance"""
+    minter = NFTTicketMinter()
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    for seat in range(3):
+        result = await minter.create_nft_ticket(owner, "Show", "2026-01-01", {"seat": seat}, 1.0)
+        assert result["success"], result.get("error")
+    assert fake_rpc.calls["get_balance"] == 1
+    assert fake_rpc.calls["get_minimum_balance_for_rent_exemption"] == 1
+
+@pytest.mark.asyncio
+async def test_reconcile_reads_confirmed_balances(fake_rpc, monkeypatch):
+    """Ledger reloads read at confirmed, where settled debits are already visible"""
+    commitments = []
+    read = fake_rpc.get_balance
+
+    async def recording(pubkey, commitment=None):
+        commitments.append(commitment)
+        return await read(pubkey, commitment=commitment)
+
+    monkeypatch.setattr(fake_rpc, "get_balance", recording)
+    system = TicketSystem()
+    system.client = fake_rpc
+    minter = NFTTicketMinter()
+    minter.client = fake_rpc
+    await system.ledger.reconcile(Keypair().pubkey())
+    await minter.ledger.reconcile(Keypair().pubkey())
+    assert commitments == [Confirmed, Confirmed]
@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from solders.hash import Hash
+from solders.keypair import Keypair
+from src.checkin_service import CheckInService
+from src.nft_ticket_minter import NFTTicketMinter
+from src.ticket_log import TicketLog, MINTED
+from src.transaction_packing import MAX_TRANSACTION_SIZE
+from src.transaction_submitter import TransactionSubmitter
+
+def issue_tickets(fake_rpc, log, count):
+    """Tickets that exist on chain and in the log; returns (owner, mint) pairs"""
+    tickets = []
+    for _ in range(count):
+        owner, mint = Keypair(), Keypair().pubkey()
+        fake_rpc.accounts[mint] = SimpleNamespace(lamports=1_461_600, owner=None, data=bytes(82))
+        log.record(MINTED, mint, owner.pubkey(), event_name="Show")
+        tickets.append((owner, mint))
+    return tickets
+
+@pytest.fixture
+def gate(tmp_path, fake_rpc):
+    """Check-in service over the in-memory RPC client"""
+    minter = NFTTicketMinter()
+    minter.client = fake_rpc
+    payer = Keypair()
+    fake_rpc.balances[payer.pubkey()] = 1_000_000_000
+    log = TicketLog(str(tmp_path / "log"))
+    return CheckInService(minter, payer, log, flush_size=1000, flush_interval=0.05)
+
+@pytest.mark.asyncio
+async def test_scans_are_admitted_before_burns_are_sent(gate, fake_rpc):
+    """Scans return at once; their burns go out later in a few packed transactions"""
+    tickets = issue_tickets(fake_rpc, gate.ticket_log, 40)
+    results = [await gate.scan(owner, mint) for owner, mint in tickets]
+    assert all(result["status"] == "admitted" for result in results)
+    assert fake_rpc.sent == []
+    assert gate.pending() == 40
+
+    gate.start()
+    await asyncio.sleep(0.1)
+    await gate.close()
+    assert gate.stats["burned"] == 40
+    assert gate.stats["flushes"] == 1
+    assert len(fake_rpc.sent) < 10
+    assert all(len(bytes(tx)) <= MAX_TRANSACTION_SIZE for tx in fake_rpc.sent)
+    state = gate.ticket_log.get(tickets[0][1])
+    assert not state["burn_pending"]
+    assert state["burn_signature"]
+
+@pytest.mark.asyncio
+async def test_size_trigger_flushes_early(gate, fake_rpc):
+    """Reaching flush_size wakes the flusher without waiting for the interval"""
+    gate.flush_size = 5
+    gate.flush_interval = 60
+    gate.start()
+    for owner, mint in issue_tickets(fake_rpc, gate.ticket_log, 5):
+        await gate.scan(owner, mint)
+    for _ in range(50):
+        if gate.stats["burned"] == 5:
+            break
+        await asyncio.sleep(0.01)
+    assert gate.stats["burned"] == 5
+    await gate.close()
+
+@pytest.mark.asyncio
+async def test_second_scan_and_unknown_ticket_are_rejected(gate, fake_rpc):
+    """A used ticket is refused locally; a ticket that doesn't exist is refused after lookup"""
+    (owner, mint), = issue_tickets(fake_rpc, gate.ticket_log, 1)
+    assert (await gate.scan(owner, mint))["success"]
+    lookups = fake_rpc.calls["get_account_info"]
+    assert (await gate.scan(owner, mint)) == {"success": False, "error": "Ticket already used"}
+    assert fake_rpc.calls["get_account_info"] == lookups
+    assert not (await gate.scan(owner, Keypair().pubkey()))["success"]
+    assert gate.stats["rejected"] == 2
+
+@pytest.mark.asyncio
+async def test_failed_burns_are_reported(gate, fake_rpc):
+    """A rejected batch is split until the bad burn is isolated; only it is reported"""
+    reported = []
+    gate.on_failure = lambda ticket, error: reported.append(ticket)
+    tickets = issue_tickets(fake_rpc, gate.ticket_log, 4)
+    for owner, mint in tickets:
+        assert (await gate.scan(owner, mint))["success"]
+    bad = tickets[2][1]
+    fake_rpc.reject_accounts.add(bad)
+    await gate.drain()
+    assert reported == [str(bad)]
+    assert gate.stats["burned"] == 3
+    assert gate.stats["splits"] >= 1
+    assert gate.ticket_log.get(bad)["burn_error"].startswith("Transaction simulation failed")
+    assert not gate.ticket_log.get(tickets[0][1])["burn_pending"]
+    assert gate._signers == {}
+
+@pytest.mark.asyncio
+async def test_undecided_burns_stay_pending(gate, fake_rpc, monkeypatch):
+    """A burn whose outcome is unknown goes back in the queue instead of failing"""
+    gate.minter.submitter = TransactionSubmitter(poll_interval=0, max_failed_polls=2)
+    (owner, mint), = issue_tickets(fake_rpc, gate.ticket_log, 1)
+    await gate.scan(owner, mint)
+    statuses = fake_rpc.get_signature_statuses
+
+    async def unavailable(*args, **kwargs):
+        raise TimeoutError("status check timed out")
+
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", unavailable)
+    await gate.drain()
+    assert gate.failures == []
+    assert gate.pending() == 1
+    assert gate.ticket_log.get(mint)["burn_pending"]
+
+    # The retry resends the same burn and resolves it through its status
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", statuses)
+    await gate.drain()
+    assert gate.stats["burned"] == 1
+    assert not gate.ticket_log.get(mint)["burn_pending"]
+    assert gate._signers == {}
+
+@pytest.mark.asyncio
+async def test_unflushed_scans_survive_a_restart(tmp_path, gate, fake_rpc):
+    """Scans admitted before a crash are burned by the next process"""
+    tickets = issue_tickets(fake_rpc, gate.ticket_log, 4)
+    for owner, mint in tickets:
+        await gate.scan(owner, mint)
+    gate.ticket_log.close()
+
+    log = TicketLog(str(tmp_path / "log"))
+    signers = {str(owner.pubkey()): owner for owner, _ in tickets[:3]}
+    restarted = CheckInService(gate.minter, gate.payer, log, signers=signers)
+    assert restarted.pending() == 4
+    await restarted.drain()
+    assert restarted.stats["burned"] == 3
+    assert restarted.failures == [{"ticket": str(tickets[3][1]), "error": "Owner key unavailable to sign the burn"}]
+
+@pytest.mark.asyncio
+async def test_undecided_burn_that_landed_is_not_reported_as_failed(gate, fake_rpc, monkeypatch):
+    """A retry finds the earlier burn landed instead of failing on the already-burned token"""
+    gate.minter.submitter = TransactionSubmitter(poll_interval=0, max_failed_polls=2)
+    (owner, mint), = issue_tickets(fake_rpc, gate.ticket_log, 1)
+    await gate.scan(owner, mint)
+    statuses = fake_rpc.get_signature_statuses
+
+    async def unavailable(*args, **kwargs):
+        raise TimeoutError("status check timed out")
+
+    # The burn lands, but its status can't be read
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", unavailable)
+    await gate.drain()
+    assert gate.pending() == 1
+    first, = gate.ticket_log.get(mint)["burn_signatures"]
+    sent = len(fake_rpc.sent)
+
+    # By the retry the blockhash has moved on and the burned token rejects a second burn
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", statuses)
+    fake_rpc.blockhash = Hash.new_unique()
+    fake_rpc.reject_accounts.add(mint)
+    await gate.drain()
+    assert gate.failures == []
+    assert gate.stats["reconciled"] == 1
+    assert len(fake_rpc.sent) == sent
+    state = gate.ticket_log.get(mint)
+    assert not state["burn_pending"]
+    assert state["burn_signature"] == first
+    assert "burn_error" not in state
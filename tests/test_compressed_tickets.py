@@ -0,0 +1,267 @@
+import asyncio
+import time
+import pytest
+from solders.keypair import Keypair
+from solana.rpc.core import RPCException
+from src.merkle_tree import ConcurrentMerkleTree, hash_leaf, hash_node
+from src.compressed_ticket_minter import CompressedTicketMinter
+from src.transaction_submitter import TransactionSubmitter
+
+def naive_root(leaves, depth):
+    """Reference root computed level by level over a full tree"""
+    level = leaves + [bytes(32)] * ((1 << depth) - len(leaves))
+    for _ in range(depth):
+        level = [hash_node(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+def test_root_matches_reference_and_batches():
+    """Single and batch appends produce the same root as a full rebuild"""
+    leaves = [hash_leaf(str(i).encode()) for i in range(37)]
+    single = ConcurrentMerkleTree(max_depth=6, canopy_depth=2)
+    for leaf in leaves:
+        single.append(leaf)
+    batched = ConcurrentMerkleTree(max_depth=6, canopy_depth=2)
+    batched.append_batch(leaves[:10])
+    batched.append_batch(leaves[10:])
+    assert single.root == batched.root == naive_root(leaves, 6)
+
+def test_proofs_full_and_truncated():
+    """Proofs verify with and without the canopy and reject wrong leaves"""
+    tree = ConcurrentMerkleTree(max_depth=8, canopy_depth=3)
+    leaves = [hash_leaf(str(i).encode()) for i in range(100)]
+    tree.append_batch(leaves)
+    for index in (0, 1, 57, 99):
+        full = tree.get_proof(index, truncate_canopy=False)
+        truncated = tree.get_proof(index)
+        assert len(full) == 8 and len(truncated) == 5
+        assert tree.verify(leaves[index], index, full, tree.root)
+        assert tree.verify(leaves[index], index, truncated)
+        assert not tree.verify(leaves[index], index + 1, truncated)
+        assert not tree.verify(hash_leaf(b"forged"), index, full)
+
+def test_recent_roots_accept_slightly_stale_proofs():
+    """A proof made before another append still verifies against the buffer"""
+    tree = ConcurrentMerkleTree(max_depth=5, canopy_depth=0)
+    tree.append_batch([hash_leaf(b"a"), hash_leaf(b"b")])
+    proof = tree.get_proof(0)
+    tree.append(hash_leaf(b"c"))
+    assert tree.verify(hash_leaf(b"a"), 0, proof)
+
+def test_save_and_load(tmp_path):
+    """A saved tree rebuilds to the same root"""
+    tree = ConcurrentMerkleTree(max_depth=10, canopy_depth=4)
+    tree.append_batch([hash_leaf(str(i).encode()) for i in range(300)])
+    path = str(tmp_path / "tree.json")
+    tree.save(path)
+    assert ConcurrentMerkleTree.load(path).root == tree.root
+
+def test_hundred_thousand_leaves_is_fast():
+    """Appending 100k seats takes well under a few seconds"""
+    tree = ConcurrentMerkleTree(max_depth=17, canopy_depth=10)
+    leaves = [hash_leaf(i.to_bytes(4, "little")) for i in range(100_000)]
+    start = time.perf_counter()
+    for offset in range(0, len(leaves), 1000):
+        tree.append_batch(leaves[offset:offset + 1000])
+    assert time.perf_counter() - start < 5.0
+    assert tree.verify(leaves[54321], 54321, tree.get_proof(54321))
+
+@pytest.mark.asyncio
+async def test_minter_batches_and_proves(fake_rpc):
+    """Seats are minted in batches with one transaction each and proved locally"""
+    minter = CompressedTicketMinter(max_depth=12, canopy_depth=4)
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    seats = [{"section": "A", "row": str(r), "seat": str(s)} for r in range(10) for s in range(25)]
+    
+    result = await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats, 1.0, batch_size=100)
+    assert result["success"], result.get("error")
+    assert len(result["tickets"]) == 250
+    assert len(result["transaction_ids"]) == 3
+    assert len(fake_rpc.sent) == 3
+    
+    proof = minter.get_ticket_proof(42)
+    assert minter.verify_ticket_proof(proof["ticket"], 42, proof["proof"])["valid"]
+    forged = {**proof["ticket"], "owner": str(Keypair().pubkey())}
+    assert not minter.verify_ticket_proof(forged, 42, proof["proof"])["valid"]
+    
+    full_proof = [node.hex() for node in minter.tree.get_proof(42, truncate_canopy=False)]
+    assert minter.use_compressed_ticket(42, owner.pubkey())["success"]
+    assert not minter.verify_ticket_proof(proof["ticket"], 42, full_proof)["valid"]
+    used = minter.get_ticket_proof(42)
+    assert minter.verify_ticket_proof(used["ticket"], 42, used["proof"])["error"] == "Ticket already used"
+    assert not minter.use_compressed_ticket(42, owner.pubkey())["success"]
+
+def test_truncate_rolls_back_an_append():
+    """Truncating restores the earlier root and forgets the rolled-back one"""
+    leaves = [hash_leaf(str(i).encode()) for i in range(45)]
+    tree = ConcurrentMerkleTree(max_depth=6, canopy_depth=2)
+    tree.append_batch(leaves[:29])
+    before = tree.root
+    tree.append_batch(leaves[29:])
+    rolled_back = tree.root
+    tree.truncate(29)
+    assert tree.size == 29
+    assert tree.root == before == naive_root(leaves[:29], 6)
+    assert rolled_back not in tree.recent_roots
+    tree.append_batch(leaves[29:])
+    assert tree.root == naive_root(leaves, 6)
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_rolled_back(fake_rpc):
+    """A batch whose memo doesn't land leaves no tickets; earlier batches are reported"""
+    minter = CompressedTicketMinter(max_depth=12, canopy_depth=4)
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    seats = [{"section": "A", "row": "1", "seat": str(s)} for s in range(30)]
+    await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats[:10], 1.0)
+    anchored = minter.tree.root
+
+    original_send = fake_rpc.send_raw_transaction
+    sends = []
+
+    async def send_then_fail(*args, **kwargs):
+        sends.append(1)
+        if len(sends) == 2:
+            raise RPCException("Transaction simulation failed: insufficient funds for fee")
+        return await original_send(*args, **kwargs)
+
+    fake_rpc.send_raw_transaction = send_then_fail
+    result = await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats[10:], 1.0, batch_size=10)
+    assert not result["success"]
+    assert result["status"] == "failed"
+    assert len(result["tickets"]) == 10
+    assert len(result["transaction_ids"]) == 1
+    assert minter.tree.size == len(minter.tickets) == 20
+    assert minter.tree.root != anchored
+    assert minter.tree.root.hex() == result["root"]
+
+@pytest.mark.asyncio
+async def test_minter_state_survives_a_restart(tmp_path, fake_rpc):
+    """Tickets and the tree are restored from state_path, so proofs still verify"""
+    path = str(tmp_path / "tickets.json")
+    minter = CompressedTicketMinter(max_depth=10, canopy_depth=3, state_path=path)
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    seats = [{"section": "B", "row": "2", "seat": str(s)} for s in range(12)]
+    await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats, 1.0)
+    assert minter.use_compressed_ticket(3, owner.pubkey())["success"]
+
+    restarted = CompressedTicketMinter(state_path=path)
+    assert restarted.tree_id == minter.tree_id
+    assert restarted.tree.root == minter.tree.root
+    proof = restarted.get_ticket_proof(5)
+    assert restarted.verify_ticket_proof(proof["ticket"], 5, proof["proof"])["valid"]
+    assert not restarted.use_compressed_ticket(3, owner.pubkey())["success"]
+
+@pytest.mark.asyncio
+async def test_undecided_anchor_keeps_its_leaves(fake_rpc, monkeypatch):
+    """A batch whose memo outcome is unknown is not rolled back; the next anchor covers it"""
+    minter = CompressedTicketMinter(max_depth=10, canopy_depth=3,
+                                    submitter=TransactionSubmitter(poll_interval=0, max_failed_polls=2))
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    seats = [{"section": "C", "row": "1", "seat": str(s)} for s in range(10)]
+    statuses = fake_rpc.get_signature_statuses
+
+    async def unavailable(*args, **kwargs):
+        raise TimeoutError("status check timed out")
+
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", unavailable)
+    result = await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats[:5], 1.0)
+    assert not result["success"]
+    assert result["status"] == "unknown"
+    assert [entry["leaf_index"] for entry in result["unconfirmed"]] == [0, 1, 2, 3, 4]
+    assert minter.tree.size == len(minter.tickets) == 5
+
+    monkeypatch.setattr(fake_rpc, "get_signature_statuses", statuses)
+    result = await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats[5:], 1.0)
+    assert result["success"]
+    assert [entry["leaf_index"] for entry in result["tickets"]] == [5, 6, 7, 8, 9]
+    assert minter.tree.size == 10
+
+@pytest.mark.asyncio
+async def test_concurrent_mints_overlap_their_anchors(fake_rpc, monkeypatch):
+    """Appends are serialized but waiting for one batch's memo doesn't hold up the next"""
+    minter = CompressedTicketMinter(max_depth=10, canopy_depth=3)
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    in_flight = []
+    original_submit = minter.submitter.submit_raw
+
+    async def slow_submit(*args, **kwargs):
+        in_flight.append(1)
+        await asyncio.sleep(0.1)
+        return await original_submit(*args, **kwargs)
+
+    monkeypatch.setattr(minter.submitter, "submit_raw", slow_submit)
+    seats = [[{"section": str(m), "row": "1", "seat": str(s)} for s in range(4)] for m in range(3)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        minter.mint_compressed_tickets(owner, "Show", "2026-01-01", batch, 1.0) for batch in seats
+    ])
+    assert time.perf_counter() - start < 0.25
+    assert all(result["success"] for result in results)
+    assert sorted(entry["leaf_index"] for result in results for entry in result["tickets"]) == list(range(12))
+    for index, ticket in enumerate(minter.tickets):
+        proof = minter.get_ticket_proof(index)
+        assert minter.verify_ticket_proof(ticket, index, proof["proof"])["valid"]
+
+@pytest.mark.parametrize("later_lands_first", [False, True])
+@pytest.mark.asyncio
+async def test_failed_anchor_under_a_later_batch_is_kept(fake_rpc, monkeypatch, later_lands_first):
+    """Leaves another batch was appended on top of aren't truncated: the later root covers them,
+    or the current root is anchored again"""
+    minter = CompressedTicketMinter(max_depth=10, canopy_depth=3)
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    original_submit = minter.submitter.submit_raw
+    calls = []
+
+    async def first_fails(client, wire, last_valid_block_height):
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            return {"success": False, "status": "expired", "signature": None, "error": "Blockhash expired"}
+        if len(calls) == 2 and not later_lands_first:
+            await asyncio.sleep(0.1)
+        return await original_submit(client, wire, last_valid_block_height)
+
+    monkeypatch.setattr(minter.submitter, "submit_raw", first_fails)
+    first, second = await asyncio.gather(*[
+        minter.mint_compressed_tickets(owner, "Show", "2026-01-01", [{"seat": f"{m}-{s}"} for s in range(3)], 1.0)
+        for m in range(2)
+    ])
+    assert first["success"] and second["success"]
+    assert minter.tree.size == len(minter.tickets) == 6
+    assert len(fake_rpc.sent) == (1 if later_lands_first else 2)
+
+@pytest.mark.asyncio
+async def test_state_file_is_appended_not_rewritten(tmp_path, fake_rpc):
+    """Each batch, rollback and use appends one line; a restart replays them"""
+    path = tmp_path / "tickets.json"
+    minter = CompressedTicketMinter(max_depth=10, canopy_depth=3, state_path=str(path))
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    seats = [{"section": "D", "row": "1", "seat": str(s)} for s in range(9)]
+    await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats, 1.0, batch_size=3)
+    first_line = path.read_text().splitlines()[0]
+
+    fake_rpc.fail_sends = 1
+    assert not (await minter.mint_compressed_tickets(owner, "Show", "2026-01-01", seats[:2], 1.0))["success"]
+    assert minter.use_compressed_ticket(4, owner.pubkey())["success"]
+    lines = path.read_text().splitlines()
+    assert lines[0] == first_line
+    assert len(lines) == 6  # first batch, two appends, the rolled-back append, its truncate, the use
+
+    restarted = CompressedTicketMinter(state_path=str(path))
+    assert restarted.tickets == minter.tickets
+    assert restarted.tree.root == minter.tree.root
+    restarted.save()
+    assert len(path.read_text().splitlines()) == 1
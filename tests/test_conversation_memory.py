@@ -0,0 +1,100 @@
+import pytest
+from types import SimpleNamespace
+from src.conversation_memory import ConversationMemory, estimate_tokens
+from src.ai_assistant import TicketingAIAssistant
+
+def total_tokens(messages):
+    """Estimated tokens across chat messages"""
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+def test_recent_turns_are_kept_verbatim():
+    """Short conversations are replayed as-is"""
+    memory = ConversationMemory()
+    memory.add_exchange("s1", "What is a PDA?", "A program derived address.")
+    assert memory.get_messages("s1") == [
+        {"role": "user", "content": "What is a PDA?"},
+        {"role": "assistant", "content": "A program derived address."},
+    ]
+    assert memory.get_messages("other") == []
+    assert memory.get_messages(None) == []
+
+def test_context_stays_within_budget():
+    """Long conversations are compacted into a bounded summary"""
+    memory = ConversationMemory(max_tokens=200, summary_max_tokens=60)
+    for i in range(50):
+        memory.add_exchange("s1", f"Question {i}. " + "detail " * 30, f"Answer {i}. " + "words " * 30)
+    messages = memory.get_messages("s1")
+    assert total_tokens(messages) <= 200 + 60
+    assert messages[0]["role"] == "system"
+    assert "Question 49" in messages[-2]["content"]
+    assert "Question 0" not in messages[0]["content"]
+
+def test_oversized_exchange_is_truncated_to_budget():
+    """A single turn larger than the budget is cut instead of kept whole"""
+    memory = ConversationMemory(max_tokens=100, summary_max_tokens=40)
+    memory.add_exchange("s1", "What is a PDA?", "A program derived address.")
+    memory.add_exchange("s1", "Explain rent. " + "detail " * 200, "Rent is a deposit. " + "words " * 300)
+    messages = memory.get_messages("s1")
+    assert total_tokens(messages[-2:]) <= 100
+    assert total_tokens(messages) <= 100 + 40
+    assert messages[-2]["content"].startswith("Explain rent.")
+    assert messages[-1]["content"].startswith("Rent is a deposit.")
+    assert messages[-1]["content"].endswith("...")
+
+def test_sessions_are_bounded_and_evicted_when_idle(monkeypatch):
+    """Old and idle sessions are dropped"""
+    memory = ConversationMemory(max_sessions=2, idle_timeout=10)
+    clock = [1000.0]
+    monkeypatch.setattr("src.conversation_memory.time.monotonic", lambda: clock[0])
+    memory.add_exchange("a", "q", "a")
+    memory.add_exchange("b", "q", "a")
+    memory.add_exchange("c", "q", "a")
+    assert not memory.has_context("a")
+    assert memory.session_count() == 2
+    clock[0] += 11
+    assert memory.session_count() == 0
+
+@pytest.mark.asyncio
+async def test_assistant_sends_history_with_follow_ups():
+    """Short follow-up questions carry earlier turns and pass the topic check"""
+    assistant = TicketingAIAssistant(api_key="test-key")
+    sent = []
+    
+    async def create(**kwargs):
+        sent.append(kwargs["messages"])
+        message = SimpleNamespace(content=f"answer {len(sent)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    await assistant.get_response("How do solana airdrops work?", session_id="s1")
+    follow_up = await assistant.get_response("And how long does that take?", session_id="s1")
+    assert follow_up == "answer 2"
+    assert [m["content"] for m in sent[1][1:]] == [
+        "How do solana airdrops work?", "answer 1", "And how long does that take?"
+    ]
+    
+    # Without a session the same follow-up is off topic
+    unrelated = await assistant.get_response("And how long does that take?")
+    assert "I can only assist" in unrelated
+
+@pytest.mark.asyncio
+async def test_off_topic_questions_are_refused_mid_conversation():
+    """An ongoing session doesn't let clearly unrelated questions through"""
+    assistant = TicketingAIAssistant(api_key="test-key")
+    sent = []
+    
+    async def create(**kwargs):
+        sent.append(kwargs["messages"])
+        message = SimpleNamespace(content="answer")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    await assistant.get_response("How do I fund my solana wallet?", session_id="s1")
+    for query in ("What's the weather like in Paris today?",
+                  "Write me a long essay about the history of the roman empire and its fall",
+                  "How do I bake sourdough bread?",
+                  "Why is the sky blue?",
+                  "and what about football?"):
+        assert "I can only assist" in await assistant.get_response(query, session_id="s1")
+    assert len(sent) == 1
+    assert await assistant.get_response("Why is that?", session_id="s1") == "answer"
@@ -0,0 +1,54 @@
+import pytest
+from solders.keypair import Keypair
+from spl.token.instructions import get_associated_token_address
+from src.derivation_cache import DerivationCache
+
+def test_ata_matches_spl_and_is_cached():
+    """Cached ATAs equal spl's derivation and repeat lookups are hits"""
+    cache = DerivationCache()
+    owner, mint = Keypair().pubkey(), Keypair().pubkey()
+    assert cache.ata(owner, mint) == get_associated_token_address(owner, mint)
+    assert cache.ata(owner, mint) == get_associated_token_address(owner, mint)
+    assert cache.get_stats()["hits"] == 1
+    assert cache.hit_rate() == 0.5
+
+def test_pda_key_ignores_seed_container():
+    """Seeds passed as a list or tuple share one cache entry"""
+    cache = DerivationCache()
+    program = Keypair().pubkey()
+    first = cache.pda([b"ticket", b"A1"], program)
+    assert cache.pda((b"ticket", b"A1"), program) == first
+    assert len(cache) == 1
+
+def test_lru_is_bounded():
+    """Least recently used entries are evicted past max_size"""
+    cache = DerivationCache(max_size=2)
+    owner = Keypair().pubkey()
+    mints = [Keypair().pubkey() for _ in range(3)]
+    cache.ata(owner, mints[0])
+    cache.ata(owner, mints[1])
+    cache.ata(owner, mints[0])
+    cache.ata(owner, mints[2])
+    assert len(cache) == 2
+    assert cache.get_stats()["evictions"] == 1
+
+    # mints[1] was the least recently used, so it is derived again
+    misses = cache.get_stats()["misses"]
+    cache.ata(owner, mints[0])
+    cache.ata(owner, mints[1])
+    assert cache.get_stats()["misses"] == misses + 1
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_batch_matches_serial(use_processes):
+    """Pooled batch derivation returns the serial results in order"""
+    cache = DerivationCache(workers=2, use_processes=use_processes, chunk_size=4)
+    try:
+        owners = [Keypair().pubkey() for _ in range(5)]
+        mints = [Keypair().pubkey() for _ in range(3)]
+        pairs = [(owner, mint) for owner in owners for mint in mints]
+        cache.ata(*pairs[0])
+        results = cache.ata_many(pairs + pairs[:2])
+        assert results == [get_associated_token_address(owner, mint) for owner, mint in pairs + pairs[:2]]
+        assert len(cache) == len(pairs)
+    finally:
+        cache.close()
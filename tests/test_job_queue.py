@@ -0,0 +1,160 @@
+import asyncio
+import time
+import pytest
+from solders.keypair import Keypair
+from src.job_queue import JobQueue, JobWorkerPool, LeaseLost, ticket_handlers, DONE, DEAD, PENDING, RUNNING
+from src.transaction_submitter import TransactionSubmitter
+from src.nft_ticket_minter import NFTTicketMinter
+from src.ticket_address import TicketAddresser
+from src.ticket_system import TicketSystem
+
+@pytest.fixture
+def queue(tmp_path):
+    """Job queue in a temporary database"""
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.2, max_attempts=3, retry_delay=0.01)
+    yield queue
+    queue.close()
+
+def test_keyed_jobs_are_enqueued_once(queue):
+    """Re-enqueueing a batch after a restart doesn't duplicate it"""
+    first = queue.enqueue_many([("noop", {"seat": i}, f"seat-{i}") for i in range(3)])
+    again = queue.enqueue_many([("noop", {"seat": i}, f"seat-{i}") for i in range(4)])
+    assert again[:3] == first
+    assert queue.counts()[PENDING] == 4
+
+@pytest.mark.asyncio
+async def test_failures_retry_then_dead_letter(queue):
+    """Failing jobs back off and retry, then land in the dead-letter state"""
+    calls = {"flaky": 0, "broken": 0}
+
+    async def flaky(payload, checkpoint):
+        calls["flaky"] += 1
+        if calls["flaky"] < 2:
+            raise RuntimeError("node timed out")
+        return {"success": True, "value": payload["value"]}
+
+    async def broken(payload, checkpoint):
+        calls["broken"] += 1
+        return {"success": False, "error": "Insufficient balance"}
+
+    ok_id = queue.enqueue("flaky", {"value": 7})
+    dead_id = queue.enqueue("broken", {})
+    pool = JobWorkerPool(queue, {"flaky": flaky, "broken": broken}, workers=2, poll_interval=0.01)
+    await asyncio.wait_for(pool.run_until_empty(), 5)
+
+    assert queue.get(ok_id)["status"] == DONE
+    assert queue.get(ok_id)["result"] == {"success": True, "value": 7}
+    assert calls["broken"] == 3
+    assert [job["id"] for job in queue.dead_letters()] == [dead_id]
+    assert queue.get(dead_id)["error"] == "Insufficient balance"
+    assert pool.stats == {"completed": 1, "retried": 3, "dead": 1, "lease_lost": 0}
+
+@pytest.mark.asyncio
+async def test_abandoned_lease_resumes_after_restart(tmp_path):
+    """A job claimed by a process that died is picked up once its lease expires"""
+    path = str(tmp_path / "jobs.db")
+    crashed = JobQueue(path, lease_seconds=0.1)
+    job_id = crashed.enqueue("noop", {})
+    assert crashed.claim()["id"] == job_id
+    crashed.close()
+
+    restarted = JobQueue(path, lease_seconds=0.1)
+    assert restarted.claim() is None
+
+    async def noop(payload, checkpoint):
+        return {"success": True}
+
+    pool = JobWorkerPool(restarted, {"noop": noop}, poll_interval=0.01)
+    await asyncio.wait_for(pool.run_until_empty(), 5)
+    job = restarted.get(job_id)
+    assert job["status"] == DONE
+    assert job["attempts"] == 2
+    restarted.close()
+
+@pytest.mark.asyncio
+async def test_ticket_jobs(queue, fake_rpc):
+    """Ticket handlers run mints by signer pubkey and skip seats that already landed"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000
+    minter = NFTTicketMinter(ticket_addresser=TicketAddresser())
+    minter.client = fake_rpc
+    system = TicketSystem()
+    system.client = fake_rpc
+    handlers = ticket_handlers({str(owner.pubkey()): owner}, minter=minter, ticket_system=system)
+
+    seat = {"event_name": "Show", "event_date": "2026-01-01", "owner": str(owner.pubkey()),
+            "seat_info": {"section": "VIP", "row": "A", "seat": "1"}, "price": 1.0}
+    mint_id = queue.enqueue("create_nft_ticket", seat, key="Show/VIP/A/1")
+    ticket_id = queue.enqueue("create_ticket", {"owner": str(owner.pubkey()), "price": 1_000_000})
+    await asyncio.wait_for(JobWorkerPool(queue, handlers).run_until_empty(), 5)
+
+    minted = queue.get(mint_id)["result"]
+    assert minted["success"]
+    assert queue.get(ticket_id)["status"] == DONE
+    sent = len(fake_rpc.sent)
+
+    # Replaying the mint (as after a crash before complete) finds it on chain
+    resumed = await handlers["create_nft_ticket"](seat, lambda payload: None)
+    assert resumed == {"success": True, "nft_address": minted["nft_address"], "resumed": True}
+    assert len(fake_rpc.sent) == sent
+
+def test_job_whose_lease_keeps_expiring_is_dead_lettered(tmp_path):
+    """A job that takes its worker down every time stops being claimed after max_attempts"""
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01, max_attempts=2)
+    job_id = queue.enqueue("poison", {})
+    assert queue.claim()["attempts"] == 1
+    time.sleep(0.02)
+    assert queue.claim()["attempts"] == 2
+    time.sleep(0.02)
+    assert queue.claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == DEAD
+    assert job["attempts"] == 2
+    assert "Lease expired" in job["error"]
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_ticket_job_retried_after_a_crash_is_charged_once(queue, fake_rpc):
+    """The signed purchase is checkpointed before sending, so a retry settles it instead of buying again"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000
+    system = TicketSystem()
+    system.client = fake_rpc
+    handlers = ticket_handlers({str(owner.pubkey()): owner}, ticket_system=system)
+    job_id = queue.enqueue("create_ticket", {"owner": str(owner.pubkey()), "price": 1_000_000})
+    job = queue.claim()
+
+    # The purchase lands but the worker dies before recording it
+    first = await handlers["create_ticket"](job["payload"], lambda payload: queue.checkpoint(job_id, job["attempts"], payload))
+    assert first["success"]
+    balance = fake_rpc.balances[owner.pubkey()]
+
+    # A fresh process (no remembered outcomes) picks the job up again
+    system.submitter = TransactionSubmitter(poll_interval=0)
+    retried = await handlers["create_ticket"](queue.get(job_id)["payload"], lambda payload: None)
+    assert retried["success"] and retried["resumed"]
+    assert retried["ticket_pubkey"] == str(first["ticket_pubkey"])
+    assert fake_rpc.balances[owner.pubkey()] == balance
+
+def test_stale_lease_holder_cannot_update_the_job(tmp_path):
+    """Once a lease is re-claimed, the worker that lost it can't checkpoint, complete or fail the job"""
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01)
+    job_id = queue.enqueue("slow", {"step": 0})
+    stale = queue.claim()
+    time.sleep(0.02)
+    current = queue.claim()
+    assert current["attempts"] == stale["attempts"] + 1
+
+    with pytest.raises(LeaseLost):
+        queue.checkpoint(job_id, stale["attempts"], {"step": 1})
+    assert not queue.extend_lease(job_id, stale["attempts"])
+    assert not queue.complete(job_id, stale["attempts"], {"success": True})
+    assert queue.fail(job_id, stale["attempts"], "boom") is None
+    job = queue.get(job_id)
+    assert job["status"] == RUNNING
+    assert job["payload"] == {"step": 0}
+
+    queue.checkpoint(job_id, current["attempts"], {"step": 1})
+    assert queue.complete(job_id, current["attempts"], {"success": True})
+    assert queue.get(job_id)["status"] == DONE
+    queue.close()
@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from src.model_router import ModelRouter, LatencyBudgetExceeded
+from src.ai_assistant import TicketingAIAssistant, SLOW_MESSAGE
+
+@pytest_asyncio.fixture
+async def fake_openai():
+    """Local OpenAI-compatible server with a configurable delay per model"""
+    delays = {}
+    requests = []
+    handlers = set()
+    
+    async def chat_completions(request):
+        handlers.add(asyncio.current_task())
+        body = await request.json()
+        model = body["model"]
+        requests.append(model)
+        await asyncio.sleep(delays.get(model, 0))
+        return web.json_response({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"answer from {model}"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+    
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield {"base_url": f"http://127.0.0.1:{port}/v1", "delays": delays, "requests": requests}
+    for handler in handlers:
+        handler.cancel()
+    await asyncio.gather(*handlers, return_exceptions=True)
+    await runner.cleanup()
+
+def make_assistant(server, **router_options):
+    """Assistant pointed at the fake server"""
+    router = ModelRouter(primary_model="primary", **router_options)
+    return TicketingAIAssistant(api_key="test-key", base_url=server["base_url"], router=router)
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(fake_openai):
+    """A fast primary answers alone"""
+    assistant = make_assistant(fake_openai, fallback_model="fallback", hedge_after=0.5)
+    assert await assistant.get_response("solana question") == "answer from primary"
+    assert fake_openai["requests"] == ["primary"]
+    assert assistant.get_routing_stats()["hedges"] == 0
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_to_fallback(fake_openai):
+    """After the hedge delay a second request races the slow primary"""
+    fake_openai["delays"]["primary"] = 2.0
+    assistant = make_assistant(fake_openai, fallback_model="fallback", hedge_after=0.1, latency_budget=1.0)
+    assert await assistant.get_response("solana question") == "answer from fallback"
+    assert fake_openai["requests"] == ["primary", "fallback"]
+    stats = assistant.get_routing_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_budget_exhausted_falls_back_to_faq(fake_openai):
+    """When nothing answers in budget the closest FAQ answer is returned"""
+    fake_openai["delays"]["primary"] = 2.0
+    assistant = make_assistant(fake_openai, hedge_after=0.05, latency_budget=0.3)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    answer = await assistant.get_response("What are lamports in solana?")
+    assert loop.time() - start < 1.0
+    assert answer.startswith(SLOW_MESSAGE)
+    assert "Leslie Lamport" in answer
+    assert assistant.get_routing_stats()["timeouts"] == 1
+
+@pytest.mark.asyncio
+async def test_hedge_delay_tracks_p95():
+    """The hedge delay follows the observed p95 once there are enough samples"""
+    router = ModelRouter(primary_model="primary", hedge_after=5.0, min_samples=20)
+    
+    async def call(model, timeout):
+        return model
+    
+    for _ in range(20):
+        assert await router.run(call) == "primary"
+    assert router.hedge_delay() < 1.0
+
+@pytest.mark.asyncio
+async def test_fast_failure_is_not_hedged():
+    """A primary that fails before the hedge delay surfaces its error without a second request"""
+    router = ModelRouter(primary_model="primary", fallback_model="fallback")
+    calls = []
+    
+    async def call(model, timeout):
+        calls.append(model)
+        raise ValueError(model)
+    
+    with pytest.raises(ValueError):
+        await router.run(call)
+    assert calls == ["primary"]
+    assert router.get_stats()["errors"] == 1
+    assert router.get_stats()["hedges"] == 0
+
+@pytest.mark.asyncio
+async def test_errors_from_every_attempt_are_raised():
+    """If a slow primary and its hedge both fail the real error surfaces"""
+    router = ModelRouter(primary_model="primary", fallback_model="fallback", hedge_after=0.01)
+    
+    async def call(model, timeout):
+        if model == "primary":
+            await asyncio.sleep(0.05)
+        raise ValueError(model)
+    
+    with pytest.raises(ValueError):
+        await router.run(call)
+    assert router.get_stats()["errors"] == 1
+    assert router.get_stats()["hedges"] == 1
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_spare_capacity():
+    """When can_hedge says no, the slow primary is waited for alone"""
+    router = ModelRouter(primary_model="primary", fallback_model="fallback", hedge_after=0.01)
+    calls = []
+    
+    async def call(model, timeout):
+        calls.append(model)
+        await asyncio.sleep(0.05)
+        return model
+    
+    assert await router.run(call, can_hedge=lambda: False) == "primary"
+    assert calls == ["primary"]
+    assert router.get_stats()["hedges_skipped"] == 1
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+import httpx
+import openai
+from src.rate_limit import TokenBucket, ClientRateLimiter, ConcurrencyGovernor, OverloadedError
+from src.ai_assistant import TicketingAIAssistant, BUSY_MESSAGE
+
+def test_token_bucket_refills():
+    """Buckets allow a burst, then refill at the configured rate"""
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.take(now)[0]
+    assert bucket.take(now)[0]
+    allowed, retry_after = bucket.take(now)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+    assert bucket.take(now + 0.5)[0]
+
+def test_client_rate_limiter_is_per_client_and_bounded():
+    """Each client has its own bucket and old clients are forgotten"""
+    limiter = ClientRateLimiter(rate=0.001, burst=1, max_clients=2)
+    assert limiter.allow("a")[0]
+    assert not limiter.allow("a")[0]
+    assert limiter.allow("b")[0]
+    assert limiter.allow("c")[0]
+    assert len(limiter._buckets) == 2
+
+@pytest.mark.asyncio
+async def test_governor_caps_concurrency():
+    """No more than `limit` calls run at once; the rest queue"""
+    governor = ConcurrencyGovernor(initial_limit=3, max_limit=3)
+    running = []
+    peak = []
+    
+    async def work():
+        async with governor.slot():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+    
+    await asyncio.gather(*[work() for _ in range(20)])
+    assert max(peak) == 3
+    assert governor.get_stats()["admitted"] == 20
+    assert governor.in_use == 0
+
+@pytest.mark.asyncio
+async def test_governor_rejects_when_queue_full_or_slow():
+    """Queue length and queue wait are both bounded"""
+    governor = ConcurrencyGovernor(initial_limit=1, max_queue=1, queue_timeout=0.05)
+    await governor.acquire()
+    waiter = asyncio.ensure_future(governor.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(OverloadedError):
+        await governor.acquire()
+    with pytest.raises(OverloadedError):
+        await waiter
+    governor.release()
+    assert governor.get_stats()["queued"] == 0
+    assert governor.in_use == 0
+
+def test_governor_aimd():
+    """429s halve the limit (once per cooldown); successes grow it back slowly"""
+    governor = ConcurrencyGovernor(initial_limit=16, cooldown=60)
+    governor.on_overload()
+    governor.on_overload()
+    assert governor.get_stats()["limit"] == 8
+    for _ in range(9):
+        governor.on_success()
+    assert governor.get_stats()["limit"] == 9
+
+@pytest.mark.asyncio
+async def test_assistant_backs_off_on_upstream_429():
+    """Upstream 429s lower the assistant's concurrency cap"""
+    assistant = TicketingAIAssistant(api_key="test-key", governor=ConcurrencyGovernor(initial_limit=8))
+    
+    async def create(**kwargs):
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        raise openai.RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    answer = await assistant.get_response("solana wallet question")
+    assert "error" in answer
+    assert assistant.get_governor_stats()["limit"] == 4
+
+@pytest.mark.asyncio
+async def test_assistant_reports_busy_when_overloaded():
+    """A full queue returns a busy answer instead of waiting"""
+    governor = ConcurrencyGovernor(initial_limit=1, max_queue=0)
+    assistant = TicketingAIAssistant(api_key="test-key", governor=governor)
+    await governor.acquire()
+    assert await assistant.get_response("solana wallet question") == BUSY_MESSAGE
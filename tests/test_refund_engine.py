@@ -0,0 +1,178 @@
+import pytest
+from types import SimpleNamespace
+from solders.keypair import Keypair
+from src.refund_engine import RefundEngine
+from src.ticket_log import TicketLog, MINTED, USED, REFUNDED
+from src.transaction_packing import MAX_TRANSACTION_SIZE
+
+def sell_tickets(log, owners, per_owner, event_name="Show", price=0.01):
+    """Log minted tickets for an event; returns their addresses"""
+    addresses = []
+    for owner in owners:
+        for _ in range(per_owner):
+            address = str(Keypair().pubkey())
+            log.record(MINTED, address, owner, event_name=event_name, event_date="2026-01-01", price=price)
+            addresses.append(address)
+    return addresses
+
+@pytest.fixture
+def treasury(fake_rpc):
+    """A well-funded organizer wallet"""
+    treasury = Keypair()
+    fake_rpc.balances[treasury.pubkey()] = 1_000_000_000_000
+    return treasury
+
+@pytest.mark.asyncio
+async def test_refunds_are_packed_and_reconciled(tmp_path, fake_rpc, treasury):
+    """Every outstanding ticket is refunded once, in a few packed transactions"""
+    log = TicketLog(str(tmp_path / "log"))
+    owners = [Keypair().pubkey() for _ in range(100)]
+    tickets = sell_tickets(log, owners, 2)
+    sell_tickets(log, owners[:5], 1, event_name="Other Show")
+    log.record(USED, tickets[0])
+
+    engine = RefundEngine(fake_rpc, treasury, log, concurrency=3, checkpoint_directory=str(tmp_path / "cp"))
+    report = await engine.refund_event("Show", "2026-01-01")
+
+    assert report["success"], report
+    assert report["reconciled"]
+    assert len(report["refunded"]) == 199
+    assert report["refunded_lamports"] == 199 * 10_000_000
+    assert report["transactions"] == len(fake_rpc.sent) < 12
+    assert all(len(bytes(tx)) <= MAX_TRANSACTION_SIZE for tx in fake_rpc.sent)
+    assert fake_rpc.balances[owners[0]] == 10_000_000
+    assert fake_rpc.balances[owners[1]] == 20_000_000
+    assert log.get(tickets[1])["status"] == REFUNDED
+    assert log.get(tickets[0])["status"] == USED
+    assert not (tmp_path / "cp").exists() or not list((tmp_path / "cp").iterdir())
+
+    # Nothing is owed on a second run
+    again = await engine.refund_event("Show", "2026-01-01")
+    assert again["tickets"] == 0 and again["success"]
+
+@pytest.mark.asyncio
+async def test_crash_after_send_never_pays_twice(tmp_path, fake_rpc, treasury):
+    """Batches signed before a crash are settled from the checkpoint instead of re-sent"""
+    log = TicketLog(str(tmp_path / "log"))
+    owners = [Keypair().pubkey() for _ in range(30)]
+    sell_tickets(log, owners, 1)
+    checkpoints = str(tmp_path / "cp")
+
+    crashing = RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints)
+
+    async def send_then_die(client, wire, last_valid_block_height):
+        await client.send_raw_transaction(wire)
+        raise RuntimeError("process killed")
+    crashing.submitter.submit_raw = send_then_die
+    with pytest.raises(RuntimeError):
+        await crashing.refund_event("Show")
+    paid = dict(fake_rpc.balances)
+    sends = fake_rpc.calls["send_raw_transaction"]
+
+    # Landed batches are settled from their status; a resend would be rejected as already processed
+    report = await RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints).refund_event("Show")
+    assert report["success"]
+    assert report["resumed_batches"] >= 1
+    assert report["reconciled"]
+    assert fake_rpc.calls["send_raw_transaction"] == sends
+    assert all(fake_rpc.balances[owner] == paid[owner] == 10_000_000 for owner in owners)
+    assert log.counts()[REFUNDED] == 30
+
+@pytest.mark.asyncio
+async def test_rejected_resend_of_landed_batch_is_not_repaid(tmp_path, fake_rpc, treasury):
+    """A landed batch whose resend the node rejects is still settled as paid"""
+    log = TicketLog(str(tmp_path / "log"))
+    owners = [Keypair().pubkey() for _ in range(5)]
+    sell_tickets(log, owners, 1)
+    checkpoints = str(tmp_path / "cp")
+
+    crashing = RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints)
+    async def send_then_die(client, wire, last_valid_block_height):
+        await client.send_raw_transaction(wire)
+        raise RuntimeError("process killed")
+    crashing.submitter.submit_raw = send_then_die
+    with pytest.raises(RuntimeError):
+        await crashing.refund_event("Show")
+
+    # The status isn't visible yet when the restarted engine first looks
+    get_signature_statuses = fake_rpc.get_signature_statuses
+    hidden = {"calls": 1}
+    async def lagging_statuses(signatures, search_transaction_history=False):
+        if hidden["calls"]:
+            hidden["calls"] -= 1
+            return SimpleNamespace(value=[None for _ in signatures])
+        return await get_signature_statuses(signatures, search_transaction_history)
+    fake_rpc.get_signature_statuses = lagging_statuses
+
+    report = await RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints).refund_event("Show")
+    assert report["success"], report
+    assert all(fake_rpc.balances[owner] == 10_000_000 for owner in owners)
+    assert len(fake_rpc.sent) == 1
+
+@pytest.mark.asyncio
+async def test_undecided_batch_is_unsettled_not_failed(tmp_path, fake_rpc, treasury):
+    """A batch whose outcome can't be told yet stays checkpointed instead of being reported failed"""
+    log = TicketLog(str(tmp_path / "log"))
+    owners = [Keypair().pubkey() for _ in range(5)]
+    sell_tickets(log, owners, 1)
+    checkpoints = str(tmp_path / "cp")
+
+    engine = RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints)
+    async def undecided(client, wire, last_valid_block_height):
+        await client.send_raw_transaction(wire)
+        return {"success": False, "status": "unknown", "error": "Status checks kept failing"}
+    engine.submitter.submit_raw = undecided
+    get_signature_statuses = fake_rpc.get_signature_statuses
+    async def unavailable(signatures, search_transaction_history=False):
+        raise TimeoutError("status check timed out")
+    fake_rpc.get_signature_statuses = unavailable
+
+    report = await engine.refund_event("Show")
+    assert not report["success"]
+    assert report["failed"] == []
+    assert report["unsettled_batches"] == 1
+    assert report["outstanding"] == 5
+
+    # The next run settles it from its status
+    fake_rpc.get_signature_statuses = get_signature_statuses
+    report = await RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints).refund_event("Show")
+    assert report["success"], report
+    assert all(fake_rpc.balances[owner] == 10_000_000 for owner in owners)
+    assert len(fake_rpc.sent) == 1
+
+@pytest.mark.parametrize("expired", [False, True])
+@pytest.mark.asyncio
+async def test_unsent_batch_resumes_or_repacks(tmp_path, fake_rpc, treasury, expired):
+    """A batch signed but never sent is rebroadcast while live, and repacked once expired"""
+    log = TicketLog(str(tmp_path / "log"))
+    owners = [Keypair().pubkey() for _ in range(5)]
+    sell_tickets(log, owners, 1)
+    checkpoints = str(tmp_path / "cp")
+
+    crashing = RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints)
+    async def die(client, wire, last_valid_block_height):
+        raise RuntimeError("process killed")
+    crashing.submitter.submit_raw = die
+    with pytest.raises(RuntimeError):
+        await crashing.refund_event("Show")
+    if expired:
+        fake_rpc.block_height += 1_000
+
+    report = await RefundEngine(fake_rpc, treasury, log, checkpoint_directory=checkpoints).refund_event("Show")
+    assert report["success"], report
+    assert report["reconciled"]
+    assert all(fake_rpc.balances[owner] == 10_000_000 for owner in owners)
+    assert len(fake_rpc.sent) == 1
+
+@pytest.mark.asyncio
+async def test_underfunded_treasury_refunds_nothing(tmp_path, fake_rpc):
+    """A treasury that can't cover the event is reported before anything is sent"""
+    treasury = Keypair()
+    fake_rpc.balances[treasury.pubkey()] = 5_000_000
+    log = TicketLog(str(tmp_path / "log"))
+    sell_tickets(log, [Keypair().pubkey()], 3)
+    report = await RefundEngine(fake_rpc, treasury, log, checkpoint_directory=str(tmp_path / "cp")).refund_event("Show")
+    assert not report["success"]
+    assert "Insufficient treasury balance" in report["error"]
+    assert report["outstanding"] == 3
+    assert fake_rpc.sent == []
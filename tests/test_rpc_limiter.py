@@ -0,0 +1,167 @@
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from types import SimpleNamespace
+from aiohttp import web
+from solders.keypair import Keypair
+from src.rpc_limiter import LimitedClient, RpcLimiter, parse_retry_after
+from src.ticket_system import TicketSystem
+
+def throttled(retry_after=None):
+    """The error solana-py raises for an HTTP 429"""
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    request = httpx.Request("POST", "http://rpc.test")
+    response = httpx.Response(429, headers=headers, request=request)
+    try:
+        raise httpx.HTTPStatusError("Too Many Requests", request=request, response=response)
+    except httpx.HTTPStatusError as e:
+        try:
+            raise Exception("RPC request failed") from e
+        except Exception as wrapped:
+            return wrapped
+
+@pytest_asyncio.fixture
+async def rpc_node():
+    """Local JSON-RPC endpoint that can answer 429 before serving getBalance"""
+    state = {"throttle": 0, "retry_after": "0", "requests": 0}
+    
+    async def handle(request):
+        body = await request.json()
+        state["requests"] += 1
+        if state["throttle"]:
+            state["throttle"] -= 1
+            return web.Response(status=429, headers={"Retry-After": state["retry_after"]})
+        return web.json_response({
+            "jsonrpc": "2.0",
+            "result": {"context": {"slot": 1}, "value": 42},
+            "id": body["id"]
+        })
+    
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["url"] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    yield state
+    await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_429_is_retried_after_retry_after(rpc_node):
+    """Real RPC traffic backs off on 429, waits out Retry-After and succeeds"""
+    limiter = RpcLimiter(initial_limit=8)
+    system = TicketSystem(rpc_url=rpc_node["url"], rpc_limiter=limiter)
+    rpc_node["throttle"] = 1
+    rpc_node["retry_after"] = "0.1"
+    started = asyncio.get_running_loop().time()
+    assert await system.check_wallet_balance(Keypair().pubkey()) == 42
+    assert asyncio.get_running_loop().time() - started >= 0.1
+    assert rpc_node["requests"] == 2
+    assert limiter.stats["throttled"] == 1
+    assert limiter.limit == 4
+    await system.close()
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """A call that keeps getting 429s fails after max_retries"""
+    limiter = RpcLimiter(max_retries=2, retry_delay=0)
+    attempts = []
+    
+    async def always_throttled():
+        attempts.append(1)
+        raise throttled("0")
+    
+    with pytest.raises(Exception):
+        await limiter.call(always_throttled)
+    assert len(attempts) == 3
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_latency_is_steady():
+    """Fast, steady calls widen the window additively"""
+    limiter = RpcLimiter(initial_limit=2)
+    
+    async def fast():
+        return "ok"
+    
+    for _ in range(20):
+        await limiter.call(fast)
+    assert limiter.limit > 2
+    assert limiter.get_stats()["limit"] == limiter.limit
+
+@pytest.mark.asyncio
+async def test_slow_calls_hold_the_limit():
+    """Latency well above the baseline stops the window from growing"""
+    limiter = RpcLimiter(initial_limit=2)
+    delay = {"value": 0.001}
+    
+    async def call():
+        await asyncio.sleep(delay["value"])
+    
+    await limiter.call(call)
+    limit = limiter.governor.limit
+    delay["value"] = 0.05
+    for _ in range(5):
+        await limiter.call(call)
+    assert limiter.governor.limit == limit
+    assert limiter.stats["slow"] == 5
+
+@pytest.mark.asyncio
+async def test_timeouts_cut_the_limit():
+    """A timeout halves the window"""
+    limiter = RpcLimiter(initial_limit=8)
+    
+    async def timed_out():
+        raise httpx.ReadTimeout("timed out")
+    
+    with pytest.raises(httpx.ReadTimeout):
+        await limiter.call(timed_out)
+    assert limiter.limit == 4
+    assert limiter.stats["timeouts"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped(fake_rpc):
+    """No more than `limit` calls run at once through a LimitedClient"""
+    client = LimitedClient(fake_rpc, RpcLimiter(initial_limit=3, max_limit=3))
+    running = {"now": 0, "peak": 0}
+    original = fake_rpc.get_balance
+    
+    async def slow_balance(pubkey, commitment=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return await original(pubkey)
+    
+    fake_rpc.get_balance = slow_balance
+    await asyncio.gather(*[client.get_balance(Keypair().pubkey()) for _ in range(12)])
+    assert running["peak"] == 3
+
+@pytest.mark.asyncio
+async def test_confirm_transaction_limits_each_poll_not_the_loop():
+    """confirm_transaction isn't one long-held slot; its status polls go through the limiter"""
+    class PollingClient:
+        def __init__(self):
+            self.polls = 0
+        
+        async def get_signature_statuses(self, signatures):
+            self.polls += 1
+            return SimpleNamespace(value=[SimpleNamespace(confirmed=self.polls == 3)])
+        
+        async def confirm_transaction(self, tx_sig):
+            while not (await self.get_signature_statuses([tx_sig])).value[0].confirmed:
+                await asyncio.sleep(0)
+    
+    inner = PollingClient()
+    limiter = RpcLimiter(initial_limit=1, max_limit=1)
+    await LimitedClient(inner, limiter).confirm_transaction("signature")
+    assert inner.polls == 3
+    assert limiter.stats["calls"] == 3
+
+def test_parse_retry_after():
+    """Retry-After accepts seconds and HTTP dates"""
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
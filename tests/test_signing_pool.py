@@ -0,0 +1,86 @@
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.system_program import TransferParams, transfer
+from solders.transaction import Transaction as SoldersTransaction
+from solana.transaction import Transaction
+from src.nft_ticket_minter import NFTTicketMinter
+from src.signing_pool import SigningPool
+from src.ticket_system import TicketSystem
+
+def transfer_message(payer, extra_signer=None):
+    """Compiled message for a transfer, optionally needing a second signer"""
+    transaction = Transaction(fee_payer=payer.pubkey()).add(transfer(TransferParams(
+        from_pubkey=payer.pubkey(), to_pubkey=Keypair().pubkey(), lamports=1
+    )))
+    if extra_signer is not None:
+        transaction.add(transfer(TransferParams(
+            from_pubkey=extra_signer.pubkey(), to_pubkey=payer.pubkey(), lamports=1
+        )))
+    transaction.recent_blockhash = Hash.new_unique()
+    return transaction
+
+@pytest.mark.parametrize("use_processes", [False, True])
+@pytest.mark.asyncio
+async def test_pool_signs_like_the_event_loop(use_processes):
+    """Pool output is byte-identical to signing in-process, with one-off signers included"""
+    owner = Keypair()
+    pool = SigningPool([owner], workers=2, use_processes=use_processes, chunk_size=3)
+    try:
+        jobs = []
+        expected = []
+        for i in range(10):
+            second = Keypair() if i % 2 else None
+            transaction = transfer_message(owner, second)
+            jobs.append((transaction.compile_message(), [second] if second else []))
+            transaction.sign(owner, *([second] if second else []))
+            expected.append(transaction.serialize())
+        wires = await pool.sign_many(jobs)
+        assert wires == expected
+        for wire in wires:
+            SoldersTransaction.from_bytes(wire).verify()
+        assert pool.stats["batches"] == 4
+    finally:
+        pool.close()
+
+@pytest.mark.asyncio
+async def test_registered_keys_are_not_shipped():
+    """Only one-off signers travel with a job"""
+    owner = Keypair()
+    mint = Keypair()
+    pool = SigningPool([owner], workers=1, use_processes=False)
+    try:
+        _, extra = pool._job(transfer_message(owner, mint).compile_message(), [owner, mint])
+        assert extra == [bytes(mint)]
+    finally:
+        pool.close()
+
+@pytest.mark.asyncio
+async def test_bulk_purchase_signs_in_pool(fake_rpc):
+    """create_tickets signs through the pool and every batch lands"""
+    owner = Keypair()
+    pool = SigningPool([owner], workers=2, use_processes=False)
+    system = TicketSystem(signing_pool=pool)
+    system.client = fake_rpc
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000_000
+    try:
+        results = await system.create_tickets(owner, [1_000_000] * 100)
+        assert all(result["success"] for result in results)
+        assert pool.stats["signed"] == len(fake_rpc.sent)
+    finally:
+        pool.close()
+
+@pytest.mark.asyncio
+async def test_nft_mint_signs_in_pool(fake_rpc):
+    """The mint account's one-off key is signed for in the pool"""
+    owner = Keypair()
+    pool = SigningPool([owner], workers=1, use_processes=False)
+    minter = NFTTicketMinter(signing_pool=pool)
+    minter.client = fake_rpc
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    try:
+        result = await minter.create_nft_ticket(owner, "Show", "2026-01-01", {"seat": 1}, 1.0)
+        assert result["success"], result.get("error")
+        assert pool.stats["signed"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,172 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.single_flight import SingleFlight
+from src.ai_assistant import TicketingAIAssistant
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_call():
+    """Concurrent callers with the same key await a single call"""
+    flight = SingleFlight()
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+    
+    results = await asyncio.gather(*[flight.do("q", fetch) for _ in range(10)])
+    assert results == ["answer"] * 10
+    assert len(calls) == 1
+    assert flight.get_stats()["saved"] == 9
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    """An upstream error is raised to all waiters, then the key is retried"""
+    flight = SingleFlight()
+    
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+    
+    results = await asyncio.gather(*[flight.do("q", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()["errors"] == 1
+    
+    async def ok():
+        return "fine"
+    
+    assert await flight.do("q", ok) == "fine"
+    assert flight.get_stats()["calls"] == 2
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_call_alive():
+    """One cancelled caller doesn't cancel the shared call"""
+    flight = SingleFlight()
+    
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    first = asyncio.ensure_future(flight.do("q", slow))
+    second = asyncio.ensure_future(flight.do("q", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_cancelling_all_waiters_cancels_call():
+    """The shared call is abandoned once every caller is cancelled"""
+    flight = SingleFlight()
+    started = asyncio.Event()
+    
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+    
+    waiter = asyncio.ensure_future(flight.do("q", slow))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.sleep(0)
+    assert flight.get_stats()["cancelled"] == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_assistant_coalesces_normalized_queries():
+    """Duplicate assistant questions differing only in case/spacing share a call"""
+    assistant = TicketingAIAssistant(api_key="test-key")
+    calls = []
+    
+    async def create(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        message = SimpleNamespace(content="Airdrops are rate limited.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    queries = ["Why did my airdrop fail?", "why did my  AIRDROP fail?"] * 5
+    results = await asyncio.gather(*[assistant.get_response(query) for query in queries])
+    assert set(results) == {"Airdrops are rate limited."}
+    assert len(calls) == 1
+    assert assistant.get_coalescing_stats()["saved"] == 9
+
+@pytest.mark.asyncio
+async def test_stream_replays_buffered_items_to_late_joiners():
+    """A caller joining a running stream gets every item from the start"""
+    flight = SingleFlight()
+    calls = []
+    halfway = asyncio.Event()
+    
+    async def tokens():
+        calls.append(1)
+        for index, token in enumerate(["a", "b", "c", "d"]):
+            if index == 2:
+                halfway.set()
+                await asyncio.sleep(0.01)
+            yield token
+    
+    async def read():
+        return [token async for token in flight.stream("q", tokens)]
+    
+    first = asyncio.ensure_future(read())
+    await halfway.wait()
+    second = asyncio.ensure_future(read())
+    assert await first == await second == ["a", "b", "c", "d"]
+    assert len(calls) == 1
+    assert flight.get_stats()["saved"] == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_stream_abandoned_by_every_reader_is_cancelled():
+    """The shared stream stops once its last reader leaves"""
+    flight = SingleFlight()
+    closed = []
+    
+    async def tokens():
+        try:
+            while True:
+                yield "token"
+                await asyncio.sleep(0.01)
+        finally:
+            closed.append(1)
+    
+    reader = flight.stream("q", tokens)
+    assert await reader.__anext__() == "token"
+    await reader.aclose()
+    await asyncio.sleep(0.01)
+    assert closed == [1]
+    assert flight.get_stats()["cancelled"] == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_assistant_coalesces_streamed_queries():
+    """Duplicate streamed questions share one upstream stream"""
+    assistant = TicketingAIAssistant(api_key="test-key")
+    calls = []
+    
+    async def create(**kwargs):
+        calls.append(kwargs)
+        
+        async def iterate():
+            for token in ["Airdrops ", "are ", "rate limited."]:
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        
+        return SimpleNamespace(__aiter__=iterate)
+    
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    
+    async def ask(query):
+        return "".join([token async for token in assistant.stream_response(query)])
+    
+    queries = ["Why did my airdrop fail?", "why did my  AIRDROP fail?"] * 5
+    results = await asyncio.gather(*[ask(query) for query in queries])
+    assert set(results) == {"Airdrops are rate limited."}
+    assert len(calls) == 1
+    assert assistant.get_coalescing_stats()["saved"] == 9
+    assert assistant.governor.in_use == 0
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from src.nft_ticket_minter import NFTTicketMinter
+from src.ticket_address import TicketAddresser, event_key, seat_seed
+
+SEAT = {"section": "VIP", "row": "A", "seat": "1"}
+
+def test_pda_is_deterministic_and_cached():
+    """The same seat always maps to the same PDA, derived once"""
+    addresser = TicketAddresser(Keypair().pubkey())
+    first, bump = addresser.ticket_pda("Show", "VIP", "A", 1)
+    assert addresser.ticket_pda("Show", "VIP", "A", "1") == (first, bump)
+    assert addresser.ticket_pda("Show", "VIP", "A", 2)[0] != first
+    assert not first.is_on_curve()
+    assert addresser.cache_info()["hits"] == 1
+
+def test_seed_components_are_unambiguous():
+    """Seat parts can't run together into another seat's seed"""
+    assert seat_seed("Show", "A", "12", "3") != seat_seed("Show", "A1", "2", "3")
+    assert len(seat_seed("Show", "VIP", "A", "1")) == 32
+    addresser = TicketAddresser(Keypair().pubkey())
+    assert addresser.ticket_pda("Show", "A", "12", 3) != addresser.ticket_pda("Show", "A1", "2", 3)
+    assert event_key("Show|2026", "01-01") != event_key("Show", "2026|01-01")
+
+def test_pda_requires_a_program():
+    """Ticket PDAs need the ticket program id"""
+    with pytest.raises(ValueError):
+        TicketAddresser().ticket_pda("Show", "VIP", "A", 1)
+
+@pytest.mark.asyncio
+async def test_seat_addressed_mint(fake_rpc):
+    """A seat-addressed mint lands at the address computed from the seat"""
+    minter = NFTTicketMinter(ticket_addresser=TicketAddresser())
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    
+    expected = minter.get_ticket_address(owner.pubkey(), "Show", "2026-01-01", SEAT)
+    result = await minter.create_nft_ticket(owner, "Show", "2026-01-01", SEAT, 1.0)
+    assert result["success"], result.get("error")
+    assert result["nft_address"] == str(expected["nft_address"])
+    assert result["token_account"] == str(expected["token_account"])
+    assert expected["nft_address"] in fake_rpc.accounts
+    
+    # Only the owner signs
+    assert len(fake_rpc.sent[-1].signatures) == 1
+
+@pytest.mark.asyncio
+async def test_seat_cannot_be_minted_twice(fake_rpc):
+    """The derived address makes a second mint of the same seat fail"""
+    minter = NFTTicketMinter(ticket_addresser=TicketAddresser())
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    first = await minter.create_nft_ticket(owner, "Show", "2026-01-01", SEAT, 1.0)
+    assert first["success"]
+    
+    available = await minter.ledger.get_available(owner.pubkey())
+    
+    # Retrying under the same blockhash is the very same transaction, and isn't charged again
+    retry = await minter.create_nft_ticket(owner, "Show", "2026-01-01", SEAT, 1.0)
+    assert retry["success"]
+    assert retry["transaction_id"] == first["transaction_id"]
+    assert len(fake_rpc.sent) == 1
+    assert await minter.ledger.get_available(owner.pubkey()) == available
+    
+    # Under a new blockhash the existing seat account refuses it before anything is sent
+    fake_rpc.blockhash = Hash.new_unique()
+    second = await minter.create_nft_ticket(owner, "Show", "2026-01-01", SEAT, 1.0)
+    assert not second["success"]
+    assert "already in use" in second["error"]
+    assert len(fake_rpc.sent) == 1
+    assert await minter.ledger.get_available(owner.pubkey()) == available
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_seat_mints_are_charged_once(fake_rpc):
+    """Two identical seat mints in flight together share one send and one debit"""
+    minter = NFTTicketMinter(ticket_addresser=TicketAddresser())
+    minter.client = fake_rpc
+    solo, owner = Keypair(), Keypair()
+    fake_rpc.balances[solo.pubkey()] = fake_rpc.balances[owner.pubkey()] = 100_000_000
+    assert (await minter.create_nft_ticket(solo, "Show", "2026-01-01", SEAT, 1.0))["success"]
+    
+    results = await asyncio.gather(*[
+        minter.create_nft_ticket(owner, "Show", "2026-01-01", SEAT, 1.0) for _ in range(2)
+    ])
+    assert all(result["success"] for result in results)
+    assert len(fake_rpc.sent) == 2
+    assert await minter.ledger.get_available(owner.pubkey()) == await minter.ledger.get_available(solo.pubkey())
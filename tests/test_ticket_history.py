@@ -0,0 +1,112 @@
+import pytest
+from solders.keypair import Keypair
+from solana.rpc.commitment import Finalized
+from src.history_store import HistoryStore
+from src.nft_ticket_minter import NFTTicketMinter
+from src.transaction_cache import TransactionCache
+
+@pytest.fixture
+def minter(fake_rpc, tmp_path):
+    """Minter wired to the in-memory RPC with history stored under tmp_path"""
+    minter = NFTTicketMinter(
+        history_store=HistoryStore(str(tmp_path / "history")),
+        transaction_cache=TransactionCache(str(tmp_path / "transactions"))
+    )
+    minter.client = fake_rpc
+    return minter
+
+@pytest.mark.asyncio
+async def test_full_history(minter, fake_rpc):
+    """The full mode still returns every entry, newest first"""
+    mint = Keypair().pubkey()
+    fake_rpc.add_history(mint, "InitializeMint")
+    fake_rpc.add_history(mint, "Burn")
+    result = await minter.get_ticket_history(mint)
+    assert result["success"], result.get("error")
+    assert [entry["type"] for entry in result["history"]] == ["Usage", "Mint"]
+
+@pytest.mark.asyncio
+async def test_incremental_sync_fetches_only_new_entries(minter, fake_rpc):
+    """After the first sync only newer signatures and transactions are fetched"""
+    mint = Keypair().pubkey()
+    for _ in range(5):
+        fake_rpc.add_history(mint)
+    first = await minter.get_ticket_history(mint, incremental=True)
+    assert first["new_entries"] == 5
+    assert fake_rpc.calls["get_transaction"] == 5
+    
+    latest = fake_rpc.add_history(mint, "Burn")
+    second = await minter.get_ticket_history(mint, incremental=True)
+    assert second["new_entries"] == 1
+    assert fake_rpc.calls["get_transaction"] == 6
+    assert len(second["history"]) == 6
+    assert second["history"][0]["signature"] == str(latest)
+    
+    # Nothing new: one small signatures call, no transaction fetches
+    third = await minter.get_ticket_history(mint, incremental=True)
+    assert third["new_entries"] == 0
+    assert fake_rpc.calls["get_transaction"] == 6
+
+@pytest.mark.asyncio
+async def test_checkpoint_survives_restart(minter, fake_rpc, tmp_path):
+    """A new minter resumes from the persisted checkpoint"""
+    mint = Keypair().pubkey()
+    fake_rpc.add_history(mint)
+    await minter.get_ticket_history(mint, incremental=True)
+    
+    restarted = NFTTicketMinter(
+        history_store=HistoryStore(str(tmp_path / "history")),
+        transaction_cache=TransactionCache(str(tmp_path / "transactions"))
+    )
+    restarted.client = fake_rpc
+    fake_rpc.add_history(mint)
+    result = await restarted.get_ticket_history(mint, incremental=True)
+    assert result["new_entries"] == 1
+    assert len(result["history"]) == 2
+
+@pytest.mark.asyncio
+async def test_paging(minter, fake_rpc, monkeypatch):
+    """Long gaps are fetched page by page"""
+    monkeypatch.setattr("src.nft_ticket_minter.SIGNATURE_PAGE_LIMIT", 2)
+    mint = Keypair().pubkey()
+    for _ in range(5):
+        fake_rpc.add_history(mint)
+    result = await minter.get_ticket_history(mint, incremental=True)
+    assert len(result["history"]) == 5
+    assert fake_rpc.calls["get_signatures_for_address"] == 3
+
+@pytest.mark.asyncio
+async def test_unfinalized_transactions_are_skipped_and_retried(minter, fake_rpc, monkeypatch):
+    """A signature whose transaction isn't available yet is left out and fetched on the next sync"""
+    mint = Keypair().pubkey()
+    fake_rpc.add_history(mint)
+    pending = fake_rpc.add_history(mint, "Burn")
+    held = fake_rpc.transactions.pop(pending)
+
+    result = await minter.get_ticket_history(mint, incremental=True)
+    assert result["success"], result.get("error")
+    assert result["new_entries"] == 1
+    assert len(minter.transaction_cache) == 1
+
+    # Not finalized yet, but readable at confirmed: shown, not cached
+    original = fake_rpc.get_transaction
+
+    async def confirmed_only(signature, encoding="json", commitment=None, max_supported_transaction_version=None):
+        response = await original(signature, encoding, commitment, max_supported_transaction_version)
+        if commitment == Finalized and signature == pending:
+            response.value = None
+        return response
+
+    fake_rpc.transactions[pending] = held
+    monkeypatch.setattr(fake_rpc, "get_transaction", confirmed_only)
+    result = await minter.get_ticket_history(mint, incremental=True)
+    assert result["new_entries"] == 1
+    assert [entry["type"] for entry in result["history"]] == ["Usage", "Transfer"]
+    assert len(minter.transaction_cache) == 1
+
+def test_history_storage_is_opt_in(tmp_path, monkeypatch):
+    """A default minter writes nothing to the working directory"""
+    monkeypatch.chdir(tmp_path)
+    minter = NFTTicketMinter()
+    assert minter.history_store is None and minter.transaction_cache is None
+    assert list(tmp_path.iterdir()) == []
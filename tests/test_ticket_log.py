@@ -0,0 +1,95 @@
+import threading
+import pytest
+from solders.keypair import Keypair
+from src.ticket_log import TicketLog, MINTED, TRANSFERRED, USED, REFUNDED
+from src.ticket_system import TicketSystem
+
+def test_state_survives_restart(tmp_path):
+    """A reopened log replays to the same ticket state"""
+    log = TicketLog(str(tmp_path))
+    log.record(MINTED, "t1", "alice", price=5)
+    log.record(MINTED, "t2", "alice", price=7)
+    log.record(TRANSFERRED, "t1", "bob")
+    log.record(USED, "t1")
+    log.record(REFUNDED, "t2", refund_signature="sig")
+    before = dict(log.tickets)
+    log.close()
+
+    reopened = TicketLog(str(tmp_path))
+    assert reopened.tickets == before
+    assert reopened.get("t1") == {"status": USED, "owner": "bob", "price": 5}
+    assert reopened.counts() == {MINTED: 0, USED: 1, REFUNDED: 1}
+    assert reopened.stats["replayed"] == 5
+
+def test_snapshot_limits_replay_to_the_tail(tmp_path):
+    """After a snapshot only newer events are replayed"""
+    log = TicketLog(str(tmp_path), snapshot_every=10)
+    for i in range(25):
+        log.record(MINTED, f"t{i}", "alice")
+    log.wait_for_snapshot()
+    assert log.stats["snapshots"] == 2
+    log.close()
+
+    reopened = TicketLog(str(tmp_path), snapshot_every=10)
+    assert len(reopened) == 25
+    assert reopened.stats["replayed"] == 5
+    assert reopened.seq == 25
+
+def test_torn_write_is_dropped(tmp_path):
+    """A half-written final event from a crash is discarded, and logging continues"""
+    log = TicketLog(str(tmp_path))
+    log.record(MINTED, "t1", "alice")
+    log.close()
+    with open(tmp_path / "events.log", "a") as f:
+        f.write('{"seq":2,"type":"us')
+
+    reopened = TicketLog(str(tmp_path))
+    assert reopened.get("t1")["status"] == MINTED
+    reopened.record(USED, "t1")
+    reopened.close()
+    assert TicketLog(str(tmp_path)).get("t1")["status"] == USED
+
+def test_unknown_event_is_rejected(tmp_path):
+    """Only lifecycle events are accepted"""
+    with pytest.raises(ValueError):
+        TicketLog(str(tmp_path)).record("lost", "t1")
+
+@pytest.mark.asyncio
+async def test_ticket_system_records_mints(tmp_path, fake_rpc):
+    """Bulk purchases log a minted event per ticket"""
+    log = TicketLog(str(tmp_path))
+    system = TicketSystem(ticket_log=log)
+    system.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000
+    results = await system.create_tickets(owner, [1_000_000, 2_000_000])
+    for result in results:
+        assert log.get(result["ticket_pubkey"]) == {
+            "status": MINTED,
+            "owner": str(owner.pubkey()),
+            "price": result["ticket_data"]["price"]
+        }
+
+def test_snapshot_is_written_off_the_recording_path(tmp_path, monkeypatch):
+    """Recording continues while a snapshot is being written, and nothing is lost if it never finishes"""
+    log = TicketLog(str(tmp_path), snapshot_every=3)
+    release = threading.Event()
+    write = log._write_snapshot
+    monkeypatch.setattr(log, "_write_snapshot", lambda seq, tickets: (release.wait(5), write(seq, tickets)))
+    for i in range(3):
+        log.record(MINTED, f"t{i}", "alice")
+    log.record(USED, "t0")
+    log.record(MINTED, "t3", "bob")
+    assert log.stats["snapshots"] == 0
+
+    # A process dying mid-snapshot replays the set-aside log
+    crashed = TicketLog(str(tmp_path))
+    assert crashed.tickets == log.tickets
+    crashed.close()
+
+    release.set()
+    log.close()
+    reopened = TicketLog(str(tmp_path))
+    assert reopened.stats["replayed"] == 2
+    assert reopened.get("t0")["status"] == USED
+    assert len(reopened) == 4
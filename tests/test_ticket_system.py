@@ -0,0 +1,51 @@
+import pytest
+from solders.keypair import Keypair
+from src.ticket_system import TicketSystem, MAX_TRANSACTION_SIZE
+
+@pytest.fixture
+def ticket_system(fake_rpc):
+    """TicketSystem wired to the in-memory RPC client"""
+    system = TicketSystem()
+    system.client = fake_rpc
+    return system
+
+@pytest.mark.asyncio
+async def test_create_tickets_packs_transfers(ticket_system, fake_rpc):
+    """Hundreds of tickets go out in a handful of size-limited transactions"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000_000
+    prices = [1_000_000 + i for i in range(300)]
+    
+    results = await ticket_system.create_tickets(owner, prices)
+    
+    assert len(results) == 300
+    assert all(result["success"] for result in results)
+    assert len(fake_rpc.sent) < 20
+    assert all(len(bytes(tx)) <= MAX_TRANSACTION_SIZE for tx in fake_rpc.sent)
+    assert fake_rpc.calls["get_balance"] == 1
+    assert fake_rpc.calls["get_latest_blockhash"] == 1
+    for result, price in zip(results, prices):
+        assert fake_rpc.balances[result["ticket_pubkey"]] == price
+        assert result["ticket_data"]["price"] == price
+
+@pytest.mark.asyncio
+async def test_create_tickets_checks_total_balance(ticket_system, fake_rpc):
+    """The balance check covers the whole order"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 5_000_000
+    results = await ticket_system.create_tickets(owner, [2_000_000, 2_000_000, 2_000_000])
+    assert [result["success"] for result in results] == [False] * 3
+    assert "Insufficient balance" in results[0]["error"]
+    assert fake_rpc.sent == []
+
+@pytest.mark.asyncio
+async def test_create_tickets_reports_failed_batches(ticket_system, fake_rpc):
+    """A failed transaction fails only the tickets it carried"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000_000_000
+    fake_rpc.fail_sends = 1
+    results = await ticket_system.create_tickets(owner, [1_000_000] * 40)
+    failures = [result for result in results if not result["success"]]
+    assert 0 < len(failures) < 40
+    assert all(failure["status"] == "failed" and failure["transaction_id"] for failure in failures)
+    assert await ticket_system.create_tickets(owner, []) == []
@@ -0,0 +1,50 @@
+import time
+import pytest
+from src.topic_matcher import TopicMatcher
+from src.ai_assistant import TicketingAIAssistant
+
+TOPICS = ["solana", "sol", "wallet", "ticket", "smart contract", "public key", "nft"]
+
+def test_word_boundaries():
+    """Topics only match as whole words"""
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.find_topics("Is solana fast?") == ["solana"]
+    assert not matcher.matches("that sounds unsolanaish")
+    assert not matcher.matches("console output")
+
+def test_plurals_multiword_and_case():
+    """Plurals, mixed case and extra whitespace still match"""
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.find_topics("Two TICKETS and my Public   Key") == ["ticket", "public key"]
+    assert matcher.find_topics("deploy smart contracts to solana") == ["smart contract", "solana"]
+
+def test_longest_term_wins():
+    """Overlapping terms report the longest match"""
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.find_topics("solana then sol") == ["solana", "sol"]
+
+def test_synonyms_report_canonical_topic():
+    """Synonyms are reported as the topic they map to"""
+    matcher = TopicMatcher(TOPICS, {"phantom": "wallet", "Seed Phrase": "public key"})
+    assert matcher.find_topics("Phantom lost my seed phrase") == ["wallet", "public key"]
+
+def test_empty_vocabulary():
+    """An empty vocabulary never matches"""
+    matcher = TopicMatcher([])
+    assert matcher.find_topics("solana") == []
+    assert not matcher.matches("solana")
+
+def test_long_input_is_fast():
+    """Long pasted dumps are scanned quickly"""
+    matcher = TopicMatcher(TOPICS)
+    dump = "5KtPn1LGuxhFqnXGKxgVPJ3VaeuBd8kQn3r2ZkqQvd1x " * 20000 + "wallet"
+    start = time.perf_counter()
+    assert matcher.find_topics(dump) == ["wallet"]
+    assert time.perf_counter() - start < 2.0
+
+def test_assistant_uses_configured_vocabulary():
+    """The assistant's relevance check uses the configured topics"""
+    assistant = TicketingAIAssistant(api_key="test-key", allowed_topics=["concert"], topic_synonyms={})
+    assert assistant._is_relevant_query("When does the concert start?")
+    assert not assistant._is_relevant_query("How do I use my wallet?")
+    assert assistant.get_matched_topics("Concerts!") == ["concert"]
@@ -0,0 +1,73 @@
+import pytest
+from solders.keypair import Keypair
+from src.nft_ticket_minter import NFTTicketMinter
+from src.history_store import HistoryStore
+from src.transaction_cache import TransactionCache, decode_transaction, encode_transaction
+
+@pytest.mark.asyncio
+async def test_read_through(fake_rpc, tmp_path):
+    """The first lookup hits the RPC, later ones are served from disk"""
+    cache = TransactionCache(str(tmp_path))
+    signature = fake_rpc.add_history(Keypair().pubkey())
+    first = await cache.get_transaction(fake_rpc, signature)
+    second = await cache.get_transaction(fake_rpc, signature)
+    assert first == second == fake_rpc.transactions[signature]
+    assert fake_rpc.calls["get_transaction"] == 1
+    assert cache.stats["hits"] == 1
+
+def test_binary_round_trip(fake_rpc):
+    """Records hold wire bytes and decode back to the same response"""
+    signature = fake_rpc.add_history(Keypair().pubkey(), "Burn")
+    tx = fake_rpc.transactions[signature]
+    data = encode_transaction(tx)
+    assert len(data) < len(tx.to_json())
+    assert decode_transaction(data) == tx
+
+@pytest.mark.asyncio
+async def test_missing_transactions_are_not_cached(fake_rpc, tmp_path):
+    """A transaction the node can't return (not finalized yet) is fetched again next time"""
+    cache = TransactionCache(str(tmp_path))
+    signature = Keypair().sign_message(b"pending")
+    assert await cache.get_transaction(fake_rpc, signature) is None
+    assert await cache.get_transaction(fake_rpc, signature) is None
+    assert fake_rpc.calls["get_transaction"] == 2
+    assert len(cache) == 0
+
+def test_size_bound_evicts_least_recently_used(fake_rpc, tmp_path):
+    """Eviction drops the least recently read records first"""
+    address = Keypair().pubkey()
+    signatures = [fake_rpc.add_history(address) for _ in range(3)]
+    record_size = len(encode_transaction(fake_rpc.transactions[signatures[0]]))
+    cache = TransactionCache(str(tmp_path), max_bytes=record_size * 2)
+    cache.put(signatures[0], fake_rpc.transactions[signatures[0]])
+    cache.put(signatures[1], fake_rpc.transactions[signatures[1]])
+    cache.get(signatures[0])
+    cache.put(signatures[2], fake_rpc.transactions[signatures[2]])
+    assert signatures[0] in cache
+    assert signatures[1] not in cache
+    assert cache.stats["evictions"] == 1
+    assert cache.total_bytes <= cache.max_bytes
+
+def test_cache_survives_restart(fake_rpc, tmp_path):
+    """Records written by one process are found by the next"""
+    signature = fake_rpc.add_history(Keypair().pubkey())
+    TransactionCache(str(tmp_path)).put(signature, fake_rpc.transactions[signature])
+    reopened = TransactionCache(str(tmp_path))
+    assert reopened.get(signature) == fake_rpc.transactions[signature]
+    assert reopened.total_bytes > 0
+
+@pytest.mark.asyncio
+async def test_repeated_full_history_is_served_from_cache(fake_rpc, tmp_path):
+    """A second full history audit only lists signatures"""
+    minter = NFTTicketMinter(
+        history_store=HistoryStore(str(tmp_path / "history")),
+        transaction_cache=TransactionCache(str(tmp_path / "transactions"))
+    )
+    minter.client = fake_rpc
+    mint = Keypair().pubkey()
+    for _ in range(4):
+        fake_rpc.add_history(mint)
+    first = await minter.get_ticket_history(mint)
+    second = await minter.get_ticket_history(mint)
+    assert first == second
+    assert fake_rpc.calls["get_transaction"] == 4
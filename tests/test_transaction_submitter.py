@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from solders.keypair import Keypair
+from solders.system_program import TransferParams, transfer
+from solana.transaction import Transaction
+from src.ticket_system import TicketSystem
+from src.transaction_submitter import TransactionSubmitter
+
+def signed_transfer(fake_rpc, owner, lamports=1_000):
+    """Wire bytes of a transfer signed against the fake's blockhash"""
+    transaction = Transaction().add(transfer(TransferParams(
+        from_pubkey=owner.pubkey(), to_pubkey=Keypair().pubkey(), lamports=lamports
+    )))
+    transaction.recent_blockhash = fake_rpc.blockhash
+    transaction.sign(owner)
+    return transaction.serialize()
+
+@pytest.fixture
+def submitter():
+    """Submitter that rebroadcasts and polls without waiting"""
+    return TransactionSubmitter(rebroadcast_interval=0, poll_interval=0)
+
+@pytest.mark.asyncio
+async def test_rebroadcasts_until_confirmed(fake_rpc, submitter):
+    """Dropped sends are retried with the same bytes"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    fake_rpc.drop_sends = 2
+    outcome = await submitter.submit_raw(fake_rpc, signed_transfer(fake_rpc, owner), fake_rpc.block_height + 150)
+    assert outcome["status"] == "confirmed"
+    assert submitter.stats["rebroadcasts"] == 2
+    assert len(fake_rpc.sent) == 1
+
+@pytest.mark.asyncio
+async def test_lost_response_does_not_double_purchase(fake_rpc):
+    """A purchase whose send times out is still reported once, as confirmed"""
+    system = TicketSystem()
+    system.client = fake_rpc
+    system.submitter = TransactionSubmitter(rebroadcast_interval=0, poll_interval=0)
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 10_000_000
+    fake_rpc.lose_responses = 1
+    result = await system.create_ticket(owner, 1_000_000)
+    assert result["success"], result.get("error")
+    assert len(fake_rpc.sent) == 1
+    assert fake_rpc.balances[owner.pubkey()] == 10_000_000 - 1_000_000 - 5_000
+
+@pytest.mark.asyncio
+async def test_expired_blockhash_is_definitive(fake_rpc, submitter):
+    """A transaction that never lands is reported expired once its blockhash dies"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    fake_rpc.drop_sends = 3
+    last_valid_block_height = fake_rpc.block_height + 2
+    
+    # Every poll moves the chain forward one block
+    get_block_height = fake_rpc.get_block_height
+    async def advancing_block_height(commitment=None):
+        fake_rpc.block_height += 1
+        return await get_block_height(commitment)
+    fake_rpc.get_block_height = advancing_block_height
+    
+    outcome = await submitter.submit_raw(fake_rpc, signed_transfer(fake_rpc, owner), last_valid_block_height)
+    assert outcome["status"] == "expired"
+    assert not outcome["success"]
+    assert fake_rpc.sent == []
+
+@pytest.mark.asyncio
+async def test_preflight_rejection_fails_without_retrying(fake_rpc, submitter):
+    """A transaction rejected in simulation is not rebroadcast"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    fake_rpc.fail_sends = 1
+    outcome = await submitter.submit_raw(fake_rpc, signed_transfer(fake_rpc, owner), fake_rpc.block_height + 150)
+    assert outcome["status"] == "failed"
+    assert fake_rpc.calls["send_raw_transaction"] == 1
+
+@pytest.mark.asyncio
+async def test_same_signature_is_submitted_once(fake_rpc, submitter):
+    """Concurrent and repeated submissions of one transaction share a single outcome"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    wire = signed_transfer(fake_rpc, owner)
+    first, second = await asyncio.gather(
+        submitter.submit_raw(fake_rpc, wire, fake_rpc.block_height + 150),
+        submitter.submit_raw(fake_rpc, wire, fake_rpc.block_height + 150)
+    )
+    again = await submitter.submit_raw(fake_rpc, wire, fake_rpc.block_height + 150)
+    assert first is second is again
+    assert submitter.stats["submitted"] == 1
+    assert submitter.stats["deduplicated"] == 1
+    assert fake_rpc.calls["send_raw_transaction"] == 1
+
+@pytest.mark.asyncio
+async def test_already_processed_is_confirmed(fake_rpc):
+    """A fresh submitter resending a landed transaction reports it confirmed, not failed"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    wire = signed_transfer(fake_rpc, owner)
+    await TransactionSubmitter(poll_interval=0).submit_raw(fake_rpc, wire, fake_rpc.block_height + 150)
+    
+    outcome = await TransactionSubmitter(poll_interval=0).submit_raw(fake_rpc, wire, fake_rpc.block_height + 150)
+    assert outcome["status"] == "confirmed"
+    assert len(fake_rpc.sent) == 1
+
+@pytest.mark.asyncio
+async def test_failing_status_checks_give_up_as_unknown(fake_rpc):
+    """A node that never answers status checks ends the wait instead of hanging it"""
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 1_000_000
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("node unavailable")
+    fake_rpc.get_signature_statuses = unavailable
+    submitter = TransactionSubmitter(poll_interval=0, max_failed_polls=3)
+    wire = signed_transfer(fake_rpc, owner)
+    
+    outcome = await asyncio.wait_for(submitter.submit_raw(fake_rpc, wire, fake_rpc.block_height + 150), 5)
+    assert outcome["status"] == "unknown"
+    assert not outcome["success"]
+    assert submitter.get_outcome(outcome["signature"]) is None
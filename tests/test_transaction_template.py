@@ -0,0 +1,80 @@
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.system_program import TransferParams, transfer
+from solders.transaction import Transaction as SoldersTransaction
+from spl.token.instructions import get_associated_token_address
+from src.nft_ticket_minter import NFTTicketMinter
+from src.transaction_template import TransactionTemplate
+
+def resolved(message: Message) -> list:
+    """Instructions with indices resolved to keys, independent of key order"""
+    keys = message.account_keys
+    return [
+        (
+            keys[ix.program_id_index],
+            [(keys[i], message.is_signer(i), message.is_writable(i)) for i in ix.accounts],
+            bytes(ix.data)
+        )
+        for ix in message.instructions
+    ]
+
+def test_patched_mint_matches_a_fresh_build():
+    """Patching the template gives the same instructions as compiling from scratch"""
+    minter = NFTTicketMinter()
+    owner, mint = Keypair(), Keypair()
+    blockhash = Hash.new_unique()
+    template = minter._get_mint_template(1_461_600)
+    fields = {
+        "owner": owner.pubkey(),
+        "mint": mint.pubkey(),
+        "token_account": get_associated_token_address(owner.pubkey(), mint.pubkey())
+    }
+    
+    wire = template.sign(blockhash, {"owner": owner, "mint": mint}, **fields)
+    transaction = SoldersTransaction.from_bytes(wire)
+    transaction.verify()
+    
+    expected = Message.new_with_blockhash(
+        minter._mint_instructions(owner.pubkey(), mint.pubkey(), 1_461_600), owner.pubkey(), blockhash
+    )
+    assert transaction.message.recent_blockhash == blockhash
+    assert transaction.message.account_keys[0] == owner.pubkey()
+    assert resolved(transaction.message) == resolved(expected)
+
+def test_template_is_reused():
+    """Each rent value compiles once and the buffer is rewritten per build"""
+    minter = NFTTicketMinter()
+    template = minter._get_mint_template(1_461_600)
+    assert minter._get_mint_template(1_461_600) is template
+    owner = Keypair()
+    first = template.message_bytes(Hash.new_unique(), owner=owner.pubkey(), mint=Keypair().pubkey(),
+                                   token_account=Keypair().pubkey())
+    second = template.message_bytes(Hash.new_unique(), owner=owner.pubkey(), mint=Keypair().pubkey(),
+                                    token_account=Keypair().pubkey())
+    assert first != second and len(first) == len(second)
+
+def test_unknown_field_is_rejected():
+    """A field that never appears in the message is a build error"""
+    payer = Keypair().pubkey()
+    ix = transfer(TransferParams(from_pubkey=payer, to_pubkey=Keypair().pubkey(), lamports=1))
+    with pytest.raises(ValueError):
+        TransactionTemplate([ix], payer, {"missing": Keypair().pubkey()})
+
+@pytest.mark.asyncio
+async def test_mints_land_through_the_template(fake_rpc):
+    """Template-built mints create the mint account on the fake chain"""
+    minter = NFTTicketMinter()
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    results = [
+        await minter.create_nft_ticket(owner, "Show", "2026-01-01", {"seat": seat}, 1.0)
+        for seat in range(3)
+    ]
+    assert all(result["success"] for result in results)
+    assert len(minter._mint_templates) == 1
+    for result in results:
+        assert Pubkey.from_string(result["nft_address"]) in fake_rpc.accounts
@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from solders.keypair import Keypair
+from src.nft_ticket_minter import NFTTicketMinter
+from src.ticket_address import TicketAddresser
+from src.ticket_system import TicketSystem
+from src.verification_cache import VerificationCache
+
+@pytest.fixture
+def ticket_system(fake_rpc):
+    """TicketSystem with a verification cache, wired to the in-memory RPC client"""
+    system = TicketSystem(verification_cache=VerificationCache(valid_ttl=60, negative_ttl=60))
+    system.client = fake_rpc
+    return system
+
+@pytest.mark.asyncio
+async def test_repeat_scans_hit_memory(ticket_system, fake_rpc):
+    """Valid and missing tickets are each looked up once, even under concurrent scans"""
+    ticket, bogus = Keypair().pubkey(), Keypair().pubkey()
+    fake_rpc.balances[ticket] = 1_000_000
+
+    results = await asyncio.gather(*[ticket_system.verify_ticket(ticket) for _ in range(5)])
+    assert all(result["valid"] for result in results)
+    for _ in range(5):
+        assert not (await ticket_system.verify_ticket(bogus))["valid"]
+    assert fake_rpc.calls["get_balance"] == 2
+    stats = ticket_system.verification_cache.get_stats()
+    assert stats["negative_hits"] == 4
+    assert stats["coalesced"] == 4
+
+@pytest.mark.asyncio
+async def test_lookup_errors_are_not_cached(ticket_system, fake_rpc):
+    """A failed lookup is retried on the next scan instead of pinning an error"""
+    async def failing(pubkey):
+        raise RuntimeError("node unavailable")
+    ticket = Keypair().pubkey()
+    fake_rpc.balances[ticket] = 1_000_000
+    original, fake_rpc.get_balance = fake_rpc.get_balance, failing
+    assert not (await ticket_system.verify_ticket(ticket))["valid"]
+    fake_rpc.get_balance = original
+    assert (await ticket_system.verify_ticket(ticket))["valid"]
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_stay_bounded():
+    """Results age out after their TTL and the cache never outgrows max_entries"""
+    cache = VerificationCache(valid_ttl=0.05, max_entries=2)
+    lookups = []
+
+    async def fetch(pubkey):
+        lookups.append(pubkey)
+        return {"valid": True}, True
+
+    await cache.get("a", fetch)
+    await cache.get("a", fetch)
+    await asyncio.sleep(0.06)
+    await cache.get("a", fetch)
+    assert lookups == ["a", "a"]
+
+    await cache.get("b", fetch)
+    await cache.get("c", fetch)
+    assert len(cache) == 2
+    assert cache.get_stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_used_ticket_is_never_served_valid():
+    """Marking a ticket used wins over a lookup that was already in flight"""
+    cache = VerificationCache(valid_ttl=60)
+    release = asyncio.Event()
+
+    async def slow_fetch(pubkey):
+        await release.wait()
+        return {"valid": True}, True
+
+    scan = asyncio.ensure_future(cache.get("t1", slow_fetch))
+    await asyncio.sleep(0)
+    cache.mark_used("t1")
+    release.set()
+    assert (await scan)["valid"]
+    assert (await cache.get("t1", slow_fetch)) == {"valid": False, "error": "Ticket already used"}
+
+@pytest.mark.asyncio
+async def test_seat_mint_clears_negative_entry(fake_rpc):
+    """A seat scanned before it was minted verifies as soon as the mint lands"""
+    minter = NFTTicketMinter(ticket_addresser=TicketAddresser(), verification_cache=VerificationCache())
+    minter.client = fake_rpc
+    owner = Keypair()
+    fake_rpc.balances[owner.pubkey()] = 100_000_000
+    seat = {"section": "VIP", "row": "A", "seat": "1"}
+    address = minter.get_ticket_address(owner.pubkey(), "Show", "2026-01-01", seat)["nft_address"]
+
+    assert not (await minter.verify_nft_ticket(address))["valid"]
+    assert (await minter.create_nft_ticket(owner, "Show", "2026-01-01", seat, 1.0))["success"]
+    assert (await minter.verify_nft_ticket(address))["valid"]
+
+@pytest.mark.asyncio
+async def test_invalidation_only_discards_its_own_key():
+    """Invalidating one ticket doesn't stop an unrelated in-flight lookup from caching"""
+    cache = VerificationCache(valid_ttl=60)
+    release = asyncio.Event()
+    lookups = []
+
+    async def slow_fetch(pubkey):
+        lookups.append(pubkey)
+        await release.wait()
+        return {"valid": True}, True
+
+    scans = [asyncio.ensure_future(cache.get(key, slow_fetch)) for key in ("a", "b")]
+    while len(lookups) < 2:
+        await asyncio.sleep(0)
+    cache.invalidate("a")
+    release.set()
+    await asyncio.gather(*scans)
+    await cache.get("a", slow_fetch)
+    await cache.get("b", slow_fetch)
+    assert lookups == ["a", "b", "a"]
+
+@pytest.mark.asyncio
+async def test_bogus_scans_cannot_evict_used_pins():
+    """A flood of missing pubkeys cycles the LRU but leaves used tickets pinned"""
+    cache = VerificationCache(max_entries=10)
+
+    async def missing(pubkey):
+        return {"valid": False, "error": "Invalid ticket"}, False
+
+    cache.mark_used("t1")
+    for i in range(100):
+        await cache.get(f"bogus-{i}", missing)
+    assert cache.get_stats()["evictions"] == 90
+    assert (await cache.get("t1", missing)) == {"valid": False, "error": "Ticket already used"}
+
+@pytest.mark.asyncio
+async def test_used_pins_do_not_expire(monkeypatch):
+    """A used ticket stays rejected however long ago it was scanned; only max_used bounds the pins"""
+    cache = VerificationCache(max_used=2)
+    clock = [1000.0]
+    monkeypatch.setattr("src.verification_cache.time.monotonic", lambda: clock[0])
+
+    async def still_minted(pubkey):
+        return {"valid": True}, True
+
+    cache.mark_used("t1")
+    clock[0] += 10 * 24 * 3600
+    assert (await cache.get("t1", still_minted)) == {"valid": False, "error": "Ticket already used"}
+    cache.mark_used("t2")
+    cache.mark_used("t3")
+    assert cache.get_stats()["used_evictions"] == 1
+    assert cache.get_stats()["used"] == 2
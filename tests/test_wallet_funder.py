@@ -0,0 +1,75 @@
+import pytest
+from solders.keypair import Keypair
+from solana.rpc.commitment import Confirmed
+from src.transaction_packing import MAX_TRANSACTION_SIZE
+from src.wallet_funder import WalletFunder, MAX_AIRDROP
+
+@pytest.mark.asyncio
+async def test_treasury_fans_out_in_few_transactions(fake_rpc):
+    """Hundreds of wallets are topped up by a handful of packed transfers"""
+    treasury = Keypair()
+    fake_rpc.balances[treasury.pubkey()] = 1_000_000_000_000
+    wallets = [Keypair().pubkey() for _ in range(200)]
+    fake_rpc.balances[wallets[0]] = 50_000_000
+    funder = WalletFunder(fake_rpc, treasury=treasury)
+
+    report = await funder.fund({wallet: 50_000_000 for wallet in wallets})
+
+    assert report["success"]
+    assert report["funded"] == 200
+    assert all(fake_rpc.balances[wallet] == 50_000_000 for wallet in wallets)
+    assert funder.stats["transfers"] == 199
+    assert len(fake_rpc.sent) < 15
+    assert all(len(bytes(tx)) <= MAX_TRANSACTION_SIZE for tx in fake_rpc.sent)
+    assert fake_rpc.calls["get_multiple_accounts"] == 4
+
+@pytest.mark.asyncio
+async def test_short_treasury_sends_nothing(fake_rpc):
+    """A treasury that can't cover the whole fleet reports it instead of funding part of it"""
+    treasury = Keypair()
+    fake_rpc.balances[treasury.pubkey()] = 10_000_000
+    wallets = [Keypair().pubkey() for _ in range(3)]
+    report = await WalletFunder(fake_rpc, treasury=treasury).fund({wallet: 5_000_000 for wallet in wallets})
+    assert not report["success"]
+    assert "Treasury has" in report["wallets"][str(wallets[0])]["error"]
+    assert fake_rpc.sent == []
+
+@pytest.mark.asyncio
+async def test_airdrops_retry_with_backoff(fake_rpc):
+    """Faucet refusals are retried, and large targets are split into faucet-sized requests"""
+    fake_rpc.fail_airdrops = 3
+    wallets = [Keypair().pubkey() for _ in range(5)]
+    funder = WalletFunder(fake_rpc, base_delay=0.001)
+    targets = {wallet: 500_000_000 for wallet in wallets}
+    targets[wallets[0]] = MAX_AIRDROP + 1
+
+    report = await funder.fund(targets)
+
+    assert report["success"]
+    assert funder.stats["airdrop_retries"] == 3
+    assert funder.stats["airdrops"] == 6
+    assert fake_rpc.balances[wallets[0]] == MAX_AIRDROP + 1
+
+@pytest.mark.asyncio
+async def test_airdrop_gives_up_after_max_retries(fake_rpc):
+    """A wallet the faucet keeps refusing is reported unfunded with the last error"""
+    fake_rpc.fail_airdrops = 10
+    wallet = Keypair().pubkey()
+    report = await WalletFunder(fake_rpc, max_retries=2, base_delay=0.001).fund({wallet: 1_000})
+    assert report["funded"] == 0
+    assert report["wallets"][str(wallet)]["error"] == "Airdrop failed: 429 Too Many Requests"
+
+@pytest.mark.asyncio
+async def test_balances_are_read_at_confirmed(fake_rpc, monkeypatch):
+    """Balance reads see the transfers the funder just confirmed"""
+    commitments = []
+    read = fake_rpc.get_multiple_accounts
+
+    async def recording(pubkeys, commitment=None, **kwargs):
+        commitments.append(commitment)
+        return await read(pubkeys, commitment=commitment, **kwargs)
+
+    monkeypatch.setattr(fake_rpc, "get_multiple_accounts", recording)
+    wallets = [Keypair().pubkey() for _ in range(150)]
+    await WalletFunder(fake_rpc, treasury=Keypair()).get_balances(wallets)
+    assert commitments == [Confirmed, Confirmed]